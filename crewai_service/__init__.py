@@ -1,5 +1,13 @@
 """CrewAI Agentic Framework Service."""
 
-from .crew import AgenticCrew, get_available_agents, get_available_tasks
+from .catalog import get_available_agents, get_available_tasks
 
 __all__ = ['AgenticCrew', 'get_available_agents', 'get_available_tasks']
+
+
+def __getattr__(name):
+    # crewai is heavy; only load it when the crew class is actually needed
+    if name == 'AgenticCrew':
+        from .crew import AgenticCrew
+        return AgenticCrew
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
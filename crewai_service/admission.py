@@ -0,0 +1,92 @@
+"""Admission control that caps concurrent crew executions across worker processes."""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from store import ExecutionStore
+
+MAX_CONCURRENT_CREWS = int(os.environ.get("CREWAI_MAX_CONCURRENT_CREWS", 4))
+# Seconds a request may wait for a free slot before it is rejected.
+ADMISSION_TIMEOUT = float(os.environ.get("CREWAI_ADMISSION_TIMEOUT", 0))
+# Slots older than this are assumed abandoned; slots of processes that have exited are freed sooner.
+SLOT_STALE_SECONDS = float(os.environ.get("CREWAI_SLOT_STALE_SECONDS", 3 * 3600))
+POLL_INTERVAL = 0.25
+
+
+class AdmissionRejected(Exception):
+    """Raised when no execution slot frees up within the admission timeout."""
+
+    def __init__(self, limit: int, retry_after: int = 5):
+        super().__init__(f"Too many concurrent crew executions (limit {limit}); retry later")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Hands out a fixed number of execution slots held in the shared store."""
+
+    def __init__(
+        self,
+        store: ExecutionStore,
+        limit: int = MAX_CONCURRENT_CREWS,
+        timeout: float = ADMISSION_TIMEOUT,
+        stale_after: float = SLOT_STALE_SECONDS
+    ):
+        self.store = store
+        self.limit = limit
+        self.timeout = timeout
+        self.stale_after = stale_after
+        # Slots held by this process, so /health can report them without the store
+        self._held: Dict[str, int] = {}
+        self._held_lock = threading.Lock()
+
+    def try_acquire(self, execution_id: str, slots: int = 1) -> bool:
+        # A request never needs more slots than exist, or it could never be admitted
+        slots = min(slots, self.limit)
+        if not self.store.try_acquire_slot(execution_id, self.limit, self.stale_after, slots):
+            return False
+        with self._held_lock:
+            self._held[execution_id] = slots
+        return True
+
+    def acquire(self, execution_id: str, timeout: Optional[float] = None, slots: int = 1) -> None:
+        """Block until ``slots`` slots are free, raising AdmissionRejected after the timeout."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while not self.try_acquire(execution_id, slots):
+            if time.monotonic() >= deadline:
+                raise AdmissionRejected(self.limit)
+            time.sleep(POLL_INTERVAL)
+
+    async def acquire_async(self, execution_id: str, timeout: Optional[float] = None, slots: int = 1) -> None:
+        """Like ``acquire`` but waits and takes the store's write lock off the event loop."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while not await asyncio.to_thread(self.try_acquire, execution_id, slots):
+            if time.monotonic() >= deadline:
+                raise AdmissionRejected(self.limit)
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def release(self, execution_id: str) -> None:
+        self.store.release_slot(execution_id)
+        with self._held_lock:
+            self._held.pop(execution_id, None)
+
+    @contextmanager
+    def admit(self, execution_id: str, slots: int = 1) -> Iterator[None]:
+        self.acquire(execution_id, slots=slots)
+        try:
+            yield
+        finally:
+            self.release(execution_id)
+
+    def local_status(self) -> dict:
+        """Slots held by this process, from memory; never touches the store."""
+        with self._held_lock:
+            return {"limit": self.limit, "in_use_here": sum(self._held.values()), "runs_here": len(self._held)}
+
+    def status(self) -> dict:
+        """``local_status`` plus the slots in use across all processes, read from the store."""
+        return {**self.local_status(), "in_use": self.store.slots_in_use()}
@@ -2,215 +2,152 @@
 
 import os
 import sys
-import json
-import traceback
-from datetime import datetime
-from typing import Dict, Any, List
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from crew import AgenticCrew, get_available_agents, get_available_tasks
+import logs
+import service
+import workers
+from ingest import MAX_REQUEST_BYTES
+from responses import encode_json, parse_fields, parse_flag
 
 app = Flask(__name__)
+# Werkzeug refuses larger bodies before reading them, so uploads cannot fill the disk
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
 CORS(app)
 
-execution_history: List[Dict[str, Any]] = []
+
+def respond(response: service.Response):
+    payload, status = response
+    reply = jsonify(payload)
+    if status == 429:
+        reply.headers["Retry-After"] = str(payload.get("retry_after", 5))
+    return reply, status
+
+
+def respond_encoded(response: service.Response):
+    """Like ``respond`` but with ETag validation and compression, for large bodies."""
+    body, status, headers = encode_json(*response, request.headers)
+    return Response(body, status=status, headers=headers, mimetype='application/json')
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(error):
+    return respond(({"success": False, "error": f"Request exceeds {MAX_REQUEST_BYTES // (1024 * 1024)} MB"}, 413))
 
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
-        "status": "healthy",
-        "service": "crewai",
-        "timestamp": datetime.utcnow().isoformat()
-    })
+    return respond(service.health())
+
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: 200 once enough warm execution workers have crewai loaded."""
+    return respond(service.readiness())
 
 
 @app.route('/agents', methods=['GET'])
 def list_agents():
     """List available agent types."""
-    try:
-        agents = get_available_agents()
-        return jsonify({
-            "success": True,
-            "agents": agents
-        })
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+    return respond(service.list_agents())
 
 
 @app.route('/tasks', methods=['GET'])
 def list_tasks():
     """List available task types."""
-    try:
-        tasks = get_available_tasks()
-        return jsonify({
-            "success": True,
-            "tasks": tasks
-        })
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+    return respond(service.list_tasks())
 
 
 @app.route('/crews', methods=['GET'])
 def list_crews():
     """List available crew types."""
-    crews = [
-        {
-            "id": "research",
-            "name": "Research Crew",
-            "description": "Researcher + Writer for comprehensive research and documentation",
-            "agents": ["researcher", "writer"]
-        },
-        {
-            "id": "analysis",
-            "name": "Analysis Crew",
-            "description": "Researcher + Analyst for research and strategic analysis",
-            "agents": ["researcher", "analyst"]
-        },
-        {
-            "id": "full",
-            "name": "Full Crew",
-            "description": "All agents working together for comprehensive deliverables",
-            "agents": ["researcher", "writer", "analyst", "coordinator"]
-        },
-        {
-            "id": "custom",
-            "name": "Custom Crew",
-            "description": "Build your own crew with selected agents and tasks",
-            "agents": []
-        }
-    ]
-    return jsonify({
-        "success": True,
-        "crews": crews
-    })
+    return respond(service.list_crews())
 
 
 @app.route('/run', methods=['POST'])
 def run_crew():
     """Execute a crew with specified configuration."""
-    try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                "success": False,
-                "error": "No JSON data provided"
-            }), 400
-        
-        topic = data.get('topic', '')
-        crew_type = data.get('crew_type', 'research')
-        model = data.get('model', 'gpt-4o-mini')
-        custom_agents = data.get('agents', [])
-        custom_tasks = data.get('tasks', [])
-        documents = data.get('documents', [])
-        
-        if not topic:
-            return jsonify({
-                "success": False,
-                "error": "Topic is required"
-            }), 400
-        
-        execution_id = f"exec_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
-        
-        # Build document context string from uploaded documents
-        document_context = None
-        if documents:
-            doc_parts = []
-            for doc in documents:
-                doc_name = doc.get('name', 'Unknown')
-                doc_content = doc.get('content', '')
-                if doc_content:
-                    doc_parts.append(f"=== Document: {doc_name} ===\n{doc_content[:30000]}")
-            if doc_parts:
-                document_context = "\n\n".join(doc_parts)
-                print(f"Including {len(documents)} document(s) with {len(document_context)} chars of context")
-        
-        agentic_crew = AgenticCrew(llm_model=model, document_context=document_context)
-        
-        if crew_type == 'research':
-            crew = agentic_crew.create_research_crew(topic)
-        elif crew_type == 'analysis':
-            crew = agentic_crew.create_analysis_crew(topic)
-        elif crew_type == 'full':
-            crew = agentic_crew.create_full_crew(topic)
-        elif crew_type == 'custom' and custom_agents and custom_tasks:
-            crew = agentic_crew.create_custom_crew(topic, custom_agents, custom_tasks)
-        else:
-            crew = agentic_crew.create_research_crew(topic)
-        
-        start_time = datetime.utcnow()
-        result = agentic_crew.run(crew)
-        end_time = datetime.utcnow()
-        
-        execution_record = {
-            "id": execution_id,
-            "topic": topic,
-            "crew_type": crew_type,
-            "model": model,
-            "started_at": start_time.isoformat(),
-            "completed_at": end_time.isoformat(),
-            "duration_seconds": (end_time - start_time).total_seconds(),
-            "result": result,
-            "status": "completed"
-        }
-        execution_history.append(execution_record)
-        
-        return jsonify({
-            "success": True,
-            "execution_id": execution_id,
-            "result": result,
-            "duration_seconds": execution_record["duration_seconds"]
-        })
-        
-    except Exception as e:
-        error_details = traceback.format_exc()
-        print(f"Error executing crew: {error_details}")
-        
-        return jsonify({
-            "success": False,
-            "error": str(e),
-            "details": error_details
-        }), 500
+    return respond(service.run_crew(request.get_json(silent=True)))
+
+
+@app.route('/documents', methods=['POST'])
+def upload_documents():
+    """Upload PDF, DOCX, XLSX or text files for use in /run via document_ids."""
+    uploads = [(upload.filename, upload.stream) for _, upload in request.files.items(multi=True)]
+    return respond(service.ingest_documents(uploads))
+
+
+@app.route('/documents/<document_id>', methods=['GET'])
+def get_document(document_id: str):
+    """Get an uploaded document's metadata and a text preview."""
+    return respond(service.get_document(document_id))
 
 
 @app.route('/history', methods=['GET'])
 def get_history():
     """Get execution history."""
     limit = request.args.get('limit', 10, type=int)
-    return jsonify({
-        "success": True,
-        "executions": execution_history[-limit:][::-1]
-    })
+    fields = parse_fields(request.args.get('fields'))
+    summary = parse_flag(request.args.get('summary'))
+    return respond_encoded(service.get_history(limit, fields, summary))
+
+
+@app.route('/history/export', methods=['GET'])
+def export_history():
+    """Stream matching executions as JSONL, CSV, Parquet or Arrow."""
+    export, error = service.export_executions({key: request.args.get(key) for key in service.EXPORT_PARAMS})
+    if error:
+        return respond(error)
+    chunks, media_type, filename = export
+    return Response(
+        stream_with_context(chunks),
+        mimetype=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @app.route('/history/<execution_id>', methods=['GET'])
 def get_execution(execution_id: str):
     """Get a specific execution by ID."""
-    for execution in execution_history:
-        if execution["id"] == execution_id:
-            return jsonify({
-                "success": True,
-                "execution": execution
-            })
-    
-    return jsonify({
-        "success": False,
-        "error": "Execution not found"
-    }), 404
+    fields = parse_fields(request.args.get('fields'))
+    summary = parse_flag(request.args.get('summary'))
+    return respond_encoded(service.get_execution(execution_id, fields, summary))
+
+
+@app.route('/history/<execution_id>/logs', methods=['GET'])
+def get_execution_logs(execution_id: str):
+    """Get the structured log records of an execution."""
+    limit = request.args.get('limit', 1000, type=int)
+    return respond_encoded(service.get_execution_logs(execution_id, limit))
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    """Get the state of a queued run."""
+    return respond(service.get_job(job_id))
 
 
 if __name__ == '__main__':
     port = int(os.environ.get('CREWAI_PORT', 5001))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    if os.environ.get('CREWAI_SERVER', 'flask') == 'asgi':
+        # Production mode: async front end with multiple worker processes
+        import uvicorn
+        uvicorn.run(
+            "asgi:app",
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host='0.0.0.0',
+            port=port,
+            workers=int(os.environ.get('CREWAI_WORKERS', 2)),
+            log_level=os.environ.get('CREWAI_LOG_LEVEL', 'info')
+        )
+    else:
+        logs.setup_logging()
+        workers.start_pool()
+        service.start_maintenance()
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
@@ -0,0 +1,185 @@
+"""ASGI front end for production serving.
+
+Run with ``CREWAI_SERVER=asgi python api.py`` or directly with
+``uvicorn asgi:app --workers N``. Endpoints that read the store or compress
+responses are plain functions, which Starlette runs on its thread pool, so
+SQLite and gzip/zstd work never blocks the event loop. Crew executions run
+on a dedicated thread pool behind the admission controller, so cheap
+requests never queue behind long runs.
+crewai itself is only loaded by the execution workers (see workers.py).
+Worker processes share history and execution slots through the SQLite store.
+"""
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ingest
+import logs
+import service
+import workers
+from admission import AdmissionRejected
+from responses import encode_json, parse_fields, parse_flag
+from store import get_store
+
+# Threads per worker process reserved for crew executions.
+EXECUTION_THREADS = int(os.environ.get("CREWAI_EXECUTION_THREADS", service.get_admission().limit))
+
+_executor = ThreadPoolExecutor(max_workers=EXECUTION_THREADS, thread_name_prefix="crew-exec")
+
+
+def respond(response: service.Response) -> JSONResponse:
+    payload, status = response
+    headers = {"Retry-After": str(payload.get("retry_after", 5))} if status == 429 else None
+    return JSONResponse(payload, status_code=status, headers=headers)
+
+
+def respond_encoded(request: Request, response: service.Response) -> Response:
+    """Like ``respond`` but with ETag validation and compression, for large bodies."""
+    body, status, headers = encode_json(*response, request.headers)
+    return Response(body, status_code=status, headers=headers, media_type="application/json")
+
+
+def health_check(request: Request) -> JSONResponse:
+    return respond(service.health())
+
+
+def readiness_check(request: Request) -> JSONResponse:
+    return respond(service.readiness())
+
+
+def list_agents(request: Request) -> JSONResponse:
+    return respond(service.list_agents())
+
+
+def list_tasks(request: Request) -> JSONResponse:
+    return respond(service.list_tasks())
+
+
+def list_crews(request: Request) -> JSONResponse:
+    return respond(service.list_crews())
+
+
+async def run_crew(request: Request) -> JSONResponse:
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    # Validation looks up uploaded documents in the store
+    run_request, error = await run_in_threadpool(service.parse_run_request, data)
+    if error:
+        return respond(error)
+    if service.queue_mode():
+        return respond(await run_in_threadpool(service.enqueue_run, run_request))
+
+    admission = service.get_admission()
+    execution_id = run_request["execution_id"]
+    try:
+        await admission.acquire_async(execution_id, slots=service.run_slots(run_request))
+    except AdmissionRejected as e:
+        return respond(service.rejected_response(e))
+    try:
+        loop = asyncio.get_running_loop()
+        return respond(await loop.run_in_executor(_executor, service.execute_run, run_request))
+    finally:
+        await run_in_threadpool(admission.release, execution_id)
+
+
+async def upload_documents(request: Request) -> JSONResponse:
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > ingest.MAX_REQUEST_BYTES:
+        return respond(({"success": False, "error": f"Request exceeds {ingest.MAX_REQUEST_BYTES // (1024 * 1024)} MB"}, 413))
+    # Starlette spools each file part to a temporary file while parsing the form
+    async with request.form(max_files=100) as form:
+        uploads = [(value.filename, value.file) for _, value in form.multi_items() if hasattr(value, "filename")]
+        loop = asyncio.get_running_loop()
+        return respond(await loop.run_in_executor(None, service.ingest_documents, uploads))
+
+
+def get_document(request: Request) -> JSONResponse:
+    return respond(service.get_document(request.path_params["document_id"]))
+
+
+def get_history(request: Request) -> Response:
+    try:
+        limit = int(request.query_params.get("limit", 10))
+    except ValueError:
+        limit = 10
+    fields = parse_fields(request.query_params.get("fields"))
+    summary = parse_flag(request.query_params.get("summary"))
+    return respond_encoded(request, service.get_history(limit, fields, summary))
+
+
+def export_history(request: Request) -> Response:
+    export, error = service.export_executions({key: request.query_params.get(key) for key in service.EXPORT_PARAMS})
+    if error:
+        return respond(error)
+    chunks, media_type, filename = export
+    # A sync iterator is consumed on the thread pool, so store reads never block the event loop
+    return StreamingResponse(
+        chunks, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def get_execution(request: Request) -> Response:
+    fields = parse_fields(request.query_params.get("fields"))
+    summary = parse_flag(request.query_params.get("summary"))
+    return respond_encoded(request, service.get_execution(request.path_params["execution_id"], fields, summary))
+
+
+def get_execution_logs(request: Request) -> Response:
+    try:
+        limit = int(request.query_params.get("limit", 1000))
+    except ValueError:
+        limit = 1000
+    return respond_encoded(request, service.get_execution_logs(request.path_params["execution_id"], limit))
+
+
+def get_job(request: Request) -> JSONResponse:
+    return respond(service.get_job(request.path_params["job_id"]))
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    logs.setup_logging()
+    workers.start_pool()
+    service.start_maintenance()
+    yield
+    _executor.shutdown(wait=False, cancel_futures=True)
+    workers.get_pool().shutdown()
+    ingest.shutdown_ingest_pool()
+    logs.shutdown_logging()
+    get_store().release_process_slots(os.getpid())
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health_check, methods=["GET"]),
+        Route("/ready", readiness_check, methods=["GET"]),
+        Route("/agents", list_agents, methods=["GET"]),
+        Route("/tasks", list_tasks, methods=["GET"]),
+        Route("/crews", list_crews, methods=["GET"]),
+        Route("/run", run_crew, methods=["POST"]),
+        Route("/documents", upload_documents, methods=["POST"]),
+        Route("/documents/{document_id}", get_document, methods=["GET"]),
+        Route("/history", get_history, methods=["GET"]),
+        Route("/history/export", export_history, methods=["GET"]),
+        Route("/history/{execution_id}", get_execution, methods=["GET"]),
+        Route("/history/{execution_id}/logs", get_execution_logs, methods=["GET"]),
+        Route("/jobs/{job_id}", get_job, methods=["GET"]),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan,
+)
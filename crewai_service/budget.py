@@ -0,0 +1,304 @@
+"""Token-aware prompt budgeting for crew tasks.
+
+Each task prompt is split into three parts that compete for the model's
+context window: fixed instructions, upstream task outputs that CrewAI
+injects as context, and document excerpts. Instructions are never trimmed,
+upstream outputs get a reserved share, and documents fill what is left.
+The upstream reserve is a bound, not an estimate: task outputs are compacted
+to fit it before the consuming task starts (see compaction.py).
+
+Token counts use tiktoken when it is installed. Without it, counts are a
+local approximation of about four characters per word piece, which can be
+off by 10-20% for non-English or code-heavy text.
+"""
+
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+# Context windows (tokens) by model name prefix. Longest prefix wins.
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o-mini": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1": 200000,
+    "o3": 200000,
+    "o4-mini": 200000,
+    "claude": 200000,
+    "gemini-1.5": 1000000,
+    "gemini-2": 1000000,
+    "llama-3": 128000,
+    "mistral": 32000,
+    "offline": 128000,
+}
+DEFAULT_CONTEXT_WINDOW = 32000
+
+# USD per million (prompt, completion) tokens by model name prefix, for cost estimates.
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "o1-mini": (1.10, 4.40),
+    "o1": (15.00, 60.00),
+    "o3-mini": (1.10, 4.40),
+    "o3": (2.00, 8.00),
+    "o4-mini": (1.10, 4.40),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-haiku": (0.25, 1.25),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-7-sonnet": (3.00, 15.00),
+    "claude-3-opus": (15.00, 75.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "offline": (0.0, 0.0),
+}
+
+# Tokens held back for the model's answer.
+DEFAULT_OUTPUT_RESERVE = int(os.environ.get("CREWAI_OUTPUT_TOKEN_RESERVE", 4096))
+# Tokens reserved (and enforced) per upstream task whose output is injected as context.
+UPSTREAM_TOKENS_PER_TASK = int(os.environ.get("CREWAI_UPSTREAM_TOKEN_RESERVE", 4000))
+# Task outputs passed downstream are compacted to this many tokens (0 disables, see compaction.py).
+UPSTREAM_COMPACTION_TOKENS = int(os.environ.get("CREWAI_COMPACTION_TOKENS", 2000))
+# Optional cap on document tokens per document in a task prompt, trading cost against
+# coverage; about the 30,000 characters per document the service used to send. The
+# window left after instructions and the upstream reserve always applies (0 = only that).
+DOCUMENT_TOKENS_PER_DOCUMENT = int(os.environ.get("CREWAI_DOCUMENT_TOKENS_PER_DOCUMENT", 8000))
+# CrewAI's own system prompt, tool schemas and ReAct scaffolding.
+BASE_AGENT_OVERHEAD = 800
+TOOL_OVERHEAD = 120
+SAFETY_MARGIN = 0.05
+
+_APPROX_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_TRUNCATION_NOTE = "\n\n[... {omitted} tokens of this document omitted to fit the prompt budget ...]"
+
+
+@lru_cache(maxsize=16)
+def _encoding_for(model: str):
+    if tiktoken is None:
+        return None
+    name = model.split("/")[-1]
+    try:
+        return tiktoken.encoding_for_model(name)
+    except KeyError:
+        try:
+            return tiktoken.get_encoding("o200k_base" if name.startswith(("gpt-4o", "o")) else "cl100k_base")
+        except Exception:
+            return None
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count tokens with the model's tokenizer, or a close local approximation."""
+    if not text:
+        return 0
+    encoding = _encoding_for(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # BPE vocabularies average ~4 characters per word piece.
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _APPROX_TOKEN_RE.findall(text))
+
+
+def context_window(model: str) -> int:
+    """Return the context window for a model name (provider prefixes are ignored)."""
+    window = _longest_prefix(model, MODEL_CONTEXT_WINDOWS)
+    return DEFAULT_CONTEXT_WINDOW if window is None else window
+
+
+def _longest_prefix(model: str, table: Dict[str, Any]):
+    name = model.split("/")[-1].lower()
+    matches = [prefix for prefix in table if name.startswith(prefix)]
+    return table[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Estimated USD cost of a run, or None when the model has no known price."""
+    prices = _longest_prefix(model, MODEL_PRICES)
+    if prices is None:
+        return None
+    prompt_price, completion_price = prices
+    return round((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000, 6)
+
+
+def trim_to_tokens(text: str, max_tokens: int, model: str) -> Tuple[str, int]:
+    """
+    Trim text to at most ``max_tokens`` tokens, cutting at a paragraph or line break.
+
+    Returns:
+        The trimmed text and its token count.
+    """
+    total = count_tokens(text, model)
+    if total <= max_tokens:
+        return text, total
+    if max_tokens <= 0:
+        return "", 0
+
+    note_tokens = count_tokens(_TRUNCATION_NOTE.format(omitted=total), model)
+    target = max(0, max_tokens - note_tokens)
+    cut = int(len(text) * target / total)
+    while True:
+        head = text[:cut]
+        for boundary in ("\n\n", "\n", ". "):
+            index = head.rfind(boundary)
+            if index > cut * 0.8:
+                head = head[:index + len(boundary)].rstrip()
+                break
+        used = count_tokens(head, model)
+        if used <= target or cut == 0:
+            break
+        cut = int(cut * target / used * 0.98)
+    trimmed = head + _TRUNCATION_NOTE.format(omitted=total - used)
+    return trimmed, used + note_tokens
+
+
+class PromptBudget:
+    """Splits a model's context window across instructions, upstream outputs and documents."""
+
+    def __init__(
+        self,
+        model: str,
+        output_reserve: int = DEFAULT_OUTPUT_RESERVE,
+        upstream_per_task: int = UPSTREAM_TOKENS_PER_TASK,
+        tokens_per_document: int = DOCUMENT_TOKENS_PER_DOCUMENT
+    ):
+        self.model = model
+        self.window = context_window(model)
+        self.output_reserve = min(output_reserve, self.window // 4)
+        if UPSTREAM_COMPACTION_TOKENS > 0:
+            # Compacted outputs never need more than the compaction budget
+            upstream_per_task = min(upstream_per_task, UPSTREAM_COMPACTION_TOKENS)
+        self.upstream_per_task = upstream_per_task
+        self.tokens_per_document = tokens_per_document
+        self.reports: List[Dict[str, Any]] = []
+        self._counts: Dict[Tuple[int, int], int] = {}
+
+    def count(self, text: str) -> int:
+        # Documents are counted once per crew rather than once per task.
+        key = (len(text), hash(text))
+        if key not in self._counts:
+            self._counts[key] = count_tokens(text, self.model)
+        return self._counts[key]
+
+    def available(self) -> int:
+        """Tokens usable for the prompt after the output reserve and safety margin."""
+        return int(self.window * (1 - SAFETY_MARGIN)) - self.output_reserve
+
+    def fit_documents(
+        self,
+        documents: List[Dict[str, str]],
+        instructions: List[str],
+        upstream_tasks: int = 0,
+        tool_count: int = 0,
+        task_name: str = ""
+    ) -> str:
+        """
+        Render document excerpts that fit alongside the given instructions.
+
+        Instructions are counted exactly, upstream outputs get a fixed reserve
+        per context task (shrunk first if the window is tight), and documents
+        share the remainder of the model's window, up to
+        ``tokens_per_document`` for each document. Small documents are kept
+        whole; the rest is split evenly among larger ones.
+
+        Returns:
+            The rendered document context. A usage report is appended to
+            ``self.reports``.
+        """
+        instruction_tokens = sum(self.count(text) for text in instructions)
+        overhead = BASE_AGENT_OVERHEAD + TOOL_OVERHEAD * tool_count
+        remaining = self.available() - instruction_tokens - overhead
+
+        upstream = min(upstream_tasks * self.upstream_per_task, max(0, remaining // 2))
+        remaining -= upstream
+        if self.tokens_per_document > 0:
+            remaining = min(remaining, self.tokens_per_document * len(documents))
+        document_tokens = max(0, remaining)
+
+        rendered, doc_report = self._allocate(documents, document_tokens)
+        used = sum(entry["tokens"] for entry in doc_report)
+        self.reports.append({
+            "task": task_name,
+            "model": self.model,
+            "context_window": self.window,
+            "instructions_tokens": instruction_tokens + overhead,
+            "upstream_tasks": upstream_tasks,
+            "upstream_reserved_tokens": upstream,
+            "document_budget_tokens": document_tokens,
+            "document_tokens": used,
+            "output_reserved_tokens": self.output_reserve,
+            "prompt_tokens_estimate": instruction_tokens + overhead + upstream + used,
+            "documents": doc_report,
+        })
+        return rendered
+
+    def upstream_allowance(self, task_name: str) -> int:
+        """Tokens each context output may take in ``task_name``'s prompt, as reserved by ``fit_documents``."""
+        for report in reversed(self.reports):
+            if report["task"] == task_name and report["upstream_tasks"]:
+                return report["upstream_reserved_tokens"] // report["upstream_tasks"]
+        return self.upstream_per_task
+
+    def _allocate(self, documents: List[Dict[str, str]], budget: int) -> Tuple[str, List[Dict[str, Any]]]:
+        headers = [f"=== Document: {doc.get('name', 'Unknown')} ===\n" for doc in documents]
+        sizes = [self.count(doc.get("content", "")) for doc in documents]
+        budget -= sum(self.count(header) for header in headers)
+
+        # Water-fill: documents smaller than an even share keep their full size.
+        allowance = [0] * len(documents)
+        pending = sorted(range(len(documents)), key=lambda i: sizes[i])
+        remaining = max(0, budget)
+        while pending:
+            share = remaining // len(pending)
+            index = pending[0]
+            if sizes[index] <= share:
+                allowance[index] = sizes[index]
+                remaining -= sizes[index]
+                pending.pop(0)
+            else:
+                for index in pending:
+                    allowance[index] = share
+                break
+
+        parts = []
+        report = []
+        for doc, header, size, limit in zip(documents, headers, sizes, allowance):
+            content = doc.get("content", "")
+            if limit < size:
+                content, tokens = trim_to_tokens(content, limit, self.model)
+            else:
+                tokens = size
+            if content:
+                parts.append(header + content)
+            report.append({
+                "name": doc.get("name", "Unknown"),
+                "tokens": tokens,
+                "original_tokens": size,
+                "trimmed": tokens < size,
+            })
+        return "\n\n".join(parts), report
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-task reports plus totals across the crew."""
+        return {
+            "model": self.model,
+            "context_window": self.window,
+            "tokenizer": "tiktoken" if _encoding_for(self.model) is not None else "approximate",
+            "tasks": self.reports,
+            "total_prompt_tokens_estimate": sum(r["prompt_tokens_estimate"] for r in self.reports),
+        }
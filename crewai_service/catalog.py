@@ -0,0 +1,67 @@
+"""Agent and task catalog loaded from the YAML configuration.
+
+Kept free of crewai imports so metadata endpoints can answer before the
+framework has loaded.
+"""
+
+import hashlib
+import yaml
+from typing import Dict, List, Tuple
+from pathlib import Path
+
+CONFIG_DIR = Path(__file__).parent / "config"
+CONFIG_FILES = ("agents.yaml", "tasks.yaml")
+
+_config_version: Tuple[tuple, str] = ((), "")
+
+
+def load_yaml_config(filename: str) -> Dict:
+    """Load a YAML configuration file."""
+    config_path = CONFIG_DIR / filename
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def config_version() -> str:
+    """Short content hash of the agent and task configuration.
+
+    Re-hashed only when a file's mtime or size changes, so it is cheap to
+    call per request.
+    """
+    global _config_version
+    stamps = tuple(
+        (stat.st_mtime_ns, stat.st_size)
+        for stat in ((CONFIG_DIR / name).stat() for name in CONFIG_FILES)
+    )
+    if _config_version[0] != stamps:
+        digest = hashlib.sha256()
+        for name in CONFIG_FILES:
+            digest.update((CONFIG_DIR / name).read_bytes())
+        _config_version = (stamps, digest.hexdigest()[:12])
+    return _config_version[1]
+
+
+def get_available_agents() -> List[Dict[str, str]]:
+    """Get list of available agent types."""
+    config = load_yaml_config("agents.yaml")
+    return [
+        {
+            "id": key,
+            "role": value.get("role", "").strip(),
+            "goal": value.get("goal", "").strip()
+        }
+        for key, value in config.items()
+    ]
+
+
+def get_available_tasks() -> List[Dict[str, str]]:
+    """Get list of available task types."""
+    config = load_yaml_config("tasks.yaml")
+    return [
+        {
+            "id": key,
+            "description": value.get("description", "").strip()[:200],
+            "agent": value.get("agent", "")
+        }
+        for key, value in config.items()
+    ]
@@ -0,0 +1,154 @@
+"""Compaction of task outputs before they are passed downstream as context.
+
+CrewAI hands each task the raw outputs of its context tasks, so without
+compaction prompts grow at every stage of a crew. Outputs over the
+compaction budget, or over the upstream share a consuming task's prompt
+budget reserved for them, are shrunk by structured extraction first. Headings,
+list items, table rows and sentences that carry figures are kept in
+their original order and chosen by priority until the budget is spent.
+Prose with too little structure falls back to the extractive summarizer
+behind the Summary Generator tool. Whatever is still over budget is
+trimmed.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from budget import UPSTREAM_COMPACTION_TOKENS, count_tokens, trim_to_tokens
+from tools.summarize import summarize_text
+
+# Below this share of structured content, an output is treated as prose.
+MIN_STRUCTURED_SHARE = 0.15
+
+_HEADING_RE = re.compile(r"^(#{1,6}\s+\S|\*\*[^*]+\*\*:?$|[A-Z][A-Za-z0-9 ,&/()'-]{2,60}:$)")
+_LIST_RE = re.compile(r"^(?:[-*•]|\d+[.)])\s+")
+_TABLE_RE = re.compile(r"^\|.*\|$")
+_FIGURE_RE = re.compile(r"\d")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z\"'(\[])")
+
+# Segment priorities; lower is kept first.
+HEADING, FIGURE, STRUCTURE, LEAD, PROSE = range(5)
+
+
+def _segments(text: str) -> List[Tuple[int, int, str]]:
+    """``(priority, line number, text)`` for each heading, list item, table row and prose sentence."""
+    segments = []
+    in_code = False
+    for number, line in enumerate(text.splitlines()):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_code = not in_code
+            continue
+        if not stripped or in_code:
+            continue
+        if _HEADING_RE.match(stripped):
+            segments.append((HEADING, number, stripped))
+        elif _LIST_RE.match(stripped) or _TABLE_RE.match(stripped):
+            priority = FIGURE if _FIGURE_RE.search(stripped) else STRUCTURE
+            segments.append((priority, number, line.rstrip()))
+        else:
+            for index, sentence in enumerate(_SENTENCE_RE.split(stripped)):
+                if _FIGURE_RE.search(sentence):
+                    priority = FIGURE
+                else:
+                    priority = LEAD if index == 0 else PROSE
+                segments.append((priority, number, sentence))
+    return segments
+
+
+def extract_structure(text: str, budget: int, model: str) -> Tuple[str, float]:
+    """
+    Keep the highest-priority segments of ``text`` that fit in ``budget`` tokens.
+
+    Returns:
+        The extracted text, in original order, and the share of the
+        original tokens that was headings, lists, tables or figures.
+    """
+    segments = _segments(text)
+    sizes = [count_tokens(segment[2], model) + 1 for segment in segments]
+    structured = sum(size for segment, size in zip(segments, sizes) if segment[0] <= STRUCTURE)
+    total = sum(sizes) or 1
+
+    kept = set()
+    remaining = budget
+    for index in sorted(range(len(segments)), key=lambda i: segments[i][:2]):
+        if sizes[index] <= remaining:
+            kept.add(index)
+            remaining -= sizes[index]
+
+    lines: List[str] = []
+    last_line = None
+    for index, (_, number, segment) in enumerate(segments):
+        if index not in kept:
+            continue
+        if number == last_line:
+            lines[-1] += " " + segment
+        else:
+            lines.append(segment)
+        last_line = number
+    return "\n".join(lines), structured / total
+
+
+def compact_output(text: str, budget: int, model: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Shrink a task output to at most ``budget`` tokens.
+
+    Returns:
+        The compacted text and a report with the original and compacted token
+        counts and the method used: ``none``, ``structured``, ``summary`` or
+        ``trimmed``.
+    """
+    original = count_tokens(text, model)
+    if original <= budget:
+        return text, {"original_tokens": original, "compacted_tokens": original, "method": "none"}
+
+    compacted, structured_share = extract_structure(text, budget, model)
+    method = "structured"
+    if structured_share < MIN_STRUCTURED_SHARE or not compacted:
+        # Scale the character limit by this text's own characters per token
+        compacted = summarize_text(text, max(1, int(len(text) * budget / original)))
+        method = "summary"
+    compacted_tokens = count_tokens(compacted, model)
+    if compacted_tokens > budget or not compacted.strip(". "):
+        compacted, compacted_tokens = trim_to_tokens(text, budget, model)
+        method = "trimmed"
+    return compacted, {"original_tokens": original, "compacted_tokens": compacted_tokens, "method": method}
+
+
+class OutputCompactor:
+    """Compacts outputs of tasks that feed other tasks and records every edge."""
+
+    def __init__(self, model: str, budget: int = UPSTREAM_COMPACTION_TOKENS):
+        self.model = model
+        self.budget = budget
+        self.edges: List[Dict[str, Any]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    def compact(self, source: str, consumers: List[str], text: str, limit: Optional[int] = None) -> str:
+        """
+        Compact ``text`` from task ``source`` once and record one edge per consuming task.
+
+        Args:
+            limit: Upstream tokens reserved for this output by the consumers'
+                prompt budgets; enforced even when compaction is disabled.
+        """
+        budget = self.budget if self.enabled else None
+        if limit is not None:
+            budget = limit if budget is None else min(budget, limit)
+        if budget is None:
+            return text
+        compacted, report = compact_output(text, budget, self.model)
+        saved = report["original_tokens"] - report["compacted_tokens"]
+        for consumer in consumers:
+            self.edges.append({"from": source, "to": consumer, **report, "saved_tokens": saved})
+        return compacted
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget,
+            "edges": self.edges,
+            "saved_tokens": sum(edge["saved_tokens"] for edge in self.edges),
+        }
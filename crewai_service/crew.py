@@ -1,35 +1,159 @@
 """CrewAI Crew Configuration and Management."""
 
+import contextvars
 import os
-import yaml
-from typing import Optional, Dict, Any, List
-from pathlib import Path
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Callable
 
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 
-from tools.custom_tools import format_data, generate_summary, extract_bullet_points, score_priority
+from tools.custom_tools import (
+    format_data, generate_summary, extract_bullet_points, score_priority, score_priorities,
+    lookup_facts, find_in_documents, document_outline,
+)
+from tools.fact_index import FactIndex, activate_fact_indexes
+from tools.memo import ToolCallCache, activate_tool_cache
+from budget import PromptBudget
+from compaction import OutputCompactor
+from offline_llm import OfflineLLM, is_offline_model
+from catalog import load_yaml_config, get_available_agents, get_available_tasks
 
 
-def load_yaml_config(filename: str) -> Dict:
-    """Load a YAML configuration file."""
-    config_path = Path(__file__).parent / "config" / filename
-    with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+DOCUMENT_TASK_TEMPLATE = """CRITICAL PRIORITY - DOCUMENT-DRIVEN ANALYSIS REQUIRED
+
+The user has provided specific documentation that MUST be the foundation of your entire analysis. Your output quality will be judged primarily on how thoroughly you incorporate, reference, and reflect the content from these documents.
+
+=== MANDATORY REQUIREMENTS ===
+1. DEEP ANALYSIS: Read every section of the provided documents carefully. Extract specific facts, figures, quotes, and data points.
+2. HEAVY WEIGHTING: The documents are your PRIMARY source - weight their content 5x more heavily than any general knowledge.
+3. DIRECT REFERENCES: Your output MUST explicitly cite and reference specific information from the documents (e.g., "According to the provided documentation...", "The uploaded materials indicate...", "As stated in [document name]...").
+4. COMPREHENSIVE COVERAGE: Address ALL relevant topics, data, and insights found in the documents - do not cherry-pick.
+5. ACCURACY CHECK: Never contradict or ignore information in the provided documents. If there's ambiguity, note it and explain.
+6. EXACT FIGURES: Use the Document Fact Lookup, Document Keyword Search and Document Outline tools to find specific numbers, names, dates and sections instead of relying on memory.
+
+--- PROVIDED DOCUMENTS (ANALYZE THOROUGHLY) ---
+{documents}
+--- END DOCUMENTS ---
+
+ORIGINAL TASK:
+{description}
+
+FINAL REMINDER: Your analysis MUST demonstrate deep engagement with the uploaded documents. Generic responses that ignore the specific content provided will be considered failures. Quote, reference, and build upon the document content extensively."""
+
+# Also enhance expected output to emphasize document integration
+DOCUMENT_EXPECTED_OUTPUT_TEMPLATE = """{expected_output}
+
+CRITICAL: Your output must include:
+- Direct quotes or specific data points from the provided documents
+- Clear references to document sources (e.g., "As detailed in the uploaded documentation...")
+- Analysis that builds upon and extends the information in the documents
+- No generic statements that could apply without having read the documents"""
+
+MAP_TASK_TEMPLATE = """PARALLEL RESEARCH PASS {index} OF {passes}
+
+The documents for this request were divided among {passes} researchers working at the same time. You have been given only the documents below. Report what THEY say about the topic; another analyst will merge your findings with the other passes, so do not speculate about documents you have not seen and name the source document for every finding.
+
+{description}"""
+
+MAP_EXPECTED_OUTPUT = """Findings from the assigned documents, each naming the document it came from and including the specific figures, quotes and data points that support it."""
+
+REDUCE_TASK_TEMPLATE = """MERGE PARALLEL RESEARCH FINDINGS
+
+Research on {topic} was split into {passes} parallel passes, each covering different documents. Their findings are below. Merge them into a single research report:
+1. Combine overlapping findings, keeping the most specific figures and quotes.
+2. Keep every finding attributed to its source document.
+3. Point out where documents disagree instead of silently picking one side.
+4. Use the Document Fact Lookup and Document Keyword Search tools to check exact figures when findings conflict.
+
+--- RESEARCH FINDINGS ---
+{findings}
+--- END FINDINGS ---
+
+ORIGINAL TASK:
+{description}"""
+
+RESEARCH_CONTEXT_TEMPLATE = """{description}
+
+Build on the shared research findings below; they were produced once for all deliverables on this topic.
+
+--- RESEARCH FINDINGS ---
+{research}
+--- END RESEARCH FINDINGS ---"""
+
+# Research runs as parallel per-document passes plus a merge step once a request
+# has this many documents (0 disables).
+MAP_REDUCE_MIN_DOCUMENTS = int(os.environ.get("CREWAI_MAP_REDUCE_MIN_DOCUMENTS", 2))
+# Research passes run at the same time for one request.
+MAP_REDUCE_WORKERS = int(os.environ.get("CREWAI_MAP_REDUCE_WORKERS", 4))
+# Documents smaller than this many tokens are grouped into a shared research pass.
+MAP_GROUP_TOKENS = int(os.environ.get("CREWAI_MAP_GROUP_TOKENS", 4000))
+
+# Predefined crews: agent types, then (task type, agent type, upstream task types) in run order
+CREW_LAYOUTS = {
+    "research": (
+        ["researcher", "writer"],
+        [
+            ("research_task", "researcher", []),
+            ("writing_task", "writer", ["research_task"]),
+        ],
+    ),
+    "analysis": (
+        ["researcher", "analyst"],
+        [
+            ("research_task", "researcher", []),
+            ("analysis_task", "analyst", ["research_task"]),
+        ],
+    ),
+    "full": (
+        ["researcher", "writer", "analyst", "coordinator"],
+        [
+            ("research_task", "researcher", []),
+            ("writing_task", "writer", ["research_task"]),
+            ("analysis_task", "analyst", ["research_task"]),
+            ("synthesis_task", "coordinator", ["writing_task", "analysis_task"]),
+        ],
+    ),
+}
 
 
 class AgenticCrew:
     """Flexible CrewAI implementation for various use cases."""
     
-    def __init__(self, llm_model: str = "gpt-4o-mini", document_context: str = None):
+    def __init__(
+        self,
+        llm_model: str = "gpt-4o-mini",
+        document_context: str = None,
+        fact_indexes: Dict[str, FactIndex] = None,
+        documents: List[Dict[str, str]] = None,
+        verbose: bool = False,
+        research_mode: str = "auto"
+    ):
         self.llm_model = llm_model
-        self.document_context = document_context
+        self.research_mode = research_mode
+        self.verbose = verbose
+        self.documents = documents or []
+        if document_context and not self.documents:
+            self.documents = [{"name": "Provided documents", "content": document_context}]
+        # "offline" runs use a local stand-in model for load testing
+        self.llm = OfflineLLM(llm_model) if is_offline_model(llm_model) else llm_model
+        self.budget = PromptBudget(llm_model)
+        self.compactor = OutputCompactor(llm_model)
+        self.tool_cache = ToolCallCache()
+        self.fact_indexes = fact_indexes or {}
         self.agents_config = load_yaml_config("agents.yaml")
         self.tasks_config = load_yaml_config("tasks.yaml")
-        self.custom_tools = [format_data, generate_summary, extract_bullet_points, score_priority]
+        self.task_timings: List[Dict[str, Any]] = []
+        self.token_usage: Dict[str, int] = {}
+        self.research_passes: List[Dict[str, Any]] = []
+        self._research_plan: Optional[List[List[Dict[str, str]]]] = None
+        self.custom_tools = [format_data, generate_summary, extract_bullet_points, score_priority, score_priorities]
+        if self.fact_indexes:
+            self.custom_tools += [lookup_facts, find_in_documents, document_outline]
     
-    def create_agent(self, agent_type: str, topic: str, tools: List = None) -> Agent:
-        """Create an agent from configuration."""
+    def agent_text(self, agent_type: str, topic: str) -> Tuple[str, str, str]:
+        """Role, goal and backstory for an agent type and topic."""
         config = self.agents_config.get(agent_type)
         if not config:
             raise ValueError(f"Unknown agent type: {agent_type}")
@@ -39,114 +163,155 @@ class AgenticCrew:
         backstory = config['backstory'].replace('{topic}', topic)
         
         # Enhance agent goal and backstory when documents are provided
-        if self.document_context:
+        if self.documents:
             goal = f"{goal} You have been given specific documentation that MUST be deeply analyzed and heavily weighted in all your outputs. Your primary responsibility is to extract, reference, and build upon the content from these provided documents."
             backstory = f"{backstory} You are currently working with user-provided documentation that contains critical information. You must treat these documents as your authoritative source, citing specific details and ensuring your analysis directly reflects their content."
         
+        return role, goal, backstory
+    
+    def create_agent(self, agent_type: str, topic: str, tools: List = None) -> Agent:
+        """Create an agent from configuration."""
+        role, goal, backstory = self.agent_text(agent_type, topic)
         return Agent(
             role=role,
             goal=goal,
             backstory=backstory,
-            verbose=config.get('verbose', True),
-            allow_delegation=config.get('allow_delegation', False),
+            verbose=self.verbose and self.agents_config[agent_type].get('verbose', True),
+            allow_delegation=self.agents_config[agent_type].get('allow_delegation', False),
             tools=tools or self.custom_tools,
-            llm=self.llm_model
+            llm=self.llm
         )
     
-    def create_task(self, task_type: str, topic: str, agent: Agent, context: List[Task] = None) -> Task:
-        """Create a task from configuration."""
+    def task_text(
+        self,
+        task_type: str,
+        topic: str,
+        agent: Agent,
+        context: List[Task] = None,
+        documents: List[Dict[str, str]] = None,
+        task_name: str = None,
+        research: str = None
+    ) -> Tuple[str, str]:
+        """Description and expected output for a task type, with documents fitted to the budget.
+        
+        ``documents`` defaults to all of the crew's documents. ``research`` is
+        a finished research result included in place of a research task in
+        ``context``.
+        """
         config = self.tasks_config.get(task_type)
         if not config:
             raise ValueError(f"Unknown task type: {task_type}")
         
         description = config['description'].replace('{topic}', topic)
         expected_output = config['expected_output'].replace('{topic}', topic)
+        if research:
+            description = RESEARCH_CONTEXT_TEMPLATE.format(description=description, research=research)
         
         # Incorporate document context into task description if available
-        if self.document_context:
-            description = f"""CRITICAL PRIORITY - DOCUMENT-DRIVEN ANALYSIS REQUIRED
-
-The user has provided specific documentation that MUST be the foundation of your entire analysis. Your output quality will be judged primarily on how thoroughly you incorporate, reference, and reflect the content from these documents.
-
-=== MANDATORY REQUIREMENTS ===
-1. DEEP ANALYSIS: Read every section of the provided documents carefully. Extract specific facts, figures, quotes, and data points.
-2. HEAVY WEIGHTING: The documents are your PRIMARY source - weight their content 5x more heavily than any general knowledge.
-3. DIRECT REFERENCES: Your output MUST explicitly cite and reference specific information from the documents (e.g., "According to the provided documentation...", "The uploaded materials indicate...", "As stated in [document name]...").
-4. COMPREHENSIVE COVERAGE: Address ALL relevant topics, data, and insights found in the documents - do not cherry-pick.
-5. ACCURACY CHECK: Never contradict or ignore information in the provided documents. If there's ambiguity, note it and explain.
-
---- PROVIDED DOCUMENTS (ANALYZE THOROUGHLY) ---
-{self.document_context}
---- END DOCUMENTS ---
-
-ORIGINAL TASK:
-{description}
-
-FINAL REMINDER: Your analysis MUST demonstrate deep engagement with the uploaded documents. Generic responses that ignore the specific content provided will be considered failures. Quote, reference, and build upon the document content extensively."""
-            
-            # Also enhance expected output to emphasize document integration
-            expected_output = f"""{expected_output}
-
-CRITICAL: Your output must include:
-- Direct quotes or specific data points from the provided documents
-- Clear references to document sources (e.g., "As detailed in the uploaded documentation...")
-- Analysis that builds upon and extends the information in the documents
-- No generic statements that could apply without having read the documents"""
+        documents = self.documents if documents is None else documents
+        if documents:
+            expected_output = DOCUMENT_EXPECTED_OUTPUT_TEMPLATE.format(expected_output=expected_output)
+            if task_type == "research_task" and task_name is None and self.research_plan():
+                # map_reduce_research writes the merge prompt; the documents go to the parallel passes
+                return description, expected_output
+            documents = self.budget.fit_documents(
+                documents,
+                instructions=[
+                    DOCUMENT_TASK_TEMPLATE.format(documents="", description=description),
+                    expected_output,
+                    agent.role, agent.goal, agent.backstory,
+                ],
+                upstream_tasks=len(context or []),
+                tool_count=len(agent.tools or []),
+                task_name=task_name or task_type
+            )
+            description = DOCUMENT_TASK_TEMPLATE.format(documents=documents, description=description)
         
+        return description, expected_output
+    
+    def create_task(
+        self, task_type: str, topic: str, agent: Agent, context: List[Task] = None, research: str = None
+    ) -> Task:
+        """Create a task from configuration."""
+        description, expected_output = self.task_text(task_type, topic, agent, context, research=research)
         return Task(
+            name=task_type,
             description=description,
             expected_output=expected_output,
             agent=agent,
             context=context or []
         )
     
-    def create_research_crew(self, topic: str) -> Crew:
-        """Create a research-focused crew."""
-        researcher = self.create_agent("researcher", topic)
-        writer = self.create_agent("writer", topic)
+    def create_crew(self, crew_type: str, topic: str) -> Crew:
+        """Create one of the predefined crews in ``CREW_LAYOUTS``."""
+        agent_types, task_layout = CREW_LAYOUTS[crew_type]
+        agents = {agent_type: self.create_agent(agent_type, topic) for agent_type in agent_types}
         
-        research_task = self.create_task("research_task", topic, researcher)
-        writing_task = self.create_task("writing_task", topic, writer, context=[research_task])
+        tasks = {}
+        for task_type, agent_type, upstream in task_layout:
+            tasks[task_type] = self.create_task(
+                task_type, topic, agents[agent_type], context=[tasks[name] for name in upstream]
+            )
         
         return Crew(
-            agents=[researcher, writer],
-            tasks=[research_task, writing_task],
+            agents=list(agents.values()),
+            tasks=list(tasks.values()),
             process=Process.sequential,
-            verbose=True
+            verbose=self.verbose
         )
     
+    def create_research_crew(self, topic: str) -> Crew:
+        """Create a research-focused crew."""
+        return self.create_crew("research", topic)
+    
     def create_analysis_crew(self, topic: str) -> Crew:
         """Create an analysis-focused crew."""
-        researcher = self.create_agent("researcher", topic)
-        analyst = self.create_agent("analyst", topic)
-        
-        research_task = self.create_task("research_task", topic, researcher)
-        analysis_task = self.create_task("analysis_task", topic, analyst, context=[research_task])
-        
-        return Crew(
-            agents=[researcher, analyst],
-            tasks=[research_task, analysis_task],
-            process=Process.sequential,
-            verbose=True
-        )
+        return self.create_crew("analysis", topic)
     
     def create_full_crew(self, topic: str) -> Crew:
         """Create a full crew with all agents."""
-        researcher = self.create_agent("researcher", topic)
-        writer = self.create_agent("writer", topic)
-        analyst = self.create_agent("analyst", topic)
-        coordinator = self.create_agent("coordinator", topic)
+        return self.create_crew("full", topic)
+    
+    def fanout_layout(self, deliverable: str) -> Tuple[List[str], List[Tuple[str, str, List[str]]]]:
+        """Agent types and task layout for one deliverable of a fan-out run.
+        
+        A deliverable is a predefined crew type, whose tasks after
+        ``research_task`` are run, or a single task type that takes the
+        research as its context.
+        """
+        if deliverable in CREW_LAYOUTS:
+            _, task_layout = CREW_LAYOUTS[deliverable]
+            task_layout = [entry for entry in task_layout if entry[0] != "research_task"]
+        elif deliverable != "research_task" and deliverable in self.tasks_config:
+            agent_type = self.tasks_config[deliverable].get("agent", "writer")
+            task_layout = [(deliverable, agent_type, ["research_task"])]
+        else:
+            raise ValueError(f"Unknown deliverable: {deliverable}")
+        agent_types = list(dict.fromkeys(agent_type for _, agent_type, _ in task_layout))
+        return agent_types, task_layout
+    
+    def create_fanout_crew(self, deliverable: str, topic: str, research: str) -> Crew:
+        """Create the downstream tasks of a deliverable on top of a finished research result."""
+        agent_types, task_layout = self.fanout_layout(deliverable)
+        agents = {agent_type: self.create_agent(agent_type, topic) for agent_type in agent_types}
+        
+        readers = [task_type for task_type, _, upstream in task_layout if "research_task" in upstream]
+        if self.compactor.enabled and readers:
+            research = self.compactor.compact("research_task", readers, research)
         
-        research_task = self.create_task("research_task", topic, researcher)
-        writing_task = self.create_task("writing_task", topic, writer, context=[research_task])
-        analysis_task = self.create_task("analysis_task", topic, analyst, context=[research_task])
-        synthesis_task = self.create_task("synthesis_task", topic, coordinator, context=[writing_task, analysis_task])
+        tasks = {}
+        for task_type, agent_type, upstream in task_layout:
+            tasks[task_type] = self.create_task(
+                task_type, topic, agents[agent_type],
+                context=[tasks[name] for name in upstream if name != "research_task"],
+                research=research if "research_task" in upstream else None
+            )
         
         return Crew(
-            agents=[researcher, writer, analyst, coordinator],
-            tasks=[research_task, writing_task, analysis_task, synthesis_task],
+            agents=list(agents.values()),
+            tasks=list(tasks.values()),
             process=Process.sequential,
-            verbose=True
+            verbose=self.verbose
         )
     
     def create_custom_crew(
@@ -177,36 +342,200 @@ CRITICAL: Your output must include:
             agents=list(agents.values()),
             tasks=tasks,
             process=Process.sequential,
-            verbose=True
+            verbose=self.verbose
+        )
+    
+    def research_groups(self) -> List[List[Dict[str, str]]]:
+        """Documents divided into research passes.
+        
+        Each large document gets a pass of its own; in ``auto`` mode smaller
+        ones are packed together, in input order, up to ``MAP_GROUP_TOKENS``.
+        """
+        groups: List[List[Dict[str, str]]] = []
+        group_tokens = MAP_GROUP_TOKENS
+        for doc in self.documents:
+            tokens = self.budget.count(doc["content"])
+            if self.research_mode == "auto" and groups and group_tokens + tokens <= MAP_GROUP_TOKENS:
+                groups[-1].append(doc)
+                group_tokens += tokens
+            else:
+                groups.append([doc])
+                group_tokens = tokens
+        return groups
+    
+    def research_plan(self) -> List[List[Dict[str, str]]]:
+        """Document groups for parallel research passes, or an empty list for single-pass research.
+        
+        Decided once, before any crew is built, so a research task that
+        ``map_reduce_research`` turns into a merge never has the documents
+        fitted into its prompt first.
+        """
+        if self._research_plan is None:
+            self._research_plan = []
+            if self.research_mode != "single" and len(self.documents) >= 2:
+                if self.research_mode != "auto" or 0 < MAP_REDUCE_MIN_DOCUMENTS <= len(self.documents):
+                    groups = self.research_groups()
+                    if len(groups) >= 2:
+                        self._research_plan = groups
+        return self._research_plan
+    
+    def map_reduce_research(self, crew: Crew, topic: str, guard: Callable[[], None] = None) -> bool:
+        """Run the crew's research as parallel per-document passes.
+        
+        Each pass is a one-task crew over its own documents. The crew's
+        ``research_task`` becomes a merge of their findings, so the
+        downstream tasks consume the merged report as before. Returns False,
+        leaving the crew untouched, when ``research_plan`` is single-pass.
+        """
+        self.research_passes = []
+        research_task = next((task for task in crew.tasks if getattr(task, "name", None) == "research_task"), None)
+        groups = self.research_plan()
+        if research_task is None or not groups:
+            return False
+        
+        with ThreadPoolExecutor(
+            max_workers=min(len(groups), max(1, MAP_REDUCE_WORKERS)), thread_name_prefix="research-pass"
+        ) as pool:
+            futures = [
+                # Each thread starts from this context so it inherits the execution's log tagging
+                pool.submit(contextvars.copy_context().run, self._research_pass, index, group, len(groups), topic, guard)
+                for index, group in enumerate(groups, start=1)
+            ]
+            self.research_passes = [future.result() for future in futures]
+        
+        description = self.tasks_config["research_task"]["description"].replace("{topic}", topic)
+        findings = self.budget.fit_documents(
+            [
+                {"name": f"Research pass {p['pass']} ({', '.join(p['documents'])})", "content": p.pop("output")}
+                for p in self.research_passes
+            ],
+            instructions=[
+                REDUCE_TASK_TEMPLATE.format(topic=topic, passes=len(groups), findings="", description=description),
+                research_task.expected_output,
+                research_task.agent.role, research_task.agent.goal, research_task.agent.backstory,
+            ],
+            tool_count=len(research_task.agent.tools or []),
+            task_name="research_reduce"
+        )
+        research_task.description = REDUCE_TASK_TEMPLATE.format(
+            topic=topic, passes=len(groups), findings=findings, description=description
         )
+        return True
+    
+    def _research_pass(
+        self, index: int, documents: List[Dict[str, str]], passes: int, topic: str, guard: Callable[[], None] = None
+    ) -> Dict[str, Any]:
+        name = f"research_pass_{index}"
+        agent = self.create_agent("researcher", topic)
+        description, _ = self.task_text("research_task", topic, agent, documents=documents, task_name=name)
+        task = Task(
+            name=name,
+            description=MAP_TASK_TEMPLATE.format(index=index, passes=passes, description=description),
+            expected_output=MAP_EXPECTED_OUTPUT,
+            agent=agent
+        )
+        crew = Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=self.verbose)
+        if guard is not None:
+            _install_guard(crew, guard)
+        
+        started = time.monotonic()
+        names = [doc["name"] for doc in documents]
+        indexes = {key: index for key, index in self.fact_indexes.items() if index.name in names}
+        with activate_fact_indexes(indexes), activate_tool_cache(self.tool_cache):
+            result = crew.kickoff()
+        output = getattr(result, "raw", None) or str(result)
+        return {
+            "pass": index,
+            "documents": names,
+            "seconds": round(time.monotonic() - started, 3),
+            "output_chars": len(output),
+            "token_usage": usage_to_dict(getattr(result, "token_usage", None)),
+            "output": output,
+        }
     
-    def run(self, crew: Crew, inputs: Dict[str, Any] = None) -> str:
-        """Execute a crew and return the result."""
-        result = crew.kickoff(inputs=inputs or {})
+    def run(self, crew: Crew, inputs: Dict[str, Any] = None, guard: Callable[[], None] = None) -> str:
+        """Execute a crew and return the result.
+        
+        Wall time per task and the crew's token usage are kept on
+        ``task_timings`` and ``token_usage``; the usage includes any research
+        passes run by ``map_reduce_research``. ``guard`` is called after every
+        agent step and task; an exception it raises aborts the run.
+        
+        Outputs of tasks that other tasks take as context are compacted to
+        the compaction budget and to the upstream share reserved in each
+        consumer's prompt before those tasks start; each edge is recorded on
+        ``compactor``. Only the context is compacted: every task output is
+        restored to what its agent wrote once the crew finishes.
+        Tool calls are memoized in ``tool_cache`` for the whole execution.
+        """
+        self.task_timings = []
+        last = [time.monotonic()]
+        if guard is not None:
+            _install_guard(crew, guard)
+        
+        consumers: Dict[int, List[str]] = {}
+        originals: List[Tuple[Any, str]] = []
+        for task in crew.tasks:
+            for upstream in task.context or []:
+                consumers.setdefault(id(upstream), []).append(_task_name(task))
+        
+        def timed(task: Task, callback):
+            def on_complete(output):
+                if guard is not None:
+                    guard()
+                now = time.monotonic()
+                raw = getattr(output, "raw", None) or str(output)
+                self.task_timings.append({
+                    "task": _task_name(task),
+                    "seconds": round(now - last[0], 3),
+                    "output_chars": len(raw),
+                })
+                if id(task) in consumers and getattr(output, "raw", None):
+                    # Hold the output to the upstream share reserved in every consumer's prompt
+                    limit = min(self.budget.upstream_allowance(name) for name in consumers[id(task)])
+                    # Consumers read ``output.raw`` as their context; the original is put back after the run
+                    originals.append((output, output.raw))
+                    output.raw = self.compactor.compact(_task_name(task), consumers[id(task)], output.raw, limit)
+                last[0] = time.monotonic()
+                if callback is not None:
+                    return callback(output)
+            return on_complete
+        
+        for task in crew.tasks:
+            task.callback = timed(task, getattr(task, "callback", None))
+        
+        try:
+            with activate_fact_indexes(self.fact_indexes), activate_tool_cache(self.tool_cache):
+                result = crew.kickoff(inputs=inputs or {})
+        finally:
+            for output, raw in originals:
+                output.raw = raw
+        self.token_usage = usage_to_dict(getattr(result, "token_usage", None))
+        for research_pass in self.research_passes:
+            for field, count in research_pass["token_usage"].items():
+                self.token_usage[field] += count
         return str(result)
 
 
-def get_available_agents() -> List[Dict[str, str]]:
-    """Get list of available agent types."""
-    config = load_yaml_config("agents.yaml")
-    return [
-        {
-            "id": key,
-            "role": value.get("role", "").strip(),
-            "goal": value.get("goal", "").strip()
-        }
-        for key, value in config.items()
-    ]
-
-
-def get_available_tasks() -> List[Dict[str, str]]:
-    """Get list of available task types."""
-    config = load_yaml_config("tasks.yaml")
-    return [
-        {
-            "id": key,
-            "description": value.get("description", "").strip()[:200],
-            "agent": value.get("agent", "")
-        }
-        for key, value in config.items()
-    ]
+def _task_name(task: Task) -> str:
+    return getattr(task, "name", None) or task.description[:60]
+
+
+def _install_guard(crew: Crew, guard: Callable[[], None]) -> None:
+    """Call ``guard`` after every step of the crew's agents."""
+    def guarded(callback):
+        def on_step(step):
+            guard()
+            if callback is not None:
+                return callback(step)
+        return on_step
+    
+    crew.step_callback = guarded(getattr(crew, "step_callback", None))
+    for agent in crew.agents:
+        agent.step_callback = guarded(getattr(agent, "step_callback", None))
+
+
+def usage_to_dict(usage) -> Dict[str, int]:
+    """Token counts from a crewai ``UsageMetrics`` (or missing metrics)."""
+    fields = ("prompt_tokens", "completion_tokens", "total_tokens", "successful_requests")
+    return {field: int(getattr(usage, field, 0) or 0) for field in fields}
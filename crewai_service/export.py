@@ -0,0 +1,240 @@
+"""Streaming export of execution history for offline analysis.
+
+Records are read from the store in keyset-paginated batches and encoded
+incrementally, so an export's memory use depends on the batch size, not on
+how many executions match. JSONL and CSV need nothing extra; Parquet and
+Arrow IPC streams use pyarrow when it is installed.
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+from store import EXECUTION_COLUMNS
+
+# Records per store query and per Parquet row group / Arrow batch.
+EXPORT_BATCH_SIZE = int(os.environ.get("CREWAI_EXPORT_BATCH_SIZE", 500))
+# Text formats are flushed to the client in chunks of about this size.
+FLUSH_BYTES = 64 * 1024
+
+# Exported when no ``fields`` are given; results are left out unless asked for.
+DEFAULT_FIELDS = [
+    "id", "topic", "crew_type", "model", "status", "started_at", "completed_at", "duration_seconds",
+    "token_usage.prompt_tokens", "token_usage.completion_tokens", "token_usage.total_tokens",
+]
+NUMERIC_FIELDS = {
+    "duration_seconds": "float64",
+    "created_at": "float64",
+    "token_usage.prompt_tokens": "int64",
+    "token_usage.completion_tokens": "int64",
+    "token_usage.total_tokens": "int64",
+    "token_usage.successful_requests": "int64",
+    "compaction.saved_tokens": "int64",
+    "memory.rss_peak_mb": "float64",
+    "memory.rss_growth_mb": "float64",
+}
+FILTER_COLUMNS = ("crew_type", "model", "status")
+
+EXPORT_FORMATS = {
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+class ExportError(ValueError):
+    """Raised for invalid export parameters."""
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Unix seconds or an ISO 8601 date/time (UTC unless an offset is given)."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ExportError(f"Invalid time: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def get_path(record: Dict[str, Any], path: str) -> Any:
+    """Value at a dotted path such as ``token_usage.total_tokens``, or None."""
+    value: Any = record
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def project(records: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[Dict[str, Any]]:
+    for record in records:
+        yield {field: get_path(record, field) for field in fields}
+
+
+def _scalar(value: Any) -> Any:
+    """Nested values become JSON text in flat formats."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def iter_jsonl(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    buffer: List[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(row, default=str) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[bytes]:
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({field: _scalar(value) for field, value in row.items()})
+        if text.tell() >= FLUSH_BYTES:
+            yield text.getvalue().encode("utf-8")
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the streaming generator."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _arrow_schema(fields: List[str]):
+    types = {"float64": pyarrow.float64(), "int64": pyarrow.int64()}
+    return pyarrow.schema([
+        (field, types[NUMERIC_FIELDS[field]] if field in NUMERIC_FIELDS else pyarrow.string())
+        for field in fields
+    ])
+
+
+def _batches(rows: Iterable[Dict[str, Any]], fields: List[str], schema, size: int):
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield _record_batch(batch, fields, schema)
+            batch = []
+    if batch:
+        yield _record_batch(batch, fields, schema)
+
+
+def _record_batch(batch: List[Dict[str, Any]], fields: List[str], schema):
+    columns = []
+    for field in fields:
+        if field in NUMERIC_FIELDS:
+            columns.append([row[field] for row in batch])
+        else:
+            columns.append([None if row[field] is None else str(_scalar(row[field])) for row in batch])
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(column, type=schema.field(field).type) for column, field in zip(columns, fields)],
+        schema=schema,
+    )
+
+
+def iter_columnar(rows: Iterable[Dict[str, Any]], fields: List[str], export_format: str) -> Iterator[bytes]:
+    """Parquet with one row group per batch, or an Arrow IPC stream."""
+    schema = _arrow_schema(fields)
+    sink = _ChunkSink()
+    if export_format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+    for batch in _batches(rows, fields, schema, EXPORT_BATCH_SIZE):
+        writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def export_history(store, params: Dict[str, Optional[str]]):
+    """
+    Validate export parameters and build the streaming body.
+
+    Args:
+        store: ExecutionStore to read from.
+        params: Query parameters: ``format``, ``fields``, ``since``, ``until``
+            and comma-separated ``crew_type``, ``model`` and ``status`` filters.
+
+    Returns:
+        A ``(chunks, media_type, filename)`` tuple.
+
+    Raises:
+        ExportError: For an unknown format or unparsable filter.
+    """
+    export_format = (params.get("format") or "jsonl").lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Unsupported export format: {export_format} (use {', '.join(EXPORT_FORMATS)})")
+    if export_format in ("parquet", "arrow") and pyarrow is None:
+        raise ExportError(f"The {export_format} format requires the pyarrow package")
+
+    fields = [field.strip() for field in (params.get("fields") or "").split(",") if field.strip()] or DEFAULT_FIELDS
+    since, until = parse_time(params.get("since")), parse_time(params.get("until"))
+    filters = {
+        column: [value.strip() for value in params[column].split(",") if value.strip()]
+        for column in FILTER_COLUMNS if params.get(column)
+    }
+    # Column-only exports never decode the stored JSON records
+    columns_only = all(field in EXECUTION_COLUMNS for field in fields)
+    records = store.iter_executions(since, until, filters, columns_only, batch_size=EXPORT_BATCH_SIZE)
+    rows = project(records, fields)
+
+    if export_format == "jsonl":
+        chunks = iter_jsonl(rows)
+    elif export_format == "csv":
+        chunks = iter_csv(rows, fields)
+    else:
+        chunks = iter_columnar(rows, fields, export_format)
+    media_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"crewai-executions-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    return chunks, media_type, filename
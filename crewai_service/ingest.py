@@ -0,0 +1,389 @@
+"""Text extraction for uploaded PDF, DOCX, XLSX and plain-text documents.
+
+Uploads are spooled to a temporary file in fixed-size chunks while they are
+hashed, so request memory stays bounded whatever the file size. Extraction
+runs in a small process pool and reads the spooled file incrementally: PDFs
+page by page (``pdftotext`` from poppler, or pypdf when installed), DOCX
+paragraph by paragraph and XLSX row by row with ``iterparse``. Extracted
+text is cached in the store under the file's SHA-256, so re-uploading the
+same file costs one hash.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+try:
+    import pypdf
+except ImportError:  # pragma: no cover - optional dependency
+    pypdf = None
+
+MAX_UPLOAD_BYTES = int(float(os.environ.get("CREWAI_MAX_UPLOAD_MB", 50)) * 1024 * 1024)
+# Extraction stops after this many characters; the document is marked truncated.
+MAX_EXTRACTED_CHARS = int(os.environ.get("CREWAI_MAX_EXTRACTED_CHARS", 2_000_000))
+# Rows read per worksheet; models often carry thousands of empty formatted rows.
+MAX_SHEET_ROWS = int(os.environ.get("CREWAI_XLSX_MAX_ROWS", 5000))
+# Whole upload requests, all files included; larger bodies are refused before they are read.
+MAX_REQUEST_BYTES = int(float(os.environ.get("CREWAI_MAX_REQUEST_MB", 200)) * 1024 * 1024)
+# Characters of XLSX shared strings kept in memory; strings past the limit read as empty cells.
+MAX_SHARED_STRING_CHARS = int(os.environ.get("CREWAI_XLSX_MAX_SHARED_CHARS", MAX_EXTRACTED_CHARS))
+INGEST_WORKERS = int(os.environ.get("CREWAI_INGEST_WORKERS", 2))
+CHUNK_SIZE = 64 * 1024
+# pdftotext is killed after this many seconds.
+PDF_TIMEOUT = float(os.environ.get("CREWAI_PDF_TIMEOUT_SECONDS", 300))
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+S_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "text": "text/plain",
+}
+
+
+class IngestError(Exception):
+    """Raised for uploads that are too large or cannot be parsed."""
+
+    def __init__(self, message: str, status: int = 422):
+        super().__init__(message)
+        self.status = status
+
+
+def spool_upload(stream: IO[bytes], max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[str, str, int]:
+    """
+    Copy an upload stream to a temporary file, hashing it on the way.
+
+    Returns:
+        The temporary file path (the caller removes it), its SHA-256 and size.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="crewai-upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise IngestError(f"Upload exceeds {max_bytes // (1024 * 1024)} MB", status=413)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, digest.hexdigest(), size
+
+
+def detect_kind(path: str, name: str = "") -> str:
+    with open(path, "rb") as f:
+        head = f.read(8)
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK") and zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            names = set(archive.namelist())
+        if "word/document.xml" in names:
+            return "docx"
+        if "xl/workbook.xml" in names:
+            return "xlsx"
+        raise IngestError(f"Unsupported archive format: {name or 'upload'}", status=415)
+    return "text"
+
+
+# --- Section extractors: each yields (section label, text) as it reads ---
+
+def iter_pdf_pages(path: str) -> Iterator[Tuple[str, str]]:
+    if shutil.which("pdftotext"):
+        # pdftotext separates pages with form feeds; read its output as it is produced
+        process = subprocess.Popen(
+            ["pdftotext", "-layout", "-enc", "UTF-8", path, "-"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        # Killing the process closes its stdout, which ends a read that would otherwise block forever
+        timed_out = threading.Event()
+        watchdog = threading.Timer(PDF_TIMEOUT, lambda: (timed_out.set(), process.kill()))
+        watchdog.start()
+        try:
+            page, pending = 1, ""
+            for chunk in iter(lambda: process.stdout.read(CHUNK_SIZE), b""):
+                pending += chunk.decode("utf-8", errors="replace")
+                *pages, pending = pending.split("\f")
+                for text in pages:
+                    yield f"Page {page}", text
+                    page += 1
+            if timed_out.is_set():
+                raise IngestError(f"pdftotext did not finish within {PDF_TIMEOUT:.0f}s")
+            if pending.strip():
+                yield f"Page {page}", pending
+            if process.wait(timeout=PDF_TIMEOUT) != 0:
+                raise IngestError("pdftotext could not read this PDF")
+        finally:
+            watchdog.cancel()
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+        return
+    if pypdf is not None:
+        reader = pypdf.PdfReader(path)
+        for number, page in enumerate(reader.pages, 1):
+            yield f"Page {number}", page.extract_text() or ""
+        return
+    raise IngestError("PDF extraction requires pdftotext (poppler) or the pypdf package", status=415)
+
+
+def iter_docx_paragraphs(path: str, batch: int = 50) -> Iterator[Tuple[str, str]]:
+    """Paragraphs in reading order; table rows become ``cell | cell`` lines."""
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as xml:
+        lines: List[str] = []
+        parts: List[str] = []
+        cells: List[str] = []
+        cell_parts: List[str] = []
+        table_depth = 0
+        section = 1
+        for event, elem in iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == W_NS + "tbl":
+                    table_depth += 1
+                continue
+            if tag == W_NS + "t":
+                parts.append(elem.text or "")
+            elif tag == W_NS + "tab":
+                parts.append("\t")
+            elif tag in (W_NS + "br", W_NS + "cr"):
+                parts.append("\n")
+            elif tag == W_NS + "p":
+                text = "".join(parts).strip()
+                parts = []
+                if table_depth:
+                    if text:
+                        cell_parts.append(text)
+                elif text:
+                    lines.append(text)
+                elem.clear()
+            elif tag == W_NS + "tc":
+                cells.append(" ".join(cell_parts))
+                cell_parts = []
+            elif tag == W_NS + "tr":
+                if any(cells):
+                    lines.append(" | ".join(cells))
+                cells = []
+                elem.clear()
+            elif tag == W_NS + "tbl":
+                table_depth -= 1
+                elem.clear()
+            if len(lines) >= batch:
+                yield f"Section {section}", "\n".join(lines)
+                section += 1
+                lines = []
+        if lines:
+            yield f"Section {section}", "\n".join(lines)
+
+
+def _xlsx_shared_strings(archive: zipfile.ZipFile, max_chars: int = MAX_SHARED_STRING_CHARS) -> Tuple[List[str], bool]:
+    """The workbook's shared strings up to ``max_chars`` in total, and whether any were left out."""
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return [], False
+    strings = []
+    used = 0
+    with archive.open("xl/sharedStrings.xml") as xml:
+        for _, elem in iterparse(xml):
+            if elem.tag == S_NS + "si":
+                text = "".join(t.text or "" for t in elem.iter(S_NS + "t"))
+                used += len(text) + 1
+                if used > max_chars:
+                    return strings, True
+                strings.append(text)
+                elem.clear()
+    return strings, False
+
+
+def _xlsx_sheets(archive: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """(sheet name, part path) in workbook order."""
+    targets = {}
+    with archive.open("xl/_rels/workbook.xml.rels") as xml:
+        for _, elem in iterparse(xml):
+            if elem.tag == PKG_REL_NS + "Relationship":
+                target = elem.get("Target", "").lstrip("/")
+                targets[elem.get("Id")] = target if target.startswith("xl/") else f"xl/{target}"
+    sheets = []
+    with archive.open("xl/workbook.xml") as xml:
+        for _, elem in iterparse(xml):
+            if elem.tag == S_NS + "sheet":
+                target = targets.get(elem.get(R_NS + "id"))
+                if target:
+                    sheets.append((elem.get("name", target), target))
+    return sheets
+
+
+def _column_index(reference: str) -> int:
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def iter_xlsx_sheets(path: str, max_rows: int = MAX_SHEET_ROWS) -> Iterator[Tuple[str, str]]:
+    """One section per worksheet, rows as ``value | value`` lines using cached formula values."""
+    with zipfile.ZipFile(path) as archive:
+        shared, shared_truncated = _xlsx_shared_strings(archive)
+        if shared_truncated:
+            yield "Workbook", f"[... text cells after the first {len(shared)} distinct strings omitted ...]"
+        for sheet_name, part in _xlsx_sheets(archive):
+            rows: List[str] = []
+            truncated = False
+            with archive.open(part) as xml:
+                values: Dict[int, str] = {}
+                for _, elem in iterparse(xml):
+                    tag = elem.tag
+                    if tag == S_NS + "c":
+                        kind = elem.get("t")
+                        if kind == "inlineStr":
+                            value = "".join(t.text or "" for t in elem.iter(S_NS + "t"))
+                        else:
+                            raw = elem.findtext(S_NS + "v")
+                            if raw is None:
+                                value = ""
+                            elif kind == "s":
+                                value = shared[int(raw)] if raw.isdigit() and int(raw) < len(shared) else ""
+                            elif kind == "b":
+                                value = "TRUE" if raw == "1" else "FALSE"
+                            else:
+                                value = raw
+                        if value.strip():
+                            values[_column_index(elem.get("r", "A"))] = value.strip()
+                        elem.clear()
+                    elif tag == S_NS + "row":
+                        if values:
+                            last = max(values)
+                            rows.append(" | ".join(values.get(i, "") for i in range(last + 1)))
+                            values = {}
+                        elem.clear()
+                        if len(rows) >= max_rows:
+                            truncated = True
+                            break
+            text = "\n".join(rows)
+            if truncated:
+                text += f"\n[... rows after {max_rows} omitted ...]"
+            yield f"Sheet: {sheet_name}", text
+
+
+def iter_text(path: str) -> Iterator[Tuple[str, str]]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield "", chunk
+
+
+EXTRACTORS = {
+    "pdf": iter_pdf_pages,
+    "docx": iter_docx_paragraphs,
+    "xlsx": iter_xlsx_sheets,
+    "text": iter_text,
+}
+
+
+def extract_text(path: str, kind: str, max_chars: int = MAX_EXTRACTED_CHARS) -> Dict[str, Any]:
+    """
+    Run the extractor for ``kind`` over a spooled file, stopping at ``max_chars``.
+
+    Runs in an ingest worker process; only the extracted text crosses back.
+    """
+    parts: List[str] = []
+    used = 0
+    sections = 0
+    truncated = False
+    for label, text in EXTRACTORS[kind](path):
+        text = text.strip("\n") if label else text
+        if not text.strip():
+            continue
+        piece = f"--- {label} ---\n{text}\n" if label else text
+        if used + len(piece) > max_chars:
+            parts.append(piece[:max_chars - used])
+            truncated = True
+            break
+        parts.append(piece)
+        used += len(piece)
+        sections += 1
+    return {"text": "".join(parts).strip(), "sections": sections, "truncated": truncated}
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_ingest_pool() -> ProcessPoolExecutor:
+    """Process pool for parsing, so large files do not hold the GIL of the API process."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, INGEST_WORKERS), mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_ingest_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def ingest_upload(stream: IO[bytes], name: str, store) -> Dict[str, Any]:
+    """
+    Spool, hash and extract one uploaded file, reusing cached text for known content.
+
+    Returns:
+        Document metadata including its id (the SHA-256), without the text.
+    """
+    path, sha256, size = spool_upload(stream)
+    try:
+        cached = store.get_document(sha256, include_text=False)
+        if cached is not None:
+            # The store keeps one name per content; /run will use that one
+            document = {**cached, "cached": True}
+            if name and name != cached["name"]:
+                document["uploaded_as"] = name
+            return document
+        kind = detect_kind(path, name)
+        try:
+            extracted = get_ingest_pool().submit(extract_text, path, kind).result()
+        except IngestError:
+            raise
+        except Exception as e:
+            raise IngestError(f"Could not extract text from {name or 'upload'}: {e}") from e
+        if not extracted["text"]:
+            raise IngestError(f"No text found in {name or 'upload'}")
+        document = {
+            "id": sha256,
+            "name": name or sha256[:12],
+            "media_type": MEDIA_TYPES[kind],
+            "size_bytes": size,
+            "chars": len(extracted["text"]),
+            "sections": extracted["sections"],
+            "truncated": extracted["truncated"],
+        }
+        store.save_document(document, extracted["text"])
+        return {**document, "cached": False}
+    finally:
+        os.unlink(path)
@@ -0,0 +1,243 @@
+"""Shared job queue that decouples the HTTP front end from crew execution.
+
+With ``CREWAI_EXECUTION_MODE=queue`` the API node only enqueues /run
+requests and serves their results; any number of ``worker.py`` processes
+lease jobs and run them. The queue lives in the SQLite store, and SQLite in
+WAL mode needs every process on the host that holds the file, so workers
+scale out across processes on that host rather than across machines.
+``JobQueue`` refuses a store on a network filesystem instead of risking
+corrupt leases. A lease stays valid while its worker
+heartbeats; leases that expire (the worker died or stalled) are handed to
+another worker until a job has been attempted ``CREWAI_JOB_MAX_ATTEMPTS``
+times. A worker that loses its lease cancels the run and does not save it.
+"""
+
+import json
+import os
+import socket
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from store import ExecutionStore, get_store
+
+# Seconds a lease lasts without a heartbeat.
+LEASE_SECONDS = float(os.environ.get("CREWAI_JOB_LEASE_SECONDS", 60))
+MAX_ATTEMPTS = int(os.environ.get("CREWAI_JOB_MAX_ATTEMPTS", 3))
+# Queued jobs beyond which new /run requests are rejected.
+MAX_QUEUED_JOBS = int(os.environ.get("CREWAI_MAX_QUEUED_JOBS", 100))
+# Workers not seen for this long are reported as gone.
+WORKER_STALE_SECONDS = float(os.environ.get("CREWAI_WORKER_STALE_SECONDS", 3 * LEASE_SECONDS))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    status_code INTEGER,
+    response TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, enqueued_at);
+
+CREATE TABLE IF NOT EXISTS queue_workers (
+    id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    capacity INTEGER NOT NULL,
+    busy INTEGER NOT NULL DEFAULT 0,
+    started_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    info TEXT
+);
+"""
+
+
+class StoreNotLocal(RuntimeError):
+    """Raised when the store file is on a network filesystem, which the queue cannot share safely."""
+
+
+class QueueFull(Exception):
+    """Raised when the queue already holds ``CREWAI_MAX_QUEUED_JOBS`` jobs."""
+
+    def __init__(self, limit: int, retry_after: int = 10):
+        super().__init__(f"Job queue is full ({limit} queued jobs); retry later")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """Jobs and worker registrations kept in the shared SQLite store."""
+
+    def __init__(self, store: Optional[ExecutionStore] = None, lease_seconds: float = LEASE_SECONDS):
+        self.store = store or get_store()
+        if not self.store.is_local():
+            raise StoreNotLocal(
+                f"The job queue needs its store on a local filesystem; {self.store.path} is on a network "
+                "filesystem. Point CREWAI_DB_PATH at local disk and run workers on that host."
+            )
+        self.lease_seconds = lease_seconds
+        self.store.connect().executescript(SCHEMA)
+
+    def _transaction(self):
+        conn = self.store.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def enqueue(self, job_id: str, payload: Dict[str, Any], max_queued: int = MAX_QUEUED_JOBS) -> None:
+        conn = self._transaction()
+        try:
+            (queued,) = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()
+            if queued >= max_queued:
+                conn.execute("COMMIT")
+                raise QueueFull(max_queued)
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, enqueued_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(payload, default=str), time.time()),
+            )
+            conn.execute("COMMIT")
+        except QueueFull:
+            raise
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def lease(self, worker_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Claim the oldest queued job, first reclaiming leases that have expired."""
+        conn = self._transaction()
+        try:
+            now = time.time()
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE status = 'queued' ORDER BY enqueued_at, rowid LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'leased', worker_id = ?, lease_expires = ?,
+                    attempts = attempts + 1, started_at = ?
+                WHERE id = ?
+                """,
+                (worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+            return row["id"], json.loads(row["payload"])
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _expire_leases(self, conn, now: float) -> None:
+        abandoned = conn.execute(
+            "SELECT id, attempts FROM jobs WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, MAX_ATTEMPTS),
+        ).fetchall()
+        for row in abandoned:
+            response = {"success": False, "error": f"Job abandoned by {row['attempts']} workers without completing"}
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', finished_at = ?, status_code = 500, response = ?,
+                    lease_expires = NULL
+                WHERE id = ?
+                """,
+                (now, json.dumps(response), row["id"]),
+            )
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', worker_id = NULL WHERE status = 'leased' AND lease_expires < ?",
+            (now,),
+        )
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend a lease; False means the worker no longer owns the job."""
+        cursor = self.store.connect().execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker_id = ? AND status = 'leased'",
+            (time.time() + self.lease_seconds, job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, response: Dict[str, Any], status_code: int) -> bool:
+        """Record a job's response if the lease is still held by ``worker_id``."""
+        cursor = self.store.connect().execute(
+            """
+            UPDATE jobs SET status = ?, finished_at = ?, status_code = ?, response = ?, lease_expires = NULL
+            WHERE id = ? AND worker_id = ? AND status = 'leased'
+            """,
+            (
+                "completed" if status_code < 400 else "failed", time.time(), status_code,
+                json.dumps(response, default=str), job_id, worker_id,
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self.store.connect().execute(
+            """
+            SELECT id, status, attempts, worker_id, enqueued_at, started_at, finished_at, status_code, response
+            FROM jobs WHERE id = ?
+            """,
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["response"] = json.loads(job["response"]) if job["response"] else None
+        if job["status"] == "queued":
+            (ahead,) = self.store.connect().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND enqueued_at < ?", (job["enqueued_at"],)
+            ).fetchone()
+            job["position"] = ahead
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        rows = self.store.connect().execute(
+            "SELECT status, COUNT(*) AS n FROM jobs WHERE status IN ('queued', 'leased') GROUP BY status"
+        ).fetchall()
+        counts = {"queued": 0, "leased": 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def register_worker(self, worker_id: str, capacity: int, busy: int = 0, info: Dict[str, Any] = None) -> None:
+        """Insert or refresh a worker's registration; called on every heartbeat."""
+        now = time.time()
+        host, _, pid = worker_id.rpartition(":")
+        self.store.connect().execute(
+            """
+            INSERT INTO queue_workers (id, host, pid, capacity, busy, started_at, last_seen, info)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET capacity = excluded.capacity, busy = excluded.busy,
+                last_seen = excluded.last_seen, info = excluded.info
+            """,
+            (worker_id, host, int(pid or 0), capacity, busy, now, now, json.dumps(info or {}, default=str)),
+        )
+
+    def unregister_worker(self, worker_id: str) -> None:
+        self.store.connect().execute("DELETE FROM queue_workers WHERE id = ?", (worker_id,))
+
+    def prune(self, max_age: float) -> int:
+        """Delete finished jobs older than ``max_age`` seconds and long-gone worker registrations."""
+        cutoff = time.time() - max_age
+        conn = self.store.connect()
+        conn.execute("DELETE FROM queue_workers WHERE last_seen < ?", (cutoff,))
+        return conn.execute(
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished_at < ?", (cutoff,)
+        ).rowcount
+
+    def live_workers(self, stale_after: float = WORKER_STALE_SECONDS) -> List[Dict[str, Any]]:
+        rows = self.store.connect().execute(
+            "SELECT * FROM queue_workers WHERE last_seen >= ? ORDER BY started_at", (time.time() - stale_after,)
+        ).fetchall()
+        workers = []
+        for row in rows:
+            worker = dict(row)
+            worker["info"] = json.loads(worker["info"] or "{}")
+            workers.append(worker)
+        return workers
@@ -0,0 +1,223 @@
+"""Structured, non-blocking log capture tagged by execution.
+
+Request threads only enqueue log records; a QueueListener thread formats
+them for the console, appends them to a per-execution ring buffer and
+persists them in batches to the shared store so any worker process can serve
+``/history/<id>/logs``.
+
+CrewAI's verbose console output is written to ``sys.stdout``. While an
+execution is active on a thread, a stdout router turns that output into log
+records for the execution instead of letting it reach the process stdout.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+LOG_LEVEL = os.environ.get("CREWAI_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("CREWAI_LOG_FORMAT", "json")
+# Default agent verbosity for runs that do not set ``verbose`` themselves.
+DEFAULT_VERBOSE = os.environ.get("CREWAI_VERBOSE", "false").lower() in ("1", "true", "yes")
+# Records kept in memory per execution, and executions kept in memory.
+RING_BUFFER_SIZE = int(os.environ.get("CREWAI_LOG_BUFFER", 1000))
+RING_BUFFER_EXECUTIONS = 200
+# Records persisted per execution; verbose runs beyond this are only in the ring buffer.
+MAX_PERSISTED_RECORDS = int(os.environ.get("CREWAI_LOG_PERSIST_LIMIT", 5000))
+FLUSH_BATCH = 50
+FLUSH_INTERVAL = 1.0
+
+logger = logging.getLogger("crewai_service")
+
+current_execution_id: ContextVar[Optional[str]] = ContextVar("current_execution_id", default=None)
+_capture_stdout: ContextVar[bool] = ContextVar("capture_stdout", default=False)
+
+
+class ExecutionContextFilter(logging.Filter):
+    """Stamp every record with the execution running on the current thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "execution_id"):
+            record.execution_id = current_execution_id.get()
+        if not hasattr(record, "source"):
+            record.source = "service"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record_to_dict(record), default=str)
+
+
+def record_to_dict(record: logging.LogRecord) -> Dict[str, Any]:
+    entry = {
+        "ts": record.created,
+        "level": record.levelname,
+        "logger": record.name,
+        "source": getattr(record, "source", "service"),
+        "execution_id": getattr(record, "execution_id", None),
+        "message": record.getMessage(),
+    }
+    if record.exc_info:
+        entry["exception"] = logging.Formatter().formatException(record.exc_info)
+    return entry
+
+
+class ExecutionLogHandler(logging.Handler):
+    """Keeps recent records per execution in memory and persists them in batches.
+
+    Runs on the QueueListener thread, so store writes never block a request.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.buffers: "OrderedDict[str, deque]" = OrderedDict()
+        self._persisted: Dict[str, int] = {}
+        self._pending: List[tuple] = []
+        self._last_flush = time.monotonic()
+        self._buffers_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        execution_id = getattr(record, "execution_id", None)
+        if not execution_id:
+            return
+        entry = record_to_dict(record)
+        with self._buffers_lock:
+            buffer = self.buffers.get(execution_id)
+            if buffer is None:
+                buffer = self.buffers[execution_id] = deque(maxlen=RING_BUFFER_SIZE)
+                while len(self.buffers) > RING_BUFFER_EXECUTIONS:
+                    evicted, _ = self.buffers.popitem(last=False)
+                    self._persisted.pop(evicted, None)
+            buffer.append(entry)
+
+        count = self._persisted.get(execution_id, 0)
+        if count < MAX_PERSISTED_RECORDS:
+            self._persisted[execution_id] = count + 1
+            self._pending.append((execution_id, entry))
+        if (
+            len(self._pending) >= FLUSH_BATCH
+            or getattr(record, "final", False)
+            or time.monotonic() - self._last_flush >= FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        try:
+            from store import get_store
+            get_store().append_logs(pending)
+        except Exception:
+            self.handleError(logging.makeLogRecord({"msg": "failed to persist execution logs"}))
+
+    def recent(self, execution_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._buffers_lock:
+            buffer = self.buffers.get(execution_id)
+            return list(buffer) if buffer is not None else None
+
+
+class StdoutRouter:
+    """sys.stdout replacement that routes writes made during an execution to the logger."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def write(self, text: str) -> int:
+        if not _capture_stdout.get():
+            return self._stream.write(text)
+        pending = getattr(self._local, "pending", "") + text
+        *lines, self._local.pending = pending.split("\n")
+        for line in lines:
+            if line.strip():
+                logger.info(line.rstrip(), extra={"source": "crewai"})
+        return len(text)
+
+    def flush(self) -> None:
+        pending = getattr(self._local, "pending", "")
+        if pending.strip() and _capture_stdout.get():
+            self._local.pending = ""
+            logger.info(pending.rstrip(), extra={"source": "crewai"})
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_execution_handler: Optional[ExecutionLogHandler] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging() -> None:
+    """Install the queue-based logging pipeline once per process."""
+    global _listener, _execution_handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+        console = logging.StreamHandler(sys.stdout)
+        # Captured crewai output is kept per execution only, never echoed to the console.
+        console.addFilter(lambda record: getattr(record, "source", None) != "crewai")
+        if LOG_FORMAT == "json":
+            console.setFormatter(JsonFormatter())
+        else:
+            console.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(execution_id)s] %(message)s"))
+        _execution_handler = ExecutionLogHandler()
+
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(ExecutionContextFilter())
+        logger.addHandler(queue_handler)
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+
+        # Console output happens on the listener thread, so it goes to the real stdout.
+        _listener = logging.handlers.QueueListener(
+            log_queue, console, _execution_handler, respect_handler_level=True
+        )
+        _listener.start()
+        if not isinstance(sys.stdout, StdoutRouter):
+            sys.stdout = StdoutRouter(sys.stdout)
+
+
+def shutdown_logging() -> None:
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _execution_handler.flush()
+        _listener = None
+
+
+@contextmanager
+def execution_logging(execution_id: str) -> Iterator[None]:
+    """Tag log records from this thread with ``execution_id`` and capture crewai stdout."""
+    setup_logging()
+    id_token = current_execution_id.set(execution_id)
+    capture_token = _capture_stdout.set(True)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        logger.info("Execution finished", extra={"final": True})
+        _capture_stdout.reset(capture_token)
+        current_execution_id.reset(id_token)
+
+
+def recent_logs(execution_id: str) -> Optional[List[Dict[str, Any]]]:
+    """Records for an execution held in this process's ring buffer, if any."""
+    if _execution_handler is None:
+        return None
+    return _execution_handler.recent(execution_id)
@@ -0,0 +1,170 @@
+"""Resident memory accounting, per-run memory budgets and worker recycling limits.
+
+RSS is read from ``/proc/self/statm`` where available, otherwise from
+psutil when installed, otherwise it is reported as unknown. It is a
+process-wide figure: runs that share a process (threads, model comparisons)
+see each other's allocations, so per-run numbers are upper bounds.
+
+For the same reason ``CREWAI_RUN_MEMORY_BUDGET_MB`` is only enforced in
+processes that run one job at a time (warm-pool workers, and queue workers
+with a concurrency of 1; see ``set_exclusive``), and only for a run that has
+had the process to itself since it started. Overlapping runs, such as the
+models of a comparison or the deliverables of a fan-out, are measured but
+never aborted; worker recycling still bounds their process.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None
+
+MB = 1024 * 1024
+
+# A worker is recycled after finishing a run once its RSS passes this (0 disables).
+WORKER_MAX_RSS_MB = float(os.environ.get("CREWAI_WORKER_MAX_RSS_MB", 0))
+# ...or once it has served this many runs (0 disables).
+WORKER_MAX_EXECUTIONS = int(os.environ.get("CREWAI_WORKER_MAX_EXECUTIONS", 0))
+# Growth over its starting RSS at which a single run is aborted (0 disables).
+RUN_MEMORY_BUDGET_MB = float(os.environ.get("CREWAI_RUN_MEMORY_BUDGET_MB", 0))
+SAMPLE_INTERVAL = float(os.environ.get("CREWAI_MEMORY_SAMPLE_SECONDS", 0.5))
+
+# Whether this process runs one job at a time, so its RSS growth belongs to that job.
+_exclusive = False
+_active_monitors: set = set()
+_monitors_lock = threading.Lock()
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size of this process, or None when it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+def rss_mb() -> Optional[float]:
+    rss = rss_bytes()
+    return None if rss is None else round(rss / MB, 1)
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised inside a run once its memory growth passes the run budget."""
+
+    def __init__(self, used_mb: float, budget_mb: float):
+        super().__init__(f"Run exceeded its memory budget ({used_mb:.0f} MB used, budget {budget_mb:.0f} MB)")
+        self.used_mb = used_mb
+        self.budget_mb = budget_mb
+
+
+def set_exclusive(exclusive: bool = True) -> None:
+    """Mark this process as running one job at a time, which enables per-run memory budgets."""
+    global _exclusive
+    _exclusive = exclusive
+
+
+class RunMemoryMonitor:
+    """Samples RSS on a background thread while a run is active.
+
+    ``check()`` is called from crewai callbacks between agent steps and
+    raises MemoryBudgetExceeded once the budget has been passed; an LLM call
+    already in flight is allowed to finish. The budget is enforced only while
+    ``enforced`` holds: in an exclusive process, with no other run overlapping.
+    """
+
+    def __init__(self, budget_mb: float = RUN_MEMORY_BUDGET_MB, interval: float = SAMPLE_INTERVAL):
+        self.budget_mb = budget_mb
+        self.interval = interval
+        self.start_rss = rss_bytes()
+        self.peak_rss = self.start_rss
+        self.exceeded: Optional[MemoryBudgetExceeded] = None
+        # Set once another run shares the process; its growth is then not this run's alone
+        self.shared = not _exclusive
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enforced(self) -> bool:
+        return self.budget_mb > 0 and not self.shared
+
+    def start(self) -> None:
+        with _monitors_lock:
+            _active_monitors.add(self)
+            if len(_active_monitors) > 1:
+                for monitor in _active_monitors:
+                    monitor.shared = True
+        if self.start_rss is None:
+            return
+        self._thread = threading.Thread(target=self._sample_loop, name="run-memory", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sample()
+        with _monitors_lock:
+            _active_monitors.discard(self)
+
+    def _sample(self) -> None:
+        rss = rss_bytes()
+        if rss is None or self.start_rss is None:
+            return
+        self.peak_rss = max(self.peak_rss, rss)
+        used_mb = (rss - self.start_rss) / MB
+        if self.enforced and used_mb > self.budget_mb and self.exceeded is None:
+            self.exceeded = MemoryBudgetExceeded(used_mb, self.budget_mb)
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def check(self) -> None:
+        if self.exceeded is not None:
+            raise self.exceeded
+
+    def report(self) -> Dict[str, Any]:
+        end_rss = rss_bytes()
+        budget = {"budget_mb": self.budget_mb or None, "budget_enforced": self.enforced}
+        if self.start_rss is None or end_rss is None:
+            return {"rss_start_mb": None, "rss_end_mb": None, "rss_peak_mb": None, **budget}
+        return {
+            "rss_start_mb": round(self.start_rss / MB, 1),
+            "rss_end_mb": round(end_rss / MB, 1),
+            "rss_peak_mb": round(self.peak_rss / MB, 1),
+            "rss_growth_mb": round((end_rss - self.start_rss) / MB, 1),
+            **budget,
+        }
+
+
+@contextmanager
+def monitor_run(budget_mb: float = RUN_MEMORY_BUDGET_MB) -> Iterator[RunMemoryMonitor]:
+    monitor = RunMemoryMonitor(budget_mb)
+    monitor.start()
+    try:
+        yield monitor
+    finally:
+        monitor.stop()
+
+
+def recycle_reason(executions: int) -> Optional[str]:
+    """Why a worker that has served ``executions`` runs should be replaced, if it should."""
+    if WORKER_MAX_EXECUTIONS and executions >= WORKER_MAX_EXECUTIONS:
+        return f"served {executions} executions (limit {WORKER_MAX_EXECUTIONS})"
+    rss = rss_mb()
+    if WORKER_MAX_RSS_MB and rss is not None and rss >= WORKER_MAX_RSS_MB:
+        return f"RSS {rss:.0f} MB over limit {WORKER_MAX_RSS_MB:.0f} MB"
+    return None
+
+
+def worker_stats(executions: int) -> Dict[str, Any]:
+    return {"pid": os.getpid(), "rss_mb": rss_mb(), "executions": executions, "updated_at": time.time()}
@@ -0,0 +1,89 @@
+"""Offline stand-in for a hosted model, for load and soak testing.
+
+Runs requested with model ``offline`` (or ``offline/<anything>``) go
+through the full service: admission, workers, crew construction, prompt
+budgeting, tools and history. Every LLM call returns a canned markdown
+answer after a simulated delay, so no API key or network is needed and no
+tokens are billed. The answer is seeded from the prompt, which makes
+output sizes and contents repeatable run to run.
+"""
+
+import hashlib
+import os
+import random
+import re
+import time
+from typing import Any, Dict, List, Union
+
+from crewai import BaseLLM
+
+OFFLINE_PREFIX = "offline"
+
+# Simulated time to first token, and generation speed, per call.
+LATENCY_SECONDS = float(os.environ.get("CREWAI_OFFLINE_LATENCY_SECONDS", 0.5))
+TOKENS_PER_SECOND = float(os.environ.get("CREWAI_OFFLINE_TOKENS_PER_SECOND", 400))
+# Approximate words in each answer.
+OUTPUT_WORDS = int(os.environ.get("CREWAI_OFFLINE_OUTPUT_WORDS", 350))
+# Random spread applied to latency and answer length (0.2 = ±20%).
+JITTER = float(os.environ.get("CREWAI_OFFLINE_JITTER", 0.2))
+
+_WORD_RE = re.compile(r"[A-Za-z][a-z]{3,}")
+_FILLER = (
+    "adoption pipeline governance workflow platform automation revenue margin customers "
+    "operations analytics integration pilot roadmap capability readiness"
+).split()
+
+
+def is_offline_model(model: str) -> bool:
+    return model == OFFLINE_PREFIX or model.startswith(OFFLINE_PREFIX + "/")
+
+
+def _prompt_text(messages: Union[str, List[Dict[str, Any]]]) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+
+def offline_answer(prompt: str, words: int = OUTPUT_WORDS, rng: random.Random = None) -> str:
+    """A markdown report with headings, bullets and figures, using words from the prompt."""
+    rng = rng or random.Random(prompt)
+    vocabulary = list(dict.fromkeys(word.lower() for word in _WORD_RE.findall(prompt[-4000:]))) or _FILLER
+    lines = ["# Findings", ""]
+    written = 0
+    section = 1
+    while written < words:
+        lines += [f"## {section}. {rng.choice(vocabulary).title()} and {rng.choice(vocabulary)}", ""]
+        for _ in range(rng.randint(3, 6)):
+            sentence = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 16))).capitalize()
+            if rng.random() < 0.4:
+                sentence += f", up {rng.randint(2, 60)}% to ${rng.randint(1, 900)}M by {rng.randint(2025, 2030)}"
+            lines.append(f"- {sentence}.")
+            written += len(sentence.split())
+        lines.append("")
+        section += 1
+    return "\n".join(lines).rstrip()
+
+
+class OfflineLLM(BaseLLM):
+    """crewai LLM that answers every call locally after a simulated delay."""
+
+    def __init__(self, model: str = OFFLINE_PREFIX, **kwargs):
+        super().__init__(model=model, **kwargs)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs) -> str:
+        prompt = _prompt_text(messages)
+        rng = random.Random(hashlib.blake2b(prompt.encode("utf-8", "replace"), digest_size=8).digest())
+        spread = 1 + rng.uniform(-JITTER, JITTER)
+        answer = offline_answer(prompt, max(20, int(OUTPUT_WORDS * spread)), rng)
+        time.sleep(LATENCY_SECONDS * spread + len(answer) / 4 / TOKENS_PER_SECOND)
+        # ReAct agents stop at a final answer; tool calling is never attempted
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128000
@@ -0,0 +1,154 @@
+"""Shaping and encoding of large JSON responses, shared by the Flask and ASGI front ends.
+
+History records carry the full crew output, so the history endpoints support
+field projection, a summary mode that truncates results, ETag validation and
+negotiated gzip/zstd compression. zstd is used only when the optional
+``zstandard`` package is installed.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Bodies smaller than this are sent uncompressed.
+COMPRESS_MIN_BYTES = int(os.environ.get("CREWAI_COMPRESS_MIN_BYTES", 1024))
+# Characters of ``result`` kept in summary mode.
+SUMMARY_RESULT_CHARS = int(os.environ.get("CREWAI_SUMMARY_RESULT_CHARS", 500))
+# Bulky per-run diagnostics left out of summaries.
+SUMMARY_DROPPED_FIELDS = ("token_budget", "task_timings", "research_passes", "compaction", "memory")
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """``"id,status"`` -> ``["id", "status"]``; None or empty means all fields."""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    return fields or None
+
+
+def parse_flag(value: Any) -> bool:
+    """A query parameter or JSON field as a boolean; strings must say "1", "true" or "yes"."""
+    if isinstance(value, bool):
+        return value
+    return str(value or "").lower() in ("1", "true", "yes")
+
+
+def summarize(record: Dict[str, Any], max_chars: int = SUMMARY_RESULT_CHARS) -> Dict[str, Any]:
+    """A copy of an execution record with its result truncated and diagnostics dropped."""
+    summary = {key: value for key, value in record.items() if key not in SUMMARY_DROPPED_FIELDS}
+    result = summary.get("result")
+    if isinstance(result, str) and len(result) > max_chars:
+        summary["result"] = result[:max_chars].rstrip() + "…"
+        summary["result_truncated"] = True
+        summary["result_chars"] = len(result)
+    fanout = summary.get("fanout")
+    if fanout:
+        summary["fanout"] = {
+            **fanout,
+            "deliverables": [
+                {key: value for key, value in report.items() if key not in ("result", "tasks")}
+                for report in fanout.get("deliverables", [])
+            ],
+        }
+    comparison = summary.get("comparison")
+    if comparison:
+        summary["comparison"] = {
+            **comparison,
+            "models": [
+                {key: value for key, value in report.items() if key not in ("result", "tasks")}
+                for report in comparison.get("models", [])
+            ],
+        }
+    return summary
+
+
+def shape_record(
+    record: Dict[str, Any], fields: Optional[Iterable[str]] = None, summary: bool = False
+) -> Dict[str, Any]:
+    """Apply summary mode, then keep only ``fields`` (unknown fields are ignored)."""
+    if summary:
+        record = summarize(record)
+    if fields:
+        record = {field: record[field] for field in fields if field in record}
+    return record
+
+
+def etag_for(body: bytes) -> str:
+    # Weak, because the same JSON may be sent with different content codings
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best content coding the client accepts, preferring zstd over gzip."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in (("zstd", "gzip") if zstandard is not None else ("gzip",)):
+        if accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def encode_json(
+    payload: Dict[str, Any],
+    status: int,
+    request_headers,
+) -> Tuple[bytes, int, Dict[str, str]]:
+    """
+    Serialize a JSON payload with ETag and content-coding negotiation.
+
+    Args:
+        payload: Response body.
+        status: Status code from the handler; only 200 responses get an ETag.
+        request_headers: Mapping with case-insensitive ``get`` (Flask or Starlette headers).
+
+    Returns:
+        The body bytes, final status code and response headers. A matching
+        If-None-Match turns a 200 into an empty 304.
+    """
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if status == 200:
+        etag = etag_for(body)
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "no-cache"
+        if etag_matches(request_headers.get("If-None-Match"), etag):
+            return b"", 304, headers
+    if len(body) >= COMPRESS_MIN_BYTES:
+        coding = negotiate_encoding(request_headers.get("Accept-Encoding"))
+        if coding:
+            body = compress(body, coding)
+            headers["Content-Encoding"] = coding
+    return body, status, headers
@@ -0,0 +1,533 @@
+"""Crew execution for a validated /run request.
+
+This is the only module on the request path that imports crewai; it is
+loaded by warm workers at startup or lazily on the first in-process run.
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from budget import count_tokens, estimate_cost
+from catalog import config_version
+from crew import AgenticCrew, CREW_LAYOUTS
+from logs import execution_logging, logger
+from memory import monitor_run
+from skeletons import crew_for_request
+from store import get_store
+from tools.fact_index import content_hash, get_fact_index
+
+Response = Tuple[Dict[str, Any], int]
+
+# Fan-out runs reuse a research result for the same topic, documents and model for this long (0 disables).
+RESEARCH_CACHE_SECONDS = float(os.environ.get("CREWAI_RESEARCH_CACHE_SECONDS", 24 * 3600))
+
+
+def build_crew(agentic_crew: AgenticCrew, run_request: Dict[str, Any]):
+    topic = run_request["topic"]
+    crew_type = run_request["crew_type"]
+    custom_agents: List[str] = run_request["agents"]
+    custom_tasks: List[str] = run_request["tasks"]
+
+    if run_request.get("deliverable"):
+        return agentic_crew.create_fanout_crew(run_request["deliverable"], topic, run_request["research"])
+    if crew_type == 'research':
+        return agentic_crew.create_research_crew(topic)
+    elif crew_type == 'analysis':
+        return agentic_crew.create_analysis_crew(topic)
+    elif crew_type == 'full':
+        return agentic_crew.create_full_crew(topic)
+    elif crew_type == 'custom' and custom_agents and custom_tasks:
+        return agentic_crew.create_custom_crew(topic, custom_agents, custom_tasks)
+    return agentic_crew.create_research_crew(topic)
+
+
+def effective_crew_type(run_request: Dict[str, Any]) -> str:
+    """The crew ``build_crew`` will actually create for a request."""
+    if run_request.get("deliverable"):
+        return "fanout"
+    crew_type = run_request["crew_type"]
+    if crew_type in CREW_LAYOUTS:
+        return crew_type
+    if crew_type == 'custom' and run_request["agents"] and run_request["tasks"]:
+        return crew_type
+    return 'research'
+
+
+class RunCancelled(Exception):
+    """Raised between agent steps once this process no longer owns the run."""
+
+
+class RunOwnership:
+    """
+    Lets whoever started a run take it back, as a queue worker does when its lease is lost.
+
+    Args:
+        confirm: Checks with the authority (e.g. renews the lease) and returns
+            whether the run is still owned; called just before results are saved.
+    """
+
+    def __init__(self, confirm: Optional[Callable[[], bool]] = None):
+        self._confirm = confirm
+        self._lost = threading.Event()
+
+    @property
+    def lost(self) -> bool:
+        return self._lost.is_set()
+
+    def revoke(self) -> None:
+        self._lost.set()
+
+    def check(self) -> None:
+        if self.lost:
+            raise RunCancelled("Run is no longer owned by this worker")
+
+    def confirm(self) -> bool:
+        if not self.lost and self._confirm is not None and not self._confirm():
+            self.revoke()
+        return not self.lost
+
+
+_ownership: ContextVar[Optional[RunOwnership]] = ContextVar("run_ownership", default=None)
+
+
+@contextmanager
+def owned_by(ownership: RunOwnership) -> Iterator[None]:
+    """Stop runs started in this context, and skip saving them, once ``ownership`` is revoked."""
+    token = _ownership.set(ownership)
+    try:
+        yield
+    finally:
+        _ownership.reset(token)
+
+
+# Requests this process has run, for worker recycling.
+executions_served = 0
+_executions_served_lock = threading.Lock()
+
+
+def run_crew_request(run_request: Dict[str, Any]) -> Response:
+    """Run a validated crew request to completion and persist its record."""
+    global executions_served
+    with _executions_served_lock:
+        executions_served += 1
+    with execution_logging(run_request["execution_id"]):
+        if len(run_request.get("models") or []) > 1:
+            return _run_comparison(run_request)
+        if run_request.get("deliverables"):
+            return _run_fanout(run_request)
+        return _run_crew_request(run_request)
+
+
+def prepare_documents(
+    documents: List[Dict[str, Any]], document_ids: List[str] = ()
+) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """Document inputs and their fact indexes, built once per request.
+
+    Uploaded documents referenced by id are read from the store's text cache.
+    """
+    store = get_store()
+    uploaded = [store.get_document(document_id) for document_id in document_ids]
+    documents = list(documents) + [doc for doc in uploaded if doc is not None]
+
+    # Documents are trimmed per task by the prompt budget, not here
+    doc_inputs = []
+    fact_indexes = {}
+    names = set()
+    for doc in documents:
+        doc_name = doc.get('name', 'Unknown')
+        doc_content = doc.get('content', '')
+        if not doc_content:
+            continue
+        key = content_hash(doc_content)
+        if key in fact_indexes:
+            continue  # the same content supplied twice
+        # Different documents under one name stay separate and addressable
+        unique_name, copy = doc_name, 2
+        while unique_name in names:
+            unique_name, copy = f"{doc_name} ({copy})", copy + 1
+        names.add(unique_name)
+        doc_inputs.append({"name": unique_name, "content": doc_content})
+        # Index the full document once so agents can look up facts beyond the excerpt
+        fact_indexes[key] = get_fact_index(unique_name, doc_content)
+    if doc_inputs:
+        logger.info(f"Including {len(doc_inputs)} document(s) with {sum(len(d['content']) for d in doc_inputs)} chars of context")
+    return doc_inputs, fact_indexes
+
+
+def execute_crew(
+    run_request: Dict[str, Any],
+    execution_id: str,
+    model: str,
+    doc_inputs: List[Dict[str, str]],
+    fact_indexes: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run one crew on one model and persist its execution record."""
+    logger.info(f"Starting {run_request['crew_type']} crew on {model}")
+    agentic_crew = AgenticCrew(
+        llm_model=model,
+        documents=doc_inputs,
+        fact_indexes=fact_indexes,
+        verbose=run_request["verbose"],
+        research_mode=run_request.get("research_mode", "auto")
+    )
+    crew_type = effective_crew_type(run_request)
+    ownership = _ownership.get()
+    with monitor_run() as monitor:
+        def guard() -> None:
+            monitor.check()
+            if ownership is not None:
+                ownership.check()
+
+        start_time = datetime.utcnow()
+        try:
+            with crew_for_request(
+                agentic_crew, crew_type, run_request["topic"], lambda: build_crew(agentic_crew, run_request)
+            ) as crew:
+                if agentic_crew.map_reduce_research(crew, run_request["topic"], guard=guard):
+                    logger.info(f"Researched {len(doc_inputs)} documents in {len(agentic_crew.research_passes)} parallel passes")
+                result = agentic_crew.run(crew, guard=guard)
+            status, error = "completed", None
+        except Exception as e:
+            # crewai may wrap or retry around the guard's exception, so trust the monitor and ownership
+            if ownership is not None and ownership.lost:
+                logger.warning("Cancelling run: no longer owned by this worker")
+                result, status, error = None, "cancelled", "Run is no longer owned by this worker"
+            elif monitor.exceeded is None:
+                raise
+            else:
+                logger.warning(f"Aborting run: {monitor.exceeded}")
+                result, status, error = None, "aborted", str(monitor.exceeded)
+        end_time = datetime.utcnow()
+
+    execution_record = {
+        "id": execution_id,
+        "topic": run_request["topic"],
+        "crew_type": run_request["crew_type"],
+        "model": model,
+        "started_at": start_time.isoformat(),
+        "completed_at": end_time.isoformat(),
+        "duration_seconds": (end_time - start_time).total_seconds(),
+        "result": result,
+        "token_budget": agentic_crew.budget.summary(),
+        "task_timings": agentic_crew.task_timings,
+        "research_passes": agentic_crew.research_passes,
+        "compaction": agentic_crew.compactor.summary(),
+        "tool_cache": agentic_crew.tool_cache.summary(),
+        "token_usage": agentic_crew.token_usage,
+        "memory": monitor.report(),
+        "status": status
+    }
+    if error:
+        execution_record["error"] = error
+    for key in ("comparison_id", "fanout_id", "deliverable"):
+        if run_request.get(key):
+            execution_record[key] = run_request[key]
+    if ownership is not None and not ownership.confirm():
+        # Whoever owns the run now writes its record; ours would overwrite theirs
+        logger.warning(f"Not saving {execution_id}: no longer owned by this worker")
+        execution_record["status"] = "cancelled"
+        execution_record.setdefault("error", "Run is no longer owned by this worker")
+        return execution_record
+    get_store().save_execution(execution_record)
+    logger.info(f"Finished ({status}) in {execution_record['duration_seconds']:.1f}s")
+    return execution_record
+
+
+def _run_crew_request(run_request: Dict[str, Any]) -> Response:
+    try:
+        execution_id = run_request["execution_id"]
+        doc_inputs, fact_indexes = prepare_documents(run_request["documents"], run_request.get("document_ids", []))
+        execution_record = execute_crew(run_request, execution_id, run_request["model"], doc_inputs, fact_indexes)
+        if execution_record["status"] in ("aborted", "cancelled"):
+            return {
+                "success": False,
+                "execution_id": execution_id,
+                "status": execution_record["status"],
+                "error": execution_record["error"],
+                "memory": execution_record["memory"]
+            }, 500
+        return {
+            "success": True,
+            "execution_id": execution_id,
+            "result": execution_record["result"],
+            "duration_seconds": execution_record["duration_seconds"],
+            "token_budget": execution_record["token_budget"]
+        }, 200
+
+    except Exception as e:
+        logger.exception("Error executing crew")
+        return {"success": False, "error": str(e), "details": traceback.format_exc()}, 500
+
+
+def model_report(model: str, execution_id: str, record: Dict[str, Any] = None, error: str = None) -> Dict[str, Any]:
+    """One model's row in a comparison report."""
+    if record is None:
+        return {"model": model, "execution_id": execution_id, "status": "failed", "error": error}
+    if record["status"] != "completed":
+        return {"model": model, "execution_id": execution_id, "status": record["status"], "error": record.get("error")}
+    usage = record["token_usage"]
+    return {
+        "model": model,
+        "execution_id": execution_id,
+        "status": record["status"],
+        "wall_seconds": record["duration_seconds"],
+        "tasks": record["task_timings"],
+        "token_usage": usage,
+        "estimated_cost_usd": estimate_cost(model, usage["prompt_tokens"], usage["completion_tokens"]),
+        "output_chars": len(record["result"]),
+        "output_tokens": count_tokens(record["result"], model),
+        "result": record["result"],
+    }
+
+
+def _run_comparison(run_request: Dict[str, Any]) -> Response:
+    """Run the same crew on several models concurrently and compare them."""
+    try:
+        comparison_id = run_request["execution_id"]
+        models: List[str] = run_request["models"]
+        logger.info(f"Comparing {run_request['crew_type']} crew across {len(models)} models")
+        started_at = datetime.utcnow()
+        doc_inputs, fact_indexes = prepare_documents(run_request["documents"], run_request.get("document_ids", []))
+
+        def run_model(model: str, execution_id: str) -> Dict[str, Any]:
+            with execution_logging(execution_id):
+                try:
+                    record = execute_crew(
+                        {**run_request, "comparison_id": comparison_id}, execution_id, model, doc_inputs, fact_indexes
+                    )
+                    return model_report(model, execution_id, record)
+                except Exception as e:
+                    logger.exception(f"Error executing crew on {model}")
+                    return model_report(model, execution_id, error=str(e))
+
+        with ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="crew-compare") as pool:
+            futures = [
+                # Each thread starts from this context so it inherits the comparison's log tagging
+                pool.submit(contextvars.copy_context().run, run_model, model, f"{comparison_id}_m{index}")
+                for index, model in enumerate(models)
+            ]
+            reports = [future.result() for future in futures]
+        completed_at = datetime.utcnow()
+
+        succeeded = [report for report in reports if report["status"] == "completed"]
+        priced = [report for report in succeeded if report["estimated_cost_usd"] is not None]
+        comparison = {
+            "models": reports,
+            "fastest": min(succeeded, key=lambda r: r["wall_seconds"])["model"] if succeeded else None,
+            "cheapest": min(priced, key=lambda r: r["estimated_cost_usd"])["model"] if priced else None,
+        }
+        status = "completed" if len(succeeded) == len(reports) else ("partial" if succeeded else "failed")
+        get_store().save_execution({
+            "id": comparison_id,
+            "topic": run_request["topic"],
+            "crew_type": run_request["crew_type"],
+            "model": ",".join(models),
+            "started_at": started_at.isoformat(),
+            "completed_at": completed_at.isoformat(),
+            "duration_seconds": (completed_at - started_at).total_seconds(),
+            "comparison": comparison,
+            "status": status
+        })
+        logger.info(f"Comparison finished: {len(succeeded)}/{len(reports)} models succeeded")
+        return {
+            "success": bool(succeeded),
+            "execution_id": comparison_id,
+            "duration_seconds": (completed_at - started_at).total_seconds(),
+            "comparison": comparison
+        }, 200 if succeeded else 500
+
+    except Exception as e:
+        logger.exception("Error executing comparison")
+        return {"success": False, "error": str(e), "details": traceback.format_exc()}, 500
+
+
+def research_key(run_request: Dict[str, Any], doc_inputs: List[Dict[str, str]]) -> str:
+    """Cache key for shared research: topic, document set, model, research mode and config version."""
+    payload = json.dumps([
+        " ".join(run_request["topic"].lower().split()),
+        sorted((doc["name"], content_hash(doc["content"])) for doc in doc_inputs),
+        run_request["model"],
+        run_request.get("research_mode", "auto"),
+        config_version(),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Research key to [lock, threads holding or waiting for it]; entries go once unused.
+_research_locks: Dict[str, List[Any]] = {}
+_research_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _research_lock(key: str) -> Iterator[None]:
+    """Hold the process-wide lock for one research key."""
+    with _research_locks_guard:
+        entry = _research_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _research_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _research_locks[key]
+
+
+def shared_research(
+    run_request: Dict[str, Any],
+    doc_inputs: List[Dict[str, str]],
+    fact_indexes: Dict[str, Any]
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    The research result for a fan-out run, from the cache or a new research-only crew.
+
+    Concurrent fan-outs in this process with the same key wait for one
+    research run instead of each starting their own.
+
+    Returns:
+        The research text (None if it could not be produced) and a report for
+        the fan-out record.
+    """
+    key = research_key(run_request, doc_inputs)
+    with _research_lock(key):
+        return _cached_or_new_research(key, run_request, doc_inputs, fact_indexes)
+
+
+def _cached_or_new_research(
+    key: str, run_request: Dict[str, Any], doc_inputs: List[Dict[str, str]], fact_indexes: Dict[str, Any]
+) -> Tuple[Any, Dict[str, Any]]:
+    store = get_store()
+    cached = store.get_research(key, RESEARCH_CACHE_SECONDS) if RESEARCH_CACHE_SECONDS > 0 else None
+    if cached:
+        logger.info(f"Reusing research from {cached['execution_id']}")
+        return cached["result"], {
+            "execution_id": cached["execution_id"],
+            "cached": True,
+            "cached_at": datetime.utcfromtimestamp(cached["created_at"]).isoformat(),
+            "status": "completed",
+        }
+
+    execution_id = f"{run_request['execution_id']}_research"
+    research_request = {
+        **run_request,
+        "crew_type": "custom",
+        "agents": ["researcher"],
+        "tasks": ["research_task"],
+        "fanout_id": run_request["execution_id"],
+    }
+    with execution_logging(execution_id):
+        record = execute_crew(research_request, execution_id, run_request["model"], doc_inputs, fact_indexes)
+    report = {
+        "execution_id": execution_id,
+        "cached": False,
+        "status": record["status"],
+        "wall_seconds": record["duration_seconds"],
+        "token_usage": record["token_usage"],
+    }
+    if record["status"] != "completed":
+        return None, {**report, "error": record.get("error")}
+    if RESEARCH_CACHE_SECONDS > 0:
+        store.save_research(key, run_request["topic"], run_request["model"], execution_id, record["result"])
+    return record["result"], report
+
+
+def deliverable_report(
+    deliverable: str, execution_id: str, record: Dict[str, Any] = None, error: str = None
+) -> Dict[str, Any]:
+    """One deliverable's row in a fan-out report."""
+    if record is None:
+        return {"deliverable": deliverable, "execution_id": execution_id, "status": "failed", "error": error}
+    if record["status"] != "completed":
+        return {
+            "deliverable": deliverable, "execution_id": execution_id, "status": record["status"], "error": record.get("error")
+        }
+    return {
+        "deliverable": deliverable,
+        "execution_id": execution_id,
+        "status": record["status"],
+        "wall_seconds": record["duration_seconds"],
+        "tasks": record["task_timings"],
+        "token_usage": record["token_usage"],
+        "output_chars": len(record["result"]),
+        "result": record["result"],
+    }
+
+
+def _run_fanout(run_request: Dict[str, Any]) -> Response:
+    """Research a topic once, then build every requested deliverable on it concurrently."""
+    try:
+        fanout_id = run_request["execution_id"]
+        deliverables: List[str] = run_request["deliverables"]
+        logger.info(f"Fanning out shared research to {len(deliverables)} deliverable(s)")
+        started_at = datetime.utcnow()
+        doc_inputs, fact_indexes = prepare_documents(run_request["documents"], run_request.get("document_ids", []))
+        research, research_report = shared_research(run_request, doc_inputs, fact_indexes)
+
+        def run_deliverable(deliverable: str, execution_id: str) -> Dict[str, Any]:
+            with execution_logging(execution_id):
+                try:
+                    record = execute_crew(
+                        {
+                            **run_request,
+                            "crew_type": deliverable,
+                            "deliverable": deliverable,
+                            "research": research,
+                            "fanout_id": fanout_id,
+                        },
+                        execution_id, run_request["model"], doc_inputs, fact_indexes
+                    )
+                    return deliverable_report(deliverable, execution_id, record)
+                except Exception as e:
+                    logger.exception(f"Error building deliverable {deliverable}")
+                    return deliverable_report(deliverable, execution_id, error=str(e))
+
+        reports = []
+        if research is not None:
+            with ThreadPoolExecutor(max_workers=len(deliverables), thread_name_prefix="crew-fanout") as pool:
+                futures = [
+                    # Each thread starts from this context so it inherits the fan-out's log tagging
+                    pool.submit(contextvars.copy_context().run, run_deliverable, deliverable, f"{fanout_id}_d{index}")
+                    for index, deliverable in enumerate(deliverables)
+                ]
+                reports = [future.result() for future in futures]
+        completed_at = datetime.utcnow()
+
+        succeeded = [report for report in reports if report["status"] == "completed"]
+        status = "completed" if reports and len(succeeded) == len(reports) else ("partial" if succeeded else "failed")
+        fanout = {"research": research_report, "deliverables": reports}
+        execution_record = {
+            "id": fanout_id,
+            "topic": run_request["topic"],
+            "crew_type": "fanout",
+            "model": run_request["model"],
+            "started_at": started_at.isoformat(),
+            "completed_at": completed_at.isoformat(),
+            "duration_seconds": (completed_at - started_at).total_seconds(),
+            "result": research,
+            "fanout": fanout,
+            "status": status
+        }
+        if research is None:
+            execution_record["error"] = research_report.get("error") or "Research failed"
+        get_store().save_execution(execution_record)
+        logger.info(f"Fan-out finished: {len(succeeded)}/{len(deliverables)} deliverables succeeded")
+        return {
+            "success": bool(succeeded),
+            "execution_id": fanout_id,
+            "duration_seconds": execution_record["duration_seconds"],
+            "fanout": fanout
+        }, 200 if succeeded else 500
+
+    except Exception as e:
+        logger.exception("Error executing fan-out")
+        return {"success": False, "error": str(e), "details": traceback.format_exc()}, 500
@@ -0,0 +1,345 @@
+"""Framework-independent request handlers shared by the Flask and ASGI front ends.
+
+Each handler returns a ``(payload, status_code)`` tuple; the HTTP layers only
+translate requests and responses.
+"""
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+import workers
+from admission import AdmissionController, AdmissionRejected
+from catalog import get_available_agents, get_available_tasks
+from export import ExportError, export_history
+from ingest import IngestError, ingest_upload
+from jobqueue import JobQueue, QueueFull
+from logs import DEFAULT_VERBOSE, logger, recent_logs
+from memory import rss_mb
+from responses import parse_flag, shape_record
+from store import RETENTION_DAYS, get_store
+
+Response = Tuple[Dict[str, Any], int]
+
+# Models a single /run may compare side by side.
+MAX_COMPARE_MODELS = int(os.environ.get("CREWAI_MAX_COMPARE_MODELS", 4))
+# auto: parallel per-document research once there are enough documents (see crew.py);
+# single: one research task over all documents; map_reduce: one pass per document.
+RESEARCH_MODES = ("auto", "single", "map_reduce")
+# Deliverables one fan-out run may build on its shared research.
+MAX_DELIVERABLES = int(os.environ.get("CREWAI_MAX_DELIVERABLES", 6))
+# Seconds between maintenance passes over the shared store.
+MAINTENANCE_INTERVAL = float(os.environ.get("CREWAI_MAINTENANCE_SECONDS", 3600))
+
+CREWS = [
+    {
+        "id": "research",
+        "name": "Research Crew",
+        "description": "Researcher + Writer for comprehensive research and documentation",
+        "agents": ["researcher", "writer"]
+    },
+    {
+        "id": "analysis",
+        "name": "Analysis Crew",
+        "description": "Researcher + Analyst for research and strategic analysis",
+        "agents": ["researcher", "analyst"]
+    },
+    {
+        "id": "full",
+        "name": "Full Crew",
+        "description": "All agents working together for comprehensive deliverables",
+        "agents": ["researcher", "writer", "analyst", "coordinator"]
+    },
+    {
+        "id": "fanout",
+        "name": "Research Fan-out",
+        "description": "One shared research pass feeding several deliverables (crew types or task types) run in parallel",
+        "agents": ["researcher"]
+    },
+    {
+        "id": "custom",
+        "name": "Custom Crew",
+        "description": "Build your own crew with selected agents and tasks",
+        "agents": []
+    }
+]
+
+_admission: Optional[AdmissionController] = None
+_job_queue: Optional[JobQueue] = None
+
+
+def get_admission() -> AdmissionController:
+    global _admission
+    if _admission is None:
+        _admission = AdmissionController(get_store())
+    return _admission
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(get_store())
+    return _job_queue
+
+
+def queue_mode() -> bool:
+    return workers.EXECUTION_MODE == "queue"
+
+
+_maintenance_started = False
+_maintenance_lock = threading.Lock()
+
+
+def run_maintenance() -> Dict[str, int]:
+    """Free execution slots held by crashed processes and prune rows past ``CREWAI_RETENTION_DAYS``."""
+    store = get_store()
+    removed = {"admission_slots": store.release_dead_slots()}
+    if RETENTION_DAYS > 0:
+        max_age = RETENTION_DAYS * 86400
+        removed.update(store.prune(max_age))
+        if queue_mode():
+            removed["jobs"] = get_job_queue().prune(max_age)
+    return removed
+
+
+def start_maintenance() -> None:
+    """Run ``run_maintenance`` now and every ``CREWAI_MAINTENANCE_SECONDS`` on a daemon thread."""
+    global _maintenance_started
+    with _maintenance_lock:
+        if _maintenance_started:
+            return
+        _maintenance_started = True
+    threading.Thread(target=_maintenance_loop, name="store-maintenance", daemon=True).start()
+
+
+def _maintenance_loop() -> None:
+    while True:
+        try:
+            removed = {name: count for name, count in run_maintenance().items() if count}
+            if removed:
+                logger.info(f"Store maintenance removed {removed}")
+        except Exception:
+            logger.exception("Store maintenance failed")
+        time.sleep(MAINTENANCE_INTERVAL)
+
+
+def health() -> Response:
+    """Liveness from in-memory state only, so it answers even while the store is locked."""
+    return {
+        "status": "healthy",
+        "service": "crewai",
+        "timestamp": datetime.utcnow().isoformat(),
+        "ready": workers.get_pool().last_ready(),
+        "pid": os.getpid(),
+        "rss_mb": rss_mb(),
+        "executions": get_admission().local_status()
+    }, 200
+
+
+def readiness() -> Response:
+    """Report whether enough warm execution workers have crewai loaded, and store-wide slot use."""
+    status = workers.get_pool().status()
+    return (
+        {"status": "ready" if status["ready"] else "warming", **status, "executions": get_admission().status()},
+        200 if status["ready"] else 503,
+    )
+
+
+def list_agents() -> Response:
+    try:
+        return {"success": True, "agents": get_available_agents()}, 200
+    except Exception as e:
+        return {"success": False, "error": str(e)}, 500
+
+
+def list_tasks() -> Response:
+    try:
+        return {"success": True, "tasks": get_available_tasks()}, 200
+    except Exception as e:
+        return {"success": False, "error": str(e)}, 500
+
+
+def list_crews() -> Response:
+    return {"success": True, "crews": CREWS}, 200
+
+
+def get_history(limit: int = 10, fields: Optional[List[str]] = None, summary: bool = False) -> Response:
+    executions = [shape_record(record, fields, summary) for record in get_store().list_executions(limit)]
+    return {"success": True, "executions": executions}, 200
+
+
+EXPORT_PARAMS = ("format", "fields", "since", "until", "crew_type", "model", "status")
+
+
+def export_executions(params: Dict[str, Optional[str]]):
+    """Streaming history export: ``(chunks, media_type, filename)`` or an error response."""
+    try:
+        return export_history(get_store(), params), None
+    except ExportError as e:
+        return None, ({"success": False, "error": str(e)}, 400)
+
+
+def get_execution(execution_id: str, fields: Optional[List[str]] = None, summary: bool = False) -> Response:
+    execution = get_store().get_execution(execution_id)
+    if execution is None:
+        return {"success": False, "error": "Execution not found"}, 404
+    return {"success": True, "execution": shape_record(execution, fields, summary)}, 200
+
+
+def get_execution_logs(execution_id: str, limit: int = 1000) -> Response:
+    """Structured log records for an execution, from memory when this process ran it."""
+    entries = recent_logs(execution_id)
+    if entries is None:
+        entries = get_store().get_logs(execution_id, limit)
+        if not entries and get_store().get_execution(execution_id) is None:
+            return {"success": False, "error": "Execution not found"}, 404
+    return {"success": True, "execution_id": execution_id, "logs": entries[-limit:] if limit > 0 else []}, 200
+
+
+def get_job(job_id: str) -> Response:
+    """State of a queued run; includes the run's response once it has finished."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return {"success": False, "error": "Job not found"}, 404
+    return {"success": True, "job": job}, 200
+
+
+def ingest_documents(uploads: List[Tuple[str, IO[bytes]]]) -> Response:
+    """Extract and cache uploaded files; their ids can be passed to /run as ``document_ids``."""
+    if not uploads:
+        return {"success": False, "error": "No files uploaded"}, 400
+    documents = []
+    for name, stream in uploads:
+        try:
+            documents.append(ingest_upload(stream, name, get_store()))
+        except IngestError as e:
+            return {"success": False, "error": str(e), "documents": documents}, e.status
+    return {"success": True, "documents": documents}, 200
+
+
+def get_document(document_id: str) -> Response:
+    document = get_store().get_document(document_id)
+    if document is None:
+        return {"success": False, "error": "Document not found"}, 404
+    content = document.pop("content")
+    return {"success": True, "document": {**document, "preview": content[:1000]}}, 200
+
+
+def new_execution_id() -> str:
+    # The random suffix keeps ids unique across concurrent workers
+    return f"exec_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def parse_run_request(data: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[Response]]:
+    """Validate a /run body, returning the normalized request or an error response."""
+    if not data:
+        return None, ({"success": False, "error": "No JSON data provided"}, 400)
+
+    run_request = {
+        "execution_id": new_execution_id(),
+        "topic": data.get('topic', ''),
+        "crew_type": data.get('crew_type', 'research'),
+        "model": data.get('model', 'gpt-4o-mini'),
+        "agents": data.get('agents', []),
+        "tasks": data.get('tasks', []),
+        "documents": data.get('documents', []),
+        "document_ids": data.get('document_ids', []),
+        "research_mode": data.get('research_mode', 'auto'),
+        "verbose": parse_flag(data.get('verbose', DEFAULT_VERBOSE)),
+    }
+    if not run_request["topic"]:
+        return None, ({"success": False, "error": "Topic is required"}, 400)
+
+    document_ids = run_request["document_ids"]
+    if not isinstance(document_ids, list) or not all(isinstance(d, str) for d in document_ids):
+        return None, ({"success": False, "error": "document_ids must be a list of document ids"}, 400)
+    missing = get_store().missing_documents(document_ids)
+    if missing:
+        return None, ({"success": False, "error": f"Unknown document ids: {', '.join(missing)}"}, 400)
+
+    if run_request["research_mode"] not in RESEARCH_MODES:
+        return None, ({"success": False, "error": f"research_mode must be one of: {', '.join(RESEARCH_MODES)}"}, 400)
+
+    deliverables = data.get('deliverables')
+    if deliverables is not None or run_request["crew_type"] == "fanout":
+        deliverables, error = parse_deliverables(deliverables)
+        if error:
+            return None, error
+        run_request["crew_type"] = "fanout"
+        run_request["deliverables"] = deliverables
+
+    models = data.get('models')
+    if models is not None:
+        if not isinstance(models, list) or not all(isinstance(m, str) and m for m in models):
+            return None, ({"success": False, "error": "models must be a list of model names"}, 400)
+        models = list(dict.fromkeys(models))
+        if len(models) > MAX_COMPARE_MODELS:
+            return None, ({"success": False, "error": f"At most {MAX_COMPARE_MODELS} models can be compared"}, 400)
+        if len(models) > 1 and run_request.get("deliverables"):
+            return None, ({"success": False, "error": "deliverables cannot be combined with a model comparison"}, 400)
+        if models:
+            run_request["model"] = models[0]
+            run_request["models"] = models
+    return run_request, None
+
+
+def parse_deliverables(deliverables: Any) -> Tuple[Optional[List[str]], Optional[Response]]:
+    """Validate the crew types and task types requested from one shared research pass."""
+    if not isinstance(deliverables, list) or not deliverables or not all(isinstance(d, str) and d for d in deliverables):
+        return None, ({"success": False, "error": "deliverables must be a non-empty list of crew or task types"}, 400)
+    deliverables = list(dict.fromkeys(deliverables))
+    if len(deliverables) > MAX_DELIVERABLES:
+        return None, ({"success": False, "error": f"At most {MAX_DELIVERABLES} deliverables can share one research pass"}, 400)
+    known = {crew["id"] for crew in CREWS if crew["id"] not in ("fanout", "custom")}
+    known.update(task["id"] for task in get_available_tasks() if task["id"] != "research_task")
+    unknown = [d for d in deliverables if d not in known]
+    if unknown:
+        return None, ({"success": False, "error": f"Unknown deliverables: {', '.join(unknown)}"}, 400)
+    return deliverables, None
+
+
+def run_slots(run_request: Dict[str, Any]) -> int:
+    """Execution slots a request occupies: one per concurrently running crew."""
+    return max(1, len(run_request.get("models") or []), len(run_request.get("deliverables") or []))
+
+
+def execute_run(run_request: Dict[str, Any]) -> Response:
+    """Run a validated crew request on a warm worker, or in-process when no pool is configured."""
+    return workers.get_pool().run(run_request)
+
+
+def rejected_response(error: AdmissionRejected) -> Response:
+    return {"success": False, "error": str(error), "retry_after": error.retry_after}, 429
+
+
+def enqueue_run(run_request: Dict[str, Any]) -> Response:
+    """Hand a validated request to the queue workers and answer 202 straight away."""
+    execution_id = run_request["execution_id"]
+    try:
+        get_job_queue().enqueue(execution_id, run_request)
+    except QueueFull as e:
+        return {"success": False, "error": str(e), "retry_after": e.retry_after}, 429
+    return {
+        "success": True,
+        "execution_id": execution_id,
+        "status": "queued",
+        "job_url": f"/jobs/{execution_id}",
+        "result_url": f"/history/{execution_id}"
+    }, 202
+
+
+def run_crew(data: Optional[Dict[str, Any]]) -> Response:
+    """Validate, admit and execute a /run request on the calling thread."""
+    run_request, error = parse_run_request(data)
+    if error:
+        return error
+    if queue_mode():
+        return enqueue_run(run_request)
+    try:
+        with get_admission().admit(run_request["execution_id"], run_slots(run_request)):
+            return execute_run(run_request)
+    except AdmissionRejected as e:
+        return rejected_response(e)
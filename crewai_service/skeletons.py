@@ -0,0 +1,188 @@
+"""Pool of pre-built crews reused across runs.
+
+Building agents (and their LLM clients), tasks and the crew accounts for a
+noticeable share of a short run. The research, analysis and full crews have a
+fixed shape, so idle copies are kept per ``(crew type, model, config version,
+document tools, verbose)`` and a request only rewrites the topic- and
+document-dependent text on them.
+
+Between runs every pooled object is restored to the state captured right after
+it was built; counters that crewai accumulates across kickoffs are replaced
+with fresh instances. A crew whose run raised is dropped rather than reused.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from crewai import Crew
+
+from catalog import config_version
+from crew import AgenticCrew, CREW_LAYOUTS
+from logs import logger
+
+# Off by default: resetting relies on crewai keeping per-run state in the fields snapshotted
+# here, which tests/test_skeletons.py checks against the installed crewai.
+POOL_ENABLED = os.environ.get("CREWAI_SKELETON_POOL", "false").lower() in ("1", "true", "yes")
+# Idle skeletons kept per key; extra ones are dropped on return.
+MAX_IDLE_PER_KEY = int(os.environ.get("CREWAI_SKELETON_POOL_SIZE", 4))
+# Rebuild a skeleton after this many runs as a backstop against state crewai keeps internally.
+MAX_USES = int(os.environ.get("CREWAI_SKELETON_MAX_USES", 50))
+
+TOPIC_PLACEHOLDER = "{topic}"
+
+# Per-run accumulators crewai hangs off agents and crews; replaced, not restored.
+_FRESH_ON_RESET = ("TokenProcess", "CacheHandler")
+
+SkeletonKey = Tuple[str, str, str, bool, bool]
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, (list, dict, set)):
+        return value.copy()
+    if type(value).__name__ in _FRESH_ON_RESET:
+        return type(value)()
+    return value
+
+
+def _snapshot(obj: Any) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Shallow copy of an object's fields and pydantic private attributes."""
+    private = getattr(obj, "__pydantic_private__", None) or {}
+    return (
+        {name: _copy_value(value) for name, value in vars(obj).items()},
+        {name: _copy_value(value) for name, value in private.items()},
+    )
+
+
+def _restore(obj: Any, snapshot: Tuple[Dict[str, Any], Dict[str, Any]]) -> None:
+    fields, private = snapshot
+    for name in list(vars(obj)):
+        if name not in fields:
+            del obj.__dict__[name]
+    obj.__dict__.update({name: _copy_value(value) for name, value in fields.items()})
+    if private:
+        obj.__pydantic_private__.update({name: _copy_value(value) for name, value in private.items()})
+
+
+class CrewSkeleton:
+    """A predefined crew built once with placeholder text."""
+
+    def __init__(self, key: SkeletonKey, crew: Crew):
+        self.key = key
+        self.crew_type = key[0]
+        self.crew = crew
+        self.uses = 0
+        self._snapshots = [(obj, _snapshot(obj)) for obj in [crew, *crew.agents, *crew.tasks]]
+
+    def parameterize(self, agentic_crew: AgenticCrew, topic: str) -> Crew:
+        """Write the request's topic and document text onto the pooled agents and tasks."""
+        agent_types, task_layout = CREW_LAYOUTS[self.crew_type]
+        for agent_type, agent in zip(agent_types, self.crew.agents):
+            agent.role, agent.goal, agent.backstory = agentic_crew.agent_text(agent_type, topic)
+        for (task_type, _, _), task in zip(task_layout, self.crew.tasks):
+            task.description, task.expected_output = agentic_crew.task_text(
+                task_type, topic, task.agent, task.context
+            )
+        self.uses += 1
+        return self.crew
+
+    def reset(self) -> None:
+        for obj, snapshot in self._snapshots:
+            _restore(obj, snapshot)
+
+
+class SkeletonPool:
+    """Idle crew skeletons grouped by key; thread safe."""
+
+    def __init__(self, max_idle: int = MAX_IDLE_PER_KEY, max_uses: int = MAX_USES):
+        self.max_idle = max_idle
+        self.max_uses = max_uses
+        self._idle: Dict[SkeletonKey, List[CrewSkeleton]] = {}
+        self._version = ""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, crew_type: str, agentic_crew: AgenticCrew) -> SkeletonKey:
+        return (
+            crew_type,
+            agentic_crew.llm_model,
+            config_version(),
+            bool(agentic_crew.fact_indexes),
+            agentic_crew.verbose,
+        )
+
+    def checkout(self, crew_type: str, agentic_crew: AgenticCrew) -> CrewSkeleton:
+        key = self.key_for(crew_type, agentic_crew)
+        with self._lock:
+            if key[2] != self._version:
+                # Configuration changed on disk; skeletons built from the old text are stale
+                self._idle.clear()
+                self._version = key[2]
+            idle = self._idle.get(key)
+            if idle:
+                self.hits += 1
+                return idle.pop()
+            self.misses += 1
+        return self._build(key, agentic_crew)
+
+    def _build(self, key: SkeletonKey, agentic_crew: AgenticCrew) -> CrewSkeleton:
+        template = AgenticCrew(llm_model=agentic_crew.llm_model, verbose=agentic_crew.verbose)
+        template.custom_tools = list(agentic_crew.custom_tools)
+        return CrewSkeleton(key, template.create_crew(key[0], TOPIC_PLACEHOLDER))
+
+    def checkin(self, skeleton: CrewSkeleton) -> None:
+        if skeleton.uses >= self.max_uses:
+            return
+        skeleton.reset()
+        with self._lock:
+            if skeleton.key[2] != self._version:
+                return
+            idle = self._idle.setdefault(skeleton.key, [])
+            if len(idle) < self.max_idle:
+                idle.append(skeleton)
+
+    @contextmanager
+    def lease(self, crew_type: str, agentic_crew: AgenticCrew, topic: str) -> Iterator[Crew]:
+        """A parameterized pooled crew, returned to the pool only if the run succeeds."""
+        skeleton = self.checkout(crew_type, agentic_crew)
+        try:
+            yield skeleton.parameterize(agentic_crew, topic)
+        except BaseException:
+            logger.debug(f"Discarding {crew_type} crew skeleton after a failed run")
+            raise
+        self.checkin(skeleton)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": POOL_ENABLED,
+                "idle": sum(len(idle) for idle in self._idle.values()),
+                "keys": len(self._idle),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_pool: Optional[SkeletonPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_skeleton_pool() -> SkeletonPool:
+    """Process-wide skeleton pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SkeletonPool()
+        return _pool
+
+
+@contextmanager
+def crew_for_request(agentic_crew: AgenticCrew, crew_type: str, topic: str, build) -> Iterator[Crew]:
+    """A pooled crew for predefined crew types, or a freshly built one otherwise."""
+    if POOL_ENABLED and crew_type in CREW_LAYOUTS:
+        with get_skeleton_pool().lease(crew_type, agentic_crew, topic) as crew:
+            yield crew
+    else:
+        yield build()
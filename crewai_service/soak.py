@@ -0,0 +1,494 @@
+"""Soak and capacity-planning harness for a running CrewAI service.
+
+Drives the real ``/run``, ``/history`` and ``/health`` endpoints with the
+offline model (see offline_llm.py), so every layer except the hosted LLM is
+exercised: admission, workers or the job queue, crew construction, prompt
+budgeting, tools and the execution store. Start the service as usual, then::
+
+    python soak.py --url http://localhost:8000 --rates 0.2,0.5,1,2 --step 20m
+
+Runs arrive as a Poisson process at each rate in turn, with crew types and
+document sizes drawn from ``--crew-mix`` and ``--doc-mix``. The harness
+samples server and worker RSS, health-check latency and the service's own
+admission counters throughout. It prints a progress line every
+``--report-interval`` and finishes with a per-rate table, a capacity
+estimate and a memory leak report. ``--json-out`` keeps the raw series.
+
+Only the standard library is used, so it runs from any host that can reach
+the service.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CREW_MIX = "research=5,analysis=3,full=2"
+# Words per document; "4x3000" is four documents of 3000 words.
+DEFAULT_DOC_MIX = "0=4,2000=3,20000=2,4x3000=1"
+TOPICS = (
+    "AI adoption in regional banking", "Predictive maintenance in manufacturing", "Clinical documentation automation",
+    "Retail demand forecasting", "Claims processing in insurance", "Supply chain visibility for distributors",
+)
+_DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhd]?)$")
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: str) -> float:
+    """``"90"``, ``"90s"``, ``"15m"``, ``"2h"`` -> seconds."""
+    match = _DURATION_RE.match(value.strip().lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid duration: {value}")
+    return float(match.group(1)) * _UNITS[match.group(2)]
+
+
+def parse_weights(value: str) -> List[Tuple[str, float]]:
+    """``"research=5,full=1"`` -> ``[("research", 5.0), ("full", 1.0)]``."""
+    weights = []
+    for part in value.split(","):
+        name, _, weight = part.strip().partition("=")
+        try:
+            weights.append((name.strip(), float(weight or 1)))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight in {value!r}: {part}")
+    return weights
+
+
+def parse_doc_size(spec: str) -> Tuple[int, int]:
+    """``"2000"`` -> one document of 2000 words; ``"4x3000"`` -> four of 3000; ``"0"`` -> none."""
+    count, _, words = spec.partition("x") if "x" in spec else ("1", "", spec)
+    count, words = int(count), int(words)
+    return (0, 0) if words == 0 else (count, words)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def slope(points: List[Tuple[float, float]]) -> Optional[float]:
+    """Least-squares slope of ``(x, y)`` points."""
+    if len(points) < 3:
+        return None
+    mean_x = statistics.fmean(x for x, _ in points)
+    mean_y = statistics.fmean(y for _, y in points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def make_document(rng: random.Random, words: int, index: int) -> Dict[str, str]:
+    """Synthetic report with headings, figures and named entities."""
+    vocabulary = (
+        "revenue margin adoption pilot workflow automation customers operations platform governance "
+        "integration analytics latency backlog compliance forecast inventory claims readiness"
+    ).split()
+    entities = ("Acme Corp", "Northwind", "Globex", "Initech", "Umbrella Health", "Stark Logistics")
+    lines = []
+    written = 0
+    section = 1
+    while written < words:
+        lines.append(f"\n## Section {section}: {rng.choice(vocabulary).title()}\n")
+        for _ in range(rng.randint(4, 9)):
+            sentence = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(10, 22))).capitalize()
+            if rng.random() < 0.5:
+                sentence += (
+                    f". {rng.choice(entities)} reported {rng.randint(2, 80)}% growth"
+                    f" and ${rng.randint(1, 500)}.{rng.randint(0, 9)} million in {rng.randint(2019, 2025)}"
+                )
+            lines.append(sentence + ".")
+            written += len(sentence.split())
+        section += 1
+    return {"name": f"soak-document-{index}.md", "content": "\n".join(lines)}
+
+
+class Client:
+    """Minimal JSON HTTP client."""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body: Dict[str, Any] = None) -> Tuple[int, Dict[str, Any], float]:
+        """Returns the status code (0 on connection failure), decoded body and elapsed seconds."""
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, method=method, headers={"Content-Type": "application/json"}
+        )
+        started = time.monotonic()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, raw = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, raw = e.code, e.read()
+        except (urllib.error.URLError, OSError) as e:
+            return 0, {"error": str(e)}, time.monotonic() - started
+        elapsed = time.monotonic() - started
+        try:
+            payload = json.loads(raw) if raw else {}
+        except ValueError:
+            payload = {"error": raw[:200].decode("utf-8", "replace")}
+        return status, payload, elapsed
+
+
+class SoakTest:
+    """Open-loop load at a series of arrival rates, plus periodic health and memory sampling."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.client = Client(args.url, args.timeout)
+        self.rng = random.Random(args.seed)
+        self.crew_mix = parse_weights(args.crew_mix)
+        self.doc_mix = [(parse_doc_size(spec), weight) for spec, weight in parse_weights(args.doc_mix)]
+        self.documents: Dict[Tuple[int, int], List[Dict[str, str]]] = {}
+        self.runs: List[Dict[str, Any]] = []
+        self.samples: List[Dict[str, Any]] = []
+        self.steps: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def now(self) -> float:
+        return time.monotonic() - self.started
+
+    # Workload
+
+    def _documents_for(self, size: Tuple[int, int]) -> List[Dict[str, str]]:
+        # Generated once per size so repeated sizes exercise the service's caches like real re-runs
+        if size not in self.documents:
+            count, words = size
+            self.documents[size] = [make_document(self.rng, words, index) for index in range(count)]
+        return self.documents[size]
+
+    def next_request(self) -> Dict[str, Any]:
+        crew_type = self.rng.choices([name for name, _ in self.crew_mix], [w for _, w in self.crew_mix])[0]
+        size = self.rng.choices([size for size, _ in self.doc_mix], [w for _, w in self.doc_mix])[0]
+        return {
+            "topic": self.rng.choice(TOPICS),
+            "crew_type": crew_type,
+            "model": self.args.model,
+            "documents": self._documents_for(size),
+        }
+
+    def _run_one(self, body: Dict[str, Any], step: int) -> None:
+        record = {
+            "step": step,
+            "arrived": self.now(),
+            "crew_type": body["crew_type"],
+            "documents": len(body["documents"]),
+            "document_words": sum(len(doc["content"].split()) for doc in body["documents"]),
+        }
+        status, payload, _ = self.client.request("POST", "/run", body)
+        queue_wait = None
+        if status == 202:
+            status, payload, queue_wait = self._wait_for_job(payload.get("execution_id"))
+        elapsed = self.now() - record["arrived"]
+        execution_id = payload.get("execution_id")
+        if status == 200 and queue_wait is None and execution_id:
+            # Synchronous modes: whatever the run did not spend executing was spent waiting
+            history_status, history, _ = self.client.request(
+                "GET", f"/history/{execution_id}?fields=duration_seconds,status"
+            )
+            duration = (history.get("execution") or {}).get("duration_seconds") if history_status == 200 else None
+            if duration is not None:
+                queue_wait = max(0.0, elapsed - duration)
+        record.update({"status": status, "latency": elapsed, "queue_wait": queue_wait, "finished": self.now()})
+        with self._lock:
+            self.runs.append(record)
+            self.in_flight -= 1
+
+    def _wait_for_job(self, job_id: Optional[str]) -> Tuple[int, Dict[str, Any], Optional[float]]:
+        while job_id and not self._stop.is_set():
+            status, payload, _ = self.client.request("GET", f"/jobs/{job_id}")
+            job = payload.get("job") or {}
+            if status != 200:
+                return status, payload, None
+            if job.get("status") in ("completed", "failed"):
+                wait = job["started_at"] - job["enqueued_at"] if job.get("started_at") else None
+                return job.get("status_code") or 500, job.get("response") or {}, wait
+            time.sleep(self.args.poll_interval)
+        return 0, {"error": "stopped before the job finished"}, None
+
+    def _arrivals(self) -> None:
+        for step, rate in enumerate(self.args.rates):
+            step_end = self.now() + self.args.step
+            self.steps.append({"step": step, "rate": rate, "started": self.now(), "offered": 0, "dropped": 0})
+            print(f"[{self.now():8.0f}s] arrival rate {rate:g}/s for {self.args.step:.0f}s", flush=True)
+            while not self._stop.is_set():
+                wait = self.rng.expovariate(rate)
+                if self.now() + wait >= step_end:
+                    self._stop.wait(max(0.0, step_end - self.now()))
+                    break
+                if self._stop.wait(wait):
+                    break
+                self.steps[-1]["offered"] += 1
+                with self._lock:
+                    if self.in_flight >= self.args.max_in_flight:
+                        # The client would be the bottleneck; count the arrival as lost load
+                        self.steps[-1]["dropped"] += 1
+                        continue
+                    self.in_flight += 1
+                threading.Thread(target=self._run_one, args=(self.next_request(), step), daemon=True).start()
+            self.steps[-1]["ended"] = self.now()
+            if self._stop.is_set():
+                break
+
+    # Monitoring
+
+    def _sample(self) -> None:
+        status, health, health_latency = self.client.request("GET", "/health")
+        _, ready, _ = self.client.request("GET", "/ready")
+        history_status, _, history_latency = self.client.request("GET", "/history?limit=20&summary=true")
+        processes = {}
+        if health.get("rss_mb") is not None:
+            processes["server"] = health["rss_mb"]
+        for worker in ready.get("workers") or []:
+            # Queue workers report host and info; warm-pool workers are local processes
+            info = worker.get("info", worker)
+            if info.get("rss_mb") is None or info.get("pid") is None:
+                continue
+            if "host" not in worker and info["pid"] == health.get("pid"):
+                continue  # in-process execution: the worker is the server
+            processes[f"{worker.get('host', 'worker')}:{info['pid']}"] = info["rss_mb"]
+        with self._lock:
+            completed = len(self.runs)
+            in_flight = self.in_flight
+        self.samples.append({
+            "t": self.now(),
+            "health_status": status,
+            "health_latency": health_latency,
+            "history_status": history_status,
+            "history_latency": history_latency,
+            "rss_mb": processes,
+            "executions": health.get("executions"),
+            "completed": completed,
+            "in_flight": in_flight,
+        })
+
+    def _monitor(self) -> None:
+        next_report = self.args.report_interval
+        while not self._stop.wait(self.args.sample_interval):
+            self._sample()
+            if self.now() >= next_report:
+                self._report_window(self.now() - self.args.report_interval)
+                next_report += self.args.report_interval
+
+    def _report_window(self, since: float) -> None:
+        with self._lock:
+            window = [run for run in self.runs if run["finished"] >= since]
+            in_flight = self.in_flight
+        ok = [run for run in window if run["status"] == 200]
+        latencies = [run["latency"] for run in ok]
+        waits = [run["queue_wait"] for run in ok if run["queue_wait"] is not None]
+        rss = self.samples[-1]["rss_mb"] if self.samples else {}
+        print(
+            f"[{self.now():8.0f}s] done {len(window):4d} ok {len(ok):4d} in-flight {in_flight:3d} "
+            f"p50 {_fmt(percentile(latencies, 50))} p95 {_fmt(percentile(latencies, 95))} "
+            f"p99 {_fmt(percentile(latencies, 99))} wait p95 {_fmt(percentile(waits, 95))} "
+            f"rss {' '.join(f'{name}={mb:.0f}' for name, mb in sorted(rss.items())) or 'n/a'}",
+            flush=True,
+        )
+
+    # Results
+
+    def step_results(self) -> List[Dict[str, Any]]:
+        results = []
+        for step in self.steps:
+            runs = [run for run in self.runs if run["step"] == step["step"]]
+            ok = [run for run in runs if run["status"] == 200]
+            seconds = max(1e-9, step.get("ended", self.now()) - step["started"])
+            latencies = [run["latency"] for run in ok]
+            waits = [run["queue_wait"] for run in ok if run["queue_wait"] is not None]
+            half = step["started"] + seconds / 2
+            early = [run["queue_wait"] for run in ok if run["queue_wait"] is not None and run["arrived"] < half]
+            late = [run["queue_wait"] for run in ok if run["queue_wait"] is not None and run["arrived"] >= half]
+            errors = len(runs) - len(ok) + step["dropped"]
+            throughput = len(ok) / seconds
+            results.append({
+                "rate": step["rate"],
+                "offered": step["offered"],
+                "completed": len(ok),
+                "errors": errors,
+                "error_rate": errors / step["offered"] if step["offered"] else 0.0,
+                "statuses": {str(s): sum(1 for run in runs if run["status"] == s) for s in {run["status"] for run in runs}},
+                "throughput": throughput,
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "wait_p95": percentile(waits, 95),
+                "wait_growing": bool(early and late and percentile(late, 95) > 1.5 * percentile(early, 95) + 1.0),
+                # Little's law: runs in the system = throughput x time in the system
+                "concurrency": throughput * statistics.fmean(latencies) if latencies else 0.0,
+            })
+        return results
+
+    def capacity(self, results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Highest rate whose tail latency, error rate and queue wait all held up."""
+        sustained = [
+            result for result in results
+            if result["p95"] is not None and result["p95"] <= self.args.slo_p95
+            and result["error_rate"] <= self.args.max_error_rate and not result["wait_growing"]
+        ]
+        return max(sustained, key=lambda result: result["throughput"]) if sustained else None
+
+    def leak_report(self) -> List[Dict[str, Any]]:
+        """RSS growth per process after warm-up, as MB per hour and per 100 completed runs."""
+        warm = [sample for sample in self.samples if sample["t"] >= self.args.warmup]
+        names = sorted({name for sample in warm for name in sample["rss_mb"]})
+        report = []
+        for name in names:
+            points = [(sample["t"], sample["rss_mb"][name], sample["completed"]) for sample in warm if name in sample["rss_mb"]]
+            if len(points) < 5:
+                continue
+            per_hour = slope([(t, rss) for t, rss, _ in points])
+            per_run = slope([(completed, rss) for _, rss, completed in points])
+            per_hour = per_hour * 3600 if per_hour is not None else None
+            growth = points[-1][1] - points[0][1]
+            report.append({
+                "process": name,
+                "samples": len(points),
+                "rss_start_mb": points[0][1],
+                "rss_end_mb": points[-1][1],
+                "rss_peak_mb": max(rss for _, rss, _ in points),
+                "mb_per_hour": per_hour,
+                "mb_per_100_runs": per_run * 100 if per_run is not None else None,
+                "suspected_leak": bool(
+                    per_hour is not None and per_hour > self.args.leak_mb_per_hour
+                    and growth > 0.05 * points[0][1]
+                ),
+            })
+        return report
+
+    def run(self) -> int:
+        status, health, _ = self.client.request("GET", "/health")
+        if status != 200:
+            print(f"Service at {self.args.url} is not healthy ({status}): {health}", file=sys.stderr)
+            return 2
+        monitor = threading.Thread(target=self._monitor, name="soak-monitor", daemon=True)
+        monitor.start()
+        try:
+            self._arrivals()
+            deadline = self.now() + self.args.drain
+            while self.in_flight and self.now() < deadline:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            print("Interrupted; reporting on what has run so far", flush=True)
+        self._stop.set()
+        self._sample()
+        self.print_report()
+        return 0
+
+    def print_report(self) -> None:
+        results = self.step_results()
+        print("\nrate/s  offered  ok     err%   thru/s  p50     p95     p99     wait95  conc   queue")
+        for r in results:
+            print(
+                f"{r['rate']:<7g} {r['offered']:<8d} {r['completed']:<6d} {100 * r['error_rate']:<6.1f} "
+                f"{r['throughput']:<7.2f} {_fmt(r['p50'])} {_fmt(r['p95'])} {_fmt(r['p99'])} "
+                f"{_fmt(r['wait_p95'])} {r['concurrency']:<6.1f} {'growing' if r['wait_growing'] else 'steady'}"
+            )
+        for r in results:
+            failures = {status: n for status, n in r["statuses"].items() if status != "200"}
+            if failures:
+                print(f"  at {r['rate']:g}/s: " + ", ".join(
+                    f"{n} x {'no response' if status == '0' else 'HTTP ' + status}" for status, n in sorted(failures.items())
+                ))
+
+        capacity = self.capacity(results)
+        print("\nCapacity estimate")
+        if capacity is None:
+            print(f"  No rate met p95 <= {self.args.slo_p95:g}s with <= {100 * self.args.max_error_rate:g}% errors.")
+        else:
+            workshops = capacity["throughput"] * 60 / self.args.workshop_runs_per_minute
+            print(
+                f"  Sustained {capacity['throughput']:.2f} runs/s (offered {capacity['rate']:g}/s) with p95 "
+                f"{capacity['p95']:.1f}s, about {capacity['concurrency']:.1f} runs in flight.\n"
+                f"  At {self.args.workshop_runs_per_minute:g} run(s) per workshop per minute that is "
+                f"~{workshops:.0f} concurrent workshops."
+            )
+            if capacity is results[-1]:
+                print("  The highest rate tested still held up; rerun with higher --rates to find the limit.")
+
+        health_latencies = [sample["health_latency"] for sample in self.samples if sample["health_status"] == 200]
+        history_latencies = [sample["history_latency"] for sample in self.samples if sample["history_status"] == 200]
+        print(
+            f"\n/health p99 {_fmt(percentile(health_latencies, 99))}  "
+            f"/history p99 {_fmt(percentile(history_latencies, 99))}"
+        )
+
+        print("\nMemory (after warm-up)")
+        leaks = self.leak_report()
+        if not leaks:
+            print("  Not enough RSS samples; the service reports RSS on /health and /ready.")
+        for leak in leaks:
+            print(
+                f"  {leak['process']:<24} {leak['rss_start_mb']:.0f} -> {leak['rss_end_mb']:.0f} MB "
+                f"(peak {leak['rss_peak_mb']:.0f}), {_fmt_rate(leak['mb_per_hour'])} MB/h, "
+                f"{_fmt_rate(leak['mb_per_100_runs'])} MB/100 runs"
+                f"{'  <- suspected leak' if leak['suspected_leak'] else ''}"
+            )
+
+        if self.args.json_out:
+            with open(self.args.json_out, "w") as f:
+                json.dump({
+                    "args": vars(self.args),
+                    "steps": results,
+                    "capacity": capacity,
+                    "leaks": leaks,
+                    "runs": self.runs,
+                    "samples": self.samples,
+                }, f, indent=2, default=str)
+            print(f"\nRaw results written to {self.args.json_out}")
+
+
+def _fmt(seconds: Optional[float]) -> str:
+    return f"{seconds:<7.2f}" if seconds is not None else "-      "
+
+
+def _fmt_rate(value: Optional[float]) -> str:
+    return f"{value:+.1f}" if value is not None else "n/a"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Soak and capacity test for the CrewAI service.")
+    parser.add_argument("--url", default="http://localhost:8000", help="service base URL")
+    parser.add_argument("--model", default="offline", help="model sent with every run")
+    parser.add_argument("--rates", default="0.5", help="comma-separated arrival rates (runs/s), run in order")
+    parser.add_argument("--step", type=parse_duration, default=parse_duration("10m"), help="time at each rate")
+    parser.add_argument("--crew-mix", default=DEFAULT_CREW_MIX, help="crew type weights")
+    parser.add_argument("--doc-mix", default=DEFAULT_DOC_MIX, help="document size weights (words, or NxWORDS)")
+    parser.add_argument("--max-in-flight", type=int, default=200, help="client-side cap on concurrent runs")
+    parser.add_argument("--timeout", type=float, default=900, help="per-request timeout in seconds")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="job polling interval in queue mode")
+    parser.add_argument("--sample-interval", type=parse_duration, default=parse_duration("10s"))
+    parser.add_argument("--report-interval", type=parse_duration, default=parse_duration("1m"))
+    parser.add_argument("--warmup", type=parse_duration, default=parse_duration("2m"), help="ignored by the leak report")
+    parser.add_argument("--drain", type=parse_duration, default=parse_duration("5m"), help="wait for in-flight runs")
+    parser.add_argument("--slo-p95", type=float, default=120.0, help="p95 latency target in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--workshop-runs-per-minute", type=float, default=1.0, help="load one workshop generates")
+    parser.add_argument("--leak-mb-per-hour", type=float, default=20.0, help="RSS growth flagged as a leak")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json-out", help="write raw runs, samples and results to this file")
+    args = parser.parse_args()
+    args.rates = [float(rate) for rate in args.rates.split(",") if rate.strip()]
+    if not args.rates or min(args.rates) <= 0:
+        parser.error("--rates must be positive numbers")
+    sys.exit(SoakTest(args).run())
+
+
+if __name__ == '__main__':
+    main()
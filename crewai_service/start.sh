@@ -1,4 +1,6 @@
 #!/bin/bash
 cd /home/runner/workspace/crewai_service
 export CREWAI_PORT=5001
+# Set CREWAI_SERVER=asgi (and CREWAI_WORKERS) for the production ASGI mode
+# Set CREWAI_EXECUTION_MODE=queue and run worker.py nodes to scale execution out
 exec python api.py
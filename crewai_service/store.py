@@ -0,0 +1,382 @@
+"""SQLite-backed persistent store shared by every API worker process."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+DEFAULT_DB_PATH = Path(__file__).parent / "data" / "crewai.db"
+
+# Executions, their logs, uploaded documents and cached research older than this are pruned (0 keeps all).
+RETENTION_DAYS = float(os.environ.get("CREWAI_RETENTION_DAYS", 30))
+
+# Tables pruned by age, with the column holding each row's Unix time.
+PRUNED_TABLES = (
+    ("executions", "created_at"),
+    ("execution_logs", "ts"),
+    ("documents", "created_at"),
+    ("research_cache", "created_at"),
+)
+
+# Execution fields stored as their own columns; exports of only these skip decoding records.
+EXECUTION_COLUMNS = (
+    "id", "topic", "crew_type", "model", "status", "started_at", "completed_at", "duration_seconds", "created_at",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS executions (
+    id TEXT PRIMARY KEY,
+    topic TEXT,
+    crew_type TEXT,
+    model TEXT,
+    status TEXT NOT NULL,
+    started_at TEXT,
+    completed_at TEXT,
+    duration_seconds REAL,
+    created_at REAL NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_executions_created ON executions (created_at);
+
+CREATE TABLE IF NOT EXISTS execution_logs (
+    execution_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    level TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_execution_logs_id ON execution_logs (execution_id, ts);
+
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    media_type TEXT,
+    size_bytes INTEGER,
+    chars INTEGER,
+    created_at REAL NOT NULL,
+    metadata TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS research_cache (
+    key TEXT PRIMARY KEY,
+    topic TEXT,
+    model TEXT,
+    execution_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    result TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS admission_slots (
+    execution_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    acquired_at REAL NOT NULL
+);
+"""
+
+
+class ExecutionStore:
+    """Execution records and shared coordination state in a single SQLite file.
+
+    Connections are per thread; WAL mode lets readers in other processes
+    proceed while a writer holds the lock.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(path or os.environ.get("CREWAI_DB_PATH") or DEFAULT_DB_PATH)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def is_local(self) -> bool:
+        """Whether the store file is on a local filesystem, so other local processes can share it."""
+        if self.path == ":memory:":
+            return True
+        return filesystem_type(os.path.dirname(os.path.abspath(self.path))) not in NETWORK_FILESYSTEMS
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def save_execution(self, record: Dict[str, Any]) -> None:
+        """Insert or replace an execution record."""
+        self.connect().execute(
+            """
+            INSERT OR REPLACE INTO executions
+                (id, topic, crew_type, model, status, started_at, completed_at,
+                 duration_seconds, created_at, record)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE((SELECT created_at FROM executions WHERE id = ?), ?), ?)
+            """,
+            (
+                record["id"], record.get("topic"), record.get("crew_type"), record.get("model"),
+                record.get("status", "completed"), record.get("started_at"), record.get("completed_at"),
+                record.get("duration_seconds"), record["id"], time.time(),
+                json.dumps(record, default=str),
+            ),
+        )
+
+    def get_execution(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        row = self.connect().execute(
+            "SELECT record FROM executions WHERE id = ?", (execution_id,)
+        ).fetchone()
+        return json.loads(row["record"]) if row else None
+
+    def list_executions(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most recent executions first."""
+        rows = self.connect().execute(
+            "SELECT record FROM executions ORDER BY created_at DESC, rowid DESC LIMIT ?",
+            (max(0, limit),),
+        ).fetchall()
+        return [json.loads(row["record"]) for row in rows]
+
+    def iter_executions(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        filters: Optional[Dict[str, Sequence[str]]] = None,
+        columns_only: bool = False,
+        batch_size: int = 500
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Executions in creation order, fetched ``batch_size`` rows per query.
+
+        Each batch is a separate keyset query, so no cursor or transaction is
+        held between batches and callers may consume it from any thread.
+
+        Args:
+            since: Only executions created at or after this Unix time.
+            until: Only executions created before this Unix time.
+            filters: Column name to allowed values, e.g. ``{"model": ["gpt-4o"]}``.
+            columns_only: Yield only ``EXECUTION_COLUMNS`` instead of full records.
+        """
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        for column, values in (filters or {}).items():
+            if column not in EXECUTION_COLUMNS:
+                raise ValueError(f"Cannot filter on {column}")
+            clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+            params.extend(values)
+        selected = ", ".join(EXECUTION_COLUMNS) if columns_only else "created_at, record"
+
+        last = (float("-inf"), -1)
+        while True:
+            where = " AND ".join(clauses + ["(created_at, rowid) > (?, ?)"])
+            rows = self.connect().execute(
+                f"SELECT rowid, {selected} FROM executions WHERE {where} ORDER BY created_at, rowid LIMIT ?",
+                (*params, *last, batch_size),
+            ).fetchall()
+            for row in rows:
+                if columns_only:
+                    yield {column: row[column] for column in EXECUTION_COLUMNS}
+                else:
+                    yield json.loads(row["record"])
+            if len(rows) < batch_size:
+                return
+            last = (rows[-1]["created_at"], rows[-1]["rowid"])
+
+    def append_logs(self, entries: List[tuple]) -> None:
+        """Persist ``(execution_id, entry)`` log pairs in one transaction."""
+        conn = self.connect()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO execution_logs (execution_id, ts, level, entry) VALUES (?, ?, ?, ?)",
+            [(execution_id, entry["ts"], entry["level"], json.dumps(entry, default=str))
+             for execution_id, entry in entries],
+        )
+        conn.execute("COMMIT")
+
+    def get_logs(self, execution_id: str, limit: int = 1000) -> List[Dict[str, Any]]:
+        """The latest ``limit`` log entries for an execution, oldest first."""
+        rows = self.connect().execute(
+            "SELECT entry FROM execution_logs WHERE execution_id = ? ORDER BY ts DESC, rowid DESC LIMIT ?",
+            (execution_id, max(0, limit)),
+        ).fetchall()
+        return [json.loads(row["entry"]) for row in reversed(rows)]
+
+    def save_document(self, document: Dict[str, Any], text: str) -> None:
+        """Cache extracted text under the document's content hash."""
+        self.connect().execute(
+            """
+            INSERT OR REPLACE INTO documents (id, name, media_type, size_bytes, chars, created_at, metadata, text)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                document["id"], document.get("name"), document.get("media_type"), document.get("size_bytes"),
+                document.get("chars"), time.time(), json.dumps(document, default=str), text,
+            ),
+        )
+
+    def get_document(self, document_id: str, include_text: bool = True) -> Optional[Dict[str, Any]]:
+        columns = "metadata, text" if include_text else "metadata"
+        row = self.connect().execute(
+            f"SELECT {columns} FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        document = json.loads(row["metadata"])
+        if include_text:
+            document["content"] = row["text"]
+        return document
+
+    def missing_documents(self, document_ids: List[str]) -> List[str]:
+        """The ids in ``document_ids`` that have no cached text."""
+        if not document_ids:
+            return []
+        placeholders = ",".join("?" * len(document_ids))
+        rows = self.connect().execute(
+            f"SELECT id FROM documents WHERE id IN ({placeholders})", list(document_ids)
+        ).fetchall()
+        found = {row["id"] for row in rows}
+        return [document_id for document_id in document_ids if document_id not in found]
+
+    def save_research(self, key: str, topic: str, model: str, execution_id: str, result: str) -> None:
+        """Cache a research result for fan-out runs with the same topic, documents and model."""
+        self.connect().execute(
+            """
+            INSERT OR REPLACE INTO research_cache (key, topic, model, execution_id, created_at, result)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (key, topic, model, execution_id, time.time(), result),
+        )
+
+    def get_research(self, key: str, max_age: float) -> Optional[Dict[str, Any]]:
+        """A cached research result no older than ``max_age`` seconds."""
+        row = self.connect().execute(
+            "SELECT execution_id, created_at, result FROM research_cache WHERE key = ? AND created_at >= ?",
+            (key, time.time() - max_age),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def try_acquire_slot(self, execution_id: str, limit: int, stale_after: float, slots: int = 1) -> bool:
+        """Take ``slots`` of ``limit`` shared execution slots, expiring abandoned ones first.
+
+        Extra slots are stored as ``<execution_id>#<n>`` and released together.
+        """
+        conn = self.connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM admission_slots WHERE acquired_at < ?", (now - stale_after,))
+            (in_use,) = conn.execute("SELECT COUNT(*) FROM admission_slots").fetchone()
+            if in_use + slots > limit:
+                # Only worth checking for crashed holders when the request would otherwise wait
+                in_use -= self._release_dead_slots(conn)
+            if in_use + slots > limit:
+                conn.execute("COMMIT")
+                return False
+            conn.executemany(
+                "INSERT OR REPLACE INTO admission_slots (execution_id, pid, acquired_at) VALUES (?, ?, ?)",
+                [(execution_id if n == 0 else f"{execution_id}#{n}", os.getpid(), now) for n in range(slots)],
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release_slot(self, execution_id: str) -> None:
+        self.connect().execute(
+            "DELETE FROM admission_slots WHERE execution_id = ? OR execution_id LIKE ?",
+            (execution_id, f"{execution_id}#%"),
+        )
+
+    def _release_dead_slots(self, conn: sqlite3.Connection) -> int:
+        """Delete slots held by processes that no longer exist; the store is local to one host."""
+        pids = [row["pid"] for row in conn.execute("SELECT DISTINCT pid FROM admission_slots")]
+        dead = [pid for pid in pids if not _pid_alive(pid)]
+        if not dead:
+            return 0
+        placeholders = ",".join("?" * len(dead))
+        return conn.execute(f"DELETE FROM admission_slots WHERE pid IN ({placeholders})", dead).rowcount
+
+    def release_dead_slots(self) -> int:
+        """Free slots left behind by crashed processes, returning how many were freed."""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            released = self._release_dead_slots(conn)
+            conn.execute("COMMIT")
+            return released
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release_process_slots(self, pid: int) -> None:
+        """Free slots held by a process that is shutting down."""
+        self.connect().execute("DELETE FROM admission_slots WHERE pid = ?", (pid,))
+
+    def slots_in_use(self) -> int:
+        (count,) = self.connect().execute("SELECT COUNT(*) FROM admission_slots").fetchone()
+        return count
+
+    def prune(self, max_age: float) -> Dict[str, int]:
+        """Delete rows older than ``max_age`` seconds from ``PRUNED_TABLES``; returns rows deleted per table."""
+        cutoff = time.time() - max_age
+        conn = self.connect()
+        return {
+            table: conn.execute(f"DELETE FROM {table} WHERE {column} < ?", (cutoff,)).rowcount
+            for table, column in PRUNED_TABLES
+        }
+
+
+# Filesystems whose locking and shared memory SQLite in WAL mode cannot rely on.
+NETWORK_FILESYSTEMS = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "glusterfs", "fuse.glusterfs",
+    "fuse.sshfs", "lustre", "gpfs", "davfs", "fuse.s3fs",
+}
+
+
+def filesystem_type(path: str, mounts: str = "/proc/mounts") -> Optional[str]:
+    """Type of the filesystem mounted at ``path``, or None where mounts cannot be read."""
+    try:
+        with open(mounts) as handle:
+            entries = [line.split()[1:3] for line in handle if len(line.split()) >= 3]
+    except OSError:
+        return None
+    target = os.path.realpath(path)
+    best = None
+    for mount_point, fstype in entries:
+        mount_point = mount_point.replace("\\040", " ")
+        if target == mount_point or target.startswith(mount_point.rstrip("/") + "/"):
+            if best is None or len(mount_point) > len(best[0]):
+                best = (mount_point, fstype)
+    return best[1] if best else None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+_store: Optional[ExecutionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ExecutionStore:
+    """Process-wide store instance, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ExecutionStore()
+        return _store
@@ -0,0 +1,24 @@
+"""Shared pytest setup: service modules are imported as top-level modules, as in api.py."""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
+
+# Keep modules that open the default store away from the real database
+os.environ.setdefault("CREWAI_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="crewai-tests-"), "executions.db"))
+os.environ.setdefault("CREWAI_LOG_FORMAT", "text")
+
+
+@pytest.fixture
+def fast_offline(monkeypatch):
+    """The offline model with no simulated latency; skips the test when crewai is missing."""
+    offline_llm = pytest.importorskip("offline_llm")
+    monkeypatch.setattr(offline_llm, "LATENCY_SECONDS", 0)
+    monkeypatch.setattr(offline_llm, "TOKENS_PER_SECOND", 1e9)
+    return offline_llm
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")
+
+from starlette.testclient import TestClient  # noqa: E402
+
+import asgi  # noqa: E402
+from store import get_store  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    # No lifespan: the tests never start execution workers
+    return TestClient(asgi.app)
+
+
+def test_store_backed_endpoints_run_off_the_event_loop():
+    for route in asgi.app.routes:
+        if route.path != "/run" and route.path != "/documents":
+            assert not asyncio.iscoroutinefunction(route.endpoint), route.path
+
+
+def test_health_reports_admission_without_the_store(client, monkeypatch):
+    admission = asgi.service.get_admission()
+    assert admission.try_acquire("health_probe", slots=2)
+    try:
+        def locked(*args, **kwargs):
+            raise AssertionError("/health must not query the store")
+
+        monkeypatch.setattr(type(get_store()), "connect", locked)
+        response = client.get("/health")
+    finally:
+        monkeypatch.undo()
+        admission.release("health_probe")
+    assert response.status_code == 200
+    assert response.json()["executions"] == {"limit": admission.limit, "in_use_here": 2, "runs_here": 1}
+
+
+def test_ready_reports_store_wide_slots(client):
+    response = client.get("/ready")
+    assert response.json()["executions"]["in_use"] == get_store().slots_in_use()
+
+
+def test_run_validation_errors(client):
+    assert client.post("/run", content=b"not json").status_code == 400
+    response = client.post("/run", json={"topic": "t", "document_ids": ["nope"]})
+    assert response.status_code == 400
+    assert "nope" in response.json()["error"]
+
+
+def test_history_is_compressed_and_supports_etags(client):
+    store = get_store()
+    for n in range(5):
+        store.save_execution({"id": f"asgi_{n}", "topic": "t", "result": "x" * 2000})
+
+    response = client.get("/history?limit=5", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["executions"]) == 5
+
+    etag = response.headers["etag"]
+    assert client.get("/history?limit=5", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/history/asgi_0").json()["execution"]["id"] == "asgi_0"
+    assert client.get("/history/missing").status_code == 404
@@ -0,0 +1,96 @@
+import pytest
+
+import budget
+from budget import PromptBudget, context_window, count_tokens, estimate_cost, trim_to_tokens
+
+
+@pytest.fixture(autouse=True)
+def approximate_tokens(monkeypatch):
+    # Counts are deterministic whether or not tiktoken is installed
+    monkeypatch.setattr(budget, "_encoding_for", lambda model: None)
+
+
+def paragraphs(count: int, words: int = 50) -> str:
+    return "\n\n".join(" ".join(f"word{n}" for n in range(words)) for _ in range(count))
+
+
+def test_count_tokens_approximation():
+    assert count_tokens("") == 0
+    assert count_tokens("a bb cccc ddddd") == 5
+    assert count_tokens("hello, world!") == 6
+
+
+def test_context_window_and_cost_use_longest_prefix():
+    assert context_window("openai/gpt-4o-mini") == 128000
+    assert context_window("gpt-4") == 8192
+    assert context_window("unknown-model") == budget.DEFAULT_CONTEXT_WINDOW
+    assert estimate_cost("gpt-4o-mini", 1_000_000, 1_000_000) == 0.75
+    assert estimate_cost("unknown-model", 10, 10) is None
+
+
+def test_trim_to_tokens_cuts_at_a_boundary_and_notes_the_cut():
+    text = paragraphs(60, words=10)
+    trimmed, tokens = trim_to_tokens(text, 300, "gpt-4o-mini")
+    assert tokens <= 300
+    assert tokens == count_tokens(trimmed)
+    assert "omitted to fit the prompt budget" in trimmed
+    assert trimmed.split("\n\n[...")[0].endswith("word9")
+    assert trim_to_tokens(text, 0, "gpt-4o-mini") == ("", 0)
+    assert trim_to_tokens("short", 10, "gpt-4o-mini") == ("short", 2)
+
+
+def test_default_per_document_cap_matches_old_character_limit():
+    # The service used to send up to 30,000 characters of each document, about 7.5k tokens
+    assert 7000 <= budget.DOCUMENT_TOKENS_PER_DOCUMENT <= 9000
+
+
+def test_multi_document_budget_scales_with_documents_and_the_window():
+    documents = [{"name": f"doc-{n}", "content": paragraphs(200)} for n in range(6)]
+
+    capped = PromptBudget("gpt-4o-mini", tokens_per_document=8000)
+    capped.fit_documents(documents, ["Do the task."], upstream_tasks=1, task_name="t")
+    report = capped.reports[-1]
+    assert report["document_budget_tokens"] == 6 * 8000
+    assert all(entry["tokens"] > 7000 for entry in report["documents"])
+
+    # Without a cap documents take what the window leaves
+    uncapped = PromptBudget("gpt-4o-mini", tokens_per_document=0)
+    uncapped.fit_documents(documents, ["Do the task."], upstream_tasks=1, task_name="t")
+    report = uncapped.reports[-1]
+    assert report["document_budget_tokens"] > 6 * 8000
+    assert report["prompt_tokens_estimate"] + report["output_reserved_tokens"] <= 128000
+
+    # A small window still bounds the total however many documents there are
+    small = PromptBudget("gpt-4", tokens_per_document=8000)
+    small.fit_documents(documents, ["Do the task."], task_name="t")
+    assert small.reports[-1]["prompt_tokens_estimate"] + small.reports[-1]["output_reserved_tokens"] <= 8192
+
+
+def test_water_filling_keeps_small_documents_whole():
+    prompt_budget = PromptBudget("gpt-4o-mini", tokens_per_document=1000)
+    documents = [
+        {"name": "small", "content": paragraphs(1)},
+        {"name": "large-a", "content": paragraphs(40)},
+        {"name": "large-b", "content": paragraphs(60)},
+    ]
+    rendered = prompt_budget.fit_documents(documents, instructions=["Do the task."], task_name="t")
+    report = prompt_budget.reports[-1]
+    by_name = {entry["name"]: entry for entry in report["documents"]}
+
+    assert not by_name["small"]["trimmed"]
+    assert by_name["large-a"]["trimmed"] and by_name["large-b"]["trimmed"]
+    assert abs(by_name["large-a"]["tokens"] - by_name["large-b"]["tokens"]) <= 30
+    assert report["document_tokens"] <= report["document_budget_tokens"] == 3000
+    assert rendered.count("=== Document:") == 3
+
+
+def test_upstream_reserve_shrinks_in_a_tight_window_and_is_reported_per_task():
+    prompt_budget = PromptBudget("gpt-4", upstream_per_task=2000, tokens_per_document=10000)
+    prompt_budget.fit_documents(
+        [{"name": "doc", "content": paragraphs(200)}], ["x"], upstream_tasks=3, task_name="writing_task"
+    )
+    report = prompt_budget.reports[-1]
+    assert report["upstream_reserved_tokens"] < 3 * 2000
+    assert report["prompt_tokens_estimate"] + report["output_reserved_tokens"] <= 8192
+    assert prompt_budget.upstream_allowance("writing_task") == report["upstream_reserved_tokens"] // 3
+    assert prompt_budget.upstream_allowance("unbudgeted_task") == prompt_budget.upstream_per_task
@@ -0,0 +1,110 @@
+import pytest
+
+import budget
+from budget import count_tokens
+from compaction import OutputCompactor, compact_output, extract_structure
+
+MODEL = "gpt-4o-mini"
+
+REPORT = "\n".join([
+    "# Market findings",
+    "",
+    "The market is consolidating around a handful of platform vendors that bundle tooling.",
+    "Buyers describe long evaluation cycles and cautious procurement teams in every region.",
+    "",
+    "## Figures",
+    "- Revenue grew 12% to $4M in 2024.",
+    "- Churn fell to 3% after the pricing change.",
+    "- Partners asked for better onboarding material.",
+    "",
+    "| Region | Share |",
+    "|--------|-------|",
+    "| EMEA | 41% |",
+    "",
+    "```",
+    "select * from deals where amount > 1000000",
+    "```",
+    "Analysts expect consolidation to continue as smaller vendors run out of funding and customers demand integrated suites.",
+] + ["Further commentary on vendor strategy and customer sentiment continues here at some length."] * 4)
+
+
+@pytest.fixture(autouse=True)
+def approximate_tokens(monkeypatch):
+    monkeypatch.setattr(budget, "_encoding_for", lambda model: None)
+
+
+def test_under_budget_is_unchanged():
+    text, report = compact_output("Short answer.", 100, MODEL)
+    assert text == "Short answer."
+    assert report["method"] == "none" and report["original_tokens"] == report["compacted_tokens"]
+
+
+def test_structured_extraction_keeps_priority_segments_in_order():
+    text, report = compact_output(REPORT, 80, MODEL)
+
+    assert report["method"] == "structured"
+    assert report["compacted_tokens"] <= 80 < report["original_tokens"]
+    # Headings, figures and list items outrank lead sentences; code blocks are never kept
+    assert text.splitlines() == [
+        "# Market findings",
+        "## Figures",
+        "- Revenue grew 12% to $4M in 2024.",
+        "- Churn fell to 3% after the pricing change.",
+        "- Partners asked for better onboarding material.",
+        "| Region | Share |",
+        "| EMEA | 41% |",
+    ]
+
+    text, _ = compact_output(REPORT, 120, MODEL)
+    assert text.splitlines()[1].startswith("The market is consolidating")
+    assert "select" not in text and "Further commentary" not in text
+
+
+def test_extract_structure_reports_structured_share():
+    _, share = extract_structure(REPORT, 10_000, MODEL)
+    assert 0 < share < 1
+    _, share = extract_structure("plain words without structure or numbers. more words here.", 10_000, MODEL)
+    assert share == 0
+
+
+def test_prose_falls_back_to_summary():
+    prose = " ".join(f"Point {name} is about the market and its buyers." for name in ("alpha", "beta", "gamma", "delta") * 10)
+    text, report = compact_output(prose, count_tokens(prose, MODEL) // 3, MODEL)
+    assert report["method"] == "summary"
+    assert text.startswith("Point alpha is about the market and its buyers")
+    assert report["compacted_tokens"] <= count_tokens(prose, MODEL) // 3
+
+
+def test_oversized_segments_are_trimmed():
+    text, report = compact_output("x" * 4000, 50, MODEL)
+    assert report["method"] == "trimmed"
+    assert count_tokens(text, MODEL) <= 50
+
+
+def test_compactor_records_one_edge_per_consumer():
+    compactor = OutputCompactor(MODEL, budget=80)
+    compacted = compactor.compact("research_task", ["writing_task", "analysis_task"], REPORT)
+
+    assert count_tokens(compacted, MODEL) <= 80
+    assert [(edge["from"], edge["to"]) for edge in compactor.edges] == [
+        ("research_task", "writing_task"), ("research_task", "analysis_task"),
+    ]
+    summary = compactor.summary()
+    assert summary["budget_tokens"] == 80
+    assert summary["saved_tokens"] == 2 * compactor.edges[0]["saved_tokens"] > 0
+
+
+def test_compactor_limit_applies_even_when_disabled():
+    compactor = OutputCompactor(MODEL, budget=0)
+    assert not compactor.enabled
+    assert compactor.compact("research_task", ["writing_task"], REPORT) == REPORT
+    assert compactor.edges == []
+
+    compacted = compactor.compact("research_task", ["writing_task"], REPORT, limit=40)
+    assert count_tokens(compacted, MODEL) <= 40
+    assert compactor.edges[0]["compacted_tokens"] <= 40
+
+    # The tighter of the budget and the consumer's reserve wins
+    compactor = OutputCompactor(MODEL, budget=60)
+    compactor.compact("research_task", ["writing_task"], REPORT, limit=500)
+    assert compactor.edges[0]["compacted_tokens"] <= 60
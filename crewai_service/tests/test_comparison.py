@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("crewai")
+
+import budget  # noqa: E402
+import runner  # noqa: E402
+import service  # noqa: E402
+from store import get_store  # noqa: E402
+
+
+def comparison_request(models):
+    run_request, error = service.parse_run_request({"topic": "Cold chain logistics", "models": models})
+    assert error is None
+    return run_request
+
+
+def test_models_run_concurrently_and_are_compared(fast_offline):
+    run_request = comparison_request(["offline", "offline/gpt-4o"])
+    body, status = runner.run_crew_request(run_request)
+
+    assert status == 200 and body["success"]
+    reports = body["comparison"]["models"]
+    assert [report["model"] for report in reports] == ["offline", "offline/gpt-4o"]
+    assert [report["execution_id"] for report in reports] == [
+        f"{run_request['execution_id']}_m0", f"{run_request['execution_id']}_m1",
+    ]
+    for report in reports:
+        assert report["status"] == "completed"
+        usage = report["token_usage"]
+        # Provider prefixes are ignored when pricing, so offline/gpt-4o is priced as gpt-4o
+        prices = budget.MODEL_PRICES["gpt-4o"] if report["model"] == "offline/gpt-4o" else (0.0, 0.0)
+        expected = (usage["prompt_tokens"] * prices[0] + usage["completion_tokens"] * prices[1]) / 1_000_000
+        assert report["estimated_cost_usd"] == round(expected, 6)
+        # Each model's run is saved on its own and points back at the comparison
+        assert get_store().get_execution(report["execution_id"])["comparison_id"] == run_request["execution_id"]
+    assert body["comparison"]["cheapest"] == "offline"
+    assert body["comparison"]["fastest"] in ("offline", "offline/gpt-4o")
+    assert get_store().get_execution(run_request["execution_id"])["status"] == "completed"
+
+
+def test_one_failing_model_gives_a_partial_comparison(fast_offline, monkeypatch):
+    execute_crew = runner.execute_crew
+
+    def flaky(run_request, execution_id, model, *args):
+        if model == "offline/broken":
+            raise RuntimeError("provider unavailable")
+        return execute_crew(run_request, execution_id, model, *args)
+
+    monkeypatch.setattr(runner, "execute_crew", flaky)
+    run_request = comparison_request(["offline", "offline/broken"])
+    body, status = runner.run_crew_request(run_request)
+
+    assert status == 200 and body["success"]
+    working, broken = body["comparison"]["models"]
+    assert working["status"] == "completed"
+    assert broken == {
+        "model": "offline/broken", "execution_id": f"{run_request['execution_id']}_m1",
+        "status": "failed", "error": "provider unavailable",
+    }
+    assert body["comparison"]["fastest"] == body["comparison"]["cheapest"] == "offline"
+    assert get_store().get_execution(run_request["execution_id"])["status"] == "partial"
+
+
+def test_all_models_failing_is_an_error(fast_offline, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("provider unavailable")
+
+    monkeypatch.setattr(runner, "execute_crew", broken)
+    body, status = runner.run_crew_request(comparison_request(["offline", "offline/other"]))
+    assert status == 500 and not body["success"]
+    assert body["comparison"]["fastest"] is None and body["comparison"]["cheapest"] is None
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("crewai")
+
+from budget import count_tokens  # noqa: E402
+from crew import AgenticCrew  # noqa: E402
+
+
+def test_compaction_shrinks_context_but_not_recorded_outputs(fast_offline):
+    agentic_crew = AgenticCrew(llm_model="offline")
+    agentic_crew.compactor.budget = 60
+    crew = agentic_crew.create_crew("research", "Harbour logistics")
+    research, writing = crew.tasks
+    seen_by_writer = []
+    # Runs after the writing task, so it sees the research output as the writer's context did
+    writing.callback = lambda output: seen_by_writer.append(research.output.raw)
+
+    agentic_crew.run(crew)
+
+    [edge] = agentic_crew.compactor.edges
+    assert (edge["from"], edge["to"]) == ("research_task", "writing_task")
+    assert edge["compacted_tokens"] <= 60 < edge["original_tokens"]
+    assert count_tokens(seen_by_writer[0], "offline") == edge["compacted_tokens"]
+    # The research task keeps what its agent wrote
+    assert count_tokens(research.output.raw, "offline") == edge["original_tokens"]
+    assert agentic_crew.task_timings[0]["output_chars"] == len(research.output.raw)
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+
+import pytest
+
+import export
+from export import ExportError, export_history, parse_time
+from store import ExecutionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ExecutionStore(tmp_path / "export.db")
+    for n in range(5):
+        store.save_execution({
+            "id": f"run-{n}",
+            "topic": f"Topic, \"{n}\"\nwith a newline",
+            "crew_type": "research" if n % 2 else "analysis",
+            "model": "gpt-4o-mini",
+            "status": "completed",
+            "duration_seconds": 1.5 * n,
+            "token_usage": {"prompt_tokens": 100 * n, "completion_tokens": 10 * n, "total_tokens": 110 * n},
+            "result": {"sections": [n]},
+        })
+    return store
+
+
+def body(store, **params):
+    chunks, media_type, filename = export_history(store, params)
+    return b"".join(chunks), media_type, filename
+
+
+def test_jsonl_round_trip_with_nested_fields(store, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    data, media_type, filename = body(store, fields="id,token_usage.total_tokens,result")
+    rows = [json.loads(line) for line in data.decode().splitlines()]
+
+    assert media_type == "application/x-ndjson" and filename.endswith(".jsonl")
+    assert [row["id"] for row in rows] == [f"run-{n}" for n in range(5)]
+    assert rows[3] == {"id": "run-3", "token_usage.total_tokens": 330, "result": {"sections": [3]}}
+
+
+def test_csv_round_trip_quotes_text_and_flattens_nested_values(store):
+    data, media_type, _ = body(store, format="csv", fields="id,topic,result", crew_type="research")
+    rows = list(csv.DictReader(io.StringIO(data.decode())))
+
+    assert media_type == "text/csv"
+    assert [row["id"] for row in rows] == ["run-1", "run-3"]
+    assert rows[0]["topic"] == "Topic, \"1\"\nwith a newline"
+    assert json.loads(rows[1]["result"]) == {"sections": [3]}
+
+
+def test_default_fields_and_time_filters(store):
+    data, _, _ = body(store, since="2000-01-01", until=str(2 ** 40))
+    rows = [json.loads(line) for line in data.decode().splitlines()]
+    assert len(rows) == 5 and list(rows[0]) == export.DEFAULT_FIELDS
+
+    data, _, _ = body(store, until="2000-01-01T00:00:00Z")
+    assert data == b""
+
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+def test_columnar_round_trip(store, monkeypatch, export_format):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    data, _, _ = body(store, format=export_format, fields="id,duration_seconds,token_usage.prompt_tokens,result")
+    if export_format == "parquet":
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(data))
+    else:
+        table = pyarrow.ipc.open_stream(data).read_all()
+
+    assert table.schema.field("duration_seconds").type == pyarrow.float64()
+    assert table.schema.field("token_usage.prompt_tokens").type == pyarrow.int64()
+    assert table.column("id").to_pylist() == [f"run-{n}" for n in range(5)]
+    assert table.column("token_usage.prompt_tokens").to_pylist() == [0, 100, 200, 300, 400]
+    assert json.loads(table.column("result").to_pylist()[4]) == {"sections": [4]}
+
+
+def test_invalid_parameters():
+    with pytest.raises(ExportError, match="Unsupported export format"):
+        export_history(None, {"format": "xml"})
+    with pytest.raises(ExportError, match="Invalid time"):
+        parse_time("last tuesday")
+    assert parse_time("1970-01-02") == 86400.0
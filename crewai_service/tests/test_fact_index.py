@@ -0,0 +1,79 @@
+import pytest
+
+from tools import fact_index
+from tools.fact_index import (
+    FactIndex, activate_fact_indexes, active_fact_index_keys, active_fact_indexes, get_fact_index,
+)
+
+REPORT = """# Acme Corp Annual Review
+
+## Financials
+Annual revenue reached $4.2 million in FY2024, up 18% on the prior year.
+The company employs 250 employees across 12 locations.
+
+## Outlook
+Acme Corp plans to open new sites by March 2026.
+"""
+
+
+@pytest.fixture
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(fact_index, "_cache", fact_index.OrderedDict())
+    monkeypatch.setattr(fact_index, "_cache_bytes", 0)
+
+
+def test_extracts_facts_headings_and_entities():
+    index = FactIndex("review.md", REPORT)
+    by_kind = {}
+    for fact in index.facts:
+        by_kind.setdefault(fact.kind, []).append(fact.text)
+
+    assert "$4.2 million" in by_kind["currency"]
+    assert "18%" in by_kind["percent"]
+    assert "250 employees" in by_kind["number"]
+    assert "March 2026" in by_kind["date"]
+    assert ("Acme Corp", 1) in index.top_entities()
+    assert [h["title"] for h in index.headings] == ["Acme Corp Annual Review", "Financials", "Outlook"]
+    assert index.section_of(REPORT.index("18%")) == "Financials"
+    assert index.line_of(REPORT.index("250")) == 5
+
+
+def test_find_facts_matches_nearby_words():
+    index = FactIndex("review.md", REPORT)
+    assert [fact.text for fact in index.find_facts("annual revenue", "currency")] == ["$4.2 million"]
+    assert index.find_facts("unrelated words") == []
+
+
+def test_keyword_positions_cover_every_occurrence():
+    text = "\n".join(f"Line {n}: the pipeline grew." for n in range(500)) + "\nFinal pipeline review."
+    index = FactIndex("long.txt", text)
+    positions = index.keyword_positions("pipeline")
+    assert len(positions) == 501
+    assert index.keyword_positions("pipeline review") == [text.rindex("pipeline review")]
+
+
+def test_same_name_documents_stay_separate(empty_cache):
+    first = get_fact_index("notes.txt", "Revenue was $1 million.")
+    second = get_fact_index("notes.txt", "Revenue was $9 million.")
+    assert first is not second
+    assert get_fact_index("notes.txt", "Revenue was $1 million.") is first
+
+    with activate_fact_indexes({first.content_hash: first, second.content_hash: second}):
+        assert len(active_fact_indexes("NOTES")) == 2
+        assert len(set(active_fact_index_keys())) == 2
+    assert active_fact_indexes() == []
+
+
+def test_cache_is_bounded_by_bytes(empty_cache, monkeypatch):
+    text = "word " * 2000
+    size = FactIndex("a", text).size_bytes
+    monkeypatch.setattr(fact_index, "INDEX_CACHE_BYTES", int(size * 2.5))
+
+    indexes = [get_fact_index(f"doc{n}", text + str(n)) for n in range(5)]
+    assert list(fact_index._cache) == [f"doc{n}:{indexes[n].content_hash}" for n in (3, 4)]
+    assert fact_index._cache_bytes == indexes[3].size_bytes + indexes[4].size_bytes
+
+    # An index larger than the whole budget is still cached on its own
+    monkeypatch.setattr(fact_index, "INDEX_CACHE_BYTES", 1)
+    big = get_fact_index("big", text * 3)
+    assert list(fact_index._cache.values()) == [big]
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("crewai")
+
+import runner  # noqa: E402
+import service  # noqa: E402
+from store import get_store  # noqa: E402
+
+
+def fanout_request(topic: str):
+    run_request, error = service.parse_run_request({"topic": topic, "model": "offline", "deliverables": ["writing_task"]})
+    assert error is None
+    return run_request
+
+
+@pytest.fixture
+def research_runs(monkeypatch):
+    """Replaces the research crew with a slow stub and records each execution id it is asked to run."""
+    calls = []
+    outcome = {"status": "completed"}
+
+    def execute_crew(run_request, execution_id, model, doc_inputs, fact_indexes):
+        calls.append(execution_id)
+        time.sleep(0.1)
+        return {
+            "status": outcome["status"], "duration_seconds": 0.1, "token_usage": {}, "error": "boom",
+            "result": f"research for {run_request['topic']}",
+        }
+
+    monkeypatch.setattr(runner, "execute_crew", execute_crew)
+    return calls, outcome
+
+
+def test_concurrent_fanouts_share_one_research_run(research_runs):
+    calls, _ = research_runs
+    requests = [fanout_request("Port automation") for _ in range(4)]
+    results = [None] * len(requests)
+
+    def fan_out(index: int):
+        results[index] = runner.shared_research(requests[index], [], {})
+
+    threads = [threading.Thread(target=fan_out, args=(index,)) for index in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert calls[0] in {f"{run_request['execution_id']}_research" for run_request in requests}
+    assert {research for research, _ in results} == {"research for Port automation"}
+    assert sorted(report["cached"] for _, report in results) == [False, True, True, True]
+    # Every waiter released its lock, so the table holds nothing for finished keys
+    assert runner._research_locks == {}
+
+
+def test_different_keys_do_not_wait_for_each_other(monkeypatch):
+    topics = ("Rail freight", "Air cargo", "Inland shipping")
+    # Each research run waits for the others, so this only passes if all three run at once
+    barrier = threading.Barrier(len(topics), timeout=5)
+
+    def execute_crew(run_request, *args):
+        barrier.wait()
+        return {"status": "completed", "duration_seconds": 0, "token_usage": {}, "result": run_request["topic"]}
+
+    monkeypatch.setattr(runner, "execute_crew", execute_crew)
+    results = []
+    threads = [
+        threading.Thread(target=lambda topic=topic: results.append(runner.shared_research(fanout_request(topic), [], {})))
+        for topic in topics
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(research for research, _ in results) == sorted(topics)
+    assert runner._research_locks == {}
+
+
+def test_failed_research_is_not_cached(research_runs):
+    calls, outcome = research_runs
+    outcome["status"] = "failed"
+    run_request = fanout_request("Drone inspections")
+
+    research, report = runner.shared_research(run_request, [], {})
+    assert research is None
+    assert (report["status"], report["error"], report["cached"]) == ("failed", "boom", False)
+    assert get_store().get_research(runner.research_key(run_request, []), runner.RESEARCH_CACHE_SECONDS) is None
+
+    # The next fan-out tries again and caches the result once it succeeds
+    outcome["status"] = "completed"
+    research, report = runner.shared_research(fanout_request("Drone inspections"), [], {})
+    assert research == "research for Drone inspections" and not report["cached"]
+    assert len(calls) == 2
+    assert runner.shared_research(fanout_request("Drone inspections"), [], {})[1]["cached"]
+    assert len(calls) == 2
+    assert runner._research_locks == {}
+
+
+def test_lock_entry_is_dropped_when_the_research_raises(monkeypatch):
+    def execute_crew(*args):
+        raise RuntimeError("crew exploded")
+
+    monkeypatch.setattr(runner, "execute_crew", execute_crew)
+    with pytest.raises(RuntimeError):
+        runner.shared_research(fanout_request("Tidal energy"), [], {})
+    assert runner._research_locks == {}
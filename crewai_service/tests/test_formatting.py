@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from tools import formatting
+from tools.formatting import ConversionError, convert_text, detect_format, iter_records
+
+
+@pytest.mark.parametrize("data, expected", [
+    ('[{"a": 1}]', "json"),
+    ('{"a": 1}\n{"a": 2}', "jsonl"),
+    ('{"a": 1}', "json"),
+    ("| a | b |\n|---|---|\n| 1 | 2 |", "markdown"),
+    ("name,age\nAda,36\nBob,41", "csv"),
+    ("name\tage\nAda\t36", "tsv"),
+    ("Name,Notes\nAlice,Likes tea.\nBob,Prefers coffee.", "csv"),
+    ("just one line, with a comma", "text"),
+    ("", "text"),
+])
+def test_detect_format(data, expected):
+    assert detect_format(data) == expected
+
+
+@pytest.mark.parametrize("prose", [
+    "We met, and talked.\nThen we left, happy.",
+    "I came, I saw.\nYou went, you left!",
+    "Hello there, friend. How are you, today?\nFine thanks, see you. Bye, then.",
+])
+def test_prose_with_steady_commas_is_text(prose):
+    assert detect_format(prose) == "text"
+    assert [record["value"] for record in iter_records(prose)] == prose.splitlines()
+
+
+@pytest.mark.parametrize("text", [
+    "[Draft] Q3 revenue grew 12%",
+    "{Note} figures are preliminary",
+    "[1] Introduction and scope",
+    '{"a": 1} trailing words',
+])
+def test_bracketed_text_is_not_json(text):
+    assert detect_format(text) == "text"
+    assert json.loads(convert_text(text, "json")) == [{"value": text}]
+
+
+def test_long_json_is_detected_from_its_first_value(monkeypatch):
+    monkeypatch.setattr(formatting, "JSON_PROBE_CHARS", 64)
+    assert detect_format(json.dumps([{"name": "x" * 10}] * 50)) == "json"
+    assert detect_format(json.dumps({"rows": list(range(100))})) == "json"
+    assert detect_format("[Draft] " + "x" * 200) == "text"
+
+
+def test_csv_to_json_round_trip():
+    data = "name,age\nAda,36\nBob,41\n"
+    records = json.loads(convert_text(data, "json"))
+    assert records == [{"name": "Ada", "age": "36"}, {"name": "Bob", "age": "41"}]
+    assert convert_text(json.dumps(records), "csv") == data
+
+
+def test_json_wrapper_is_unwrapped_and_columns_merged():
+    data = json.dumps({"rows": [{"a": 1}, {"b": [1, 2]}]})
+    assert convert_text(data, "markdown") == "| a | b |\n|---|---|\n| 1 |  |\n|  | [1,2] |\n"
+
+
+def test_single_json_value_is_compacted():
+    assert convert_text('{ "a" : [1, 2] }', "json") == '{"a":[1,2]}'
+
+
+def test_markdown_to_jsonl():
+    data = "| a | b |\n|---|---|\n| x \\| y | 2 |\n"
+    assert convert_text(data, "jsonl") == '{"a":"x | y","b":"2"}\n'
+
+
+def test_invalid_input_raises_conversion_error():
+    with pytest.raises(ConversionError):
+        convert_text("[1, 2", "csv", "json")
+    with pytest.raises(ConversionError):
+        convert_text("a", "xml")
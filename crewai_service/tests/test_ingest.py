@@ -0,0 +1,120 @@
+import io
+import os
+import stat
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ingest
+from ingest import IngestError, detect_kind, extract_text, ingest_upload, spool_upload
+from store import ExecutionStore
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+S = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def write_docx(path):
+    body = (
+        "<w:p><w:r><w:t>Quarterly review</w:t></w:r></w:p>"
+        "<w:p><w:r><w:t>Revenue grew</w:t><w:tab/><w:t>12%</w:t></w:r></w:p>"
+        "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Region</w:t></w:r></w:p></w:tc>"
+        "<w:tc><w:p><w:r><w:t>Sales</w:t></w:r></w:p></w:tc></w:tr>"
+        "<w:tr><w:tc><w:p><w:r><w:t>EMEA</w:t></w:r></w:p></w:tc>"
+        "<w:tc><w:p><w:r><w:t>$4M</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {W}><w:body>{body}</w:body></w:document>")
+
+
+def write_xlsx(path, strings=("Region", "Sales", "EMEA")):
+    shared = "".join(f"<si><t>{text}</t></si>" for text in strings)
+    sheet = (
+        '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c></row>'
+        '<row r="2"><c r="A2" t="s"><v>2</v></c><c r="C2"><v>4000000</v></c><c r="D2" t="b"><v>1</v></c></row>'
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("xl/workbook.xml", f'<workbook {S} {R}><sheets><sheet name="Q1" r:id="rId1"/></sheets></workbook>')
+        archive.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml"/></Relationships>',
+        )
+        archive.writestr("xl/sharedStrings.xml", f"<sst {S}>{shared}</sst>")
+        archive.writestr("xl/worksheets/sheet1.xml", f"<worksheet {S}><sheetData>{sheet}</sheetData></worksheet>")
+
+
+@pytest.fixture
+def inline_pool(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(ingest, "get_ingest_pool", lambda: pool)
+    yield
+    pool.shutdown()
+
+
+def test_docx_paragraphs_and_tables(tmp_path):
+    path = tmp_path / "report.docx"
+    write_docx(path)
+    assert detect_kind(str(path)) == "docx"
+    extracted = extract_text(str(path), "docx")
+    assert extracted["text"] == "--- Section 1 ---\nQuarterly review\nRevenue grew\t12%\nRegion | Sales\nEMEA | $4M"
+
+
+def test_xlsx_rows_use_shared_strings_and_cached_values(tmp_path):
+    path = tmp_path / "model.xlsx"
+    write_xlsx(path)
+    assert detect_kind(str(path)) == "xlsx"
+    assert extract_text(str(path), "xlsx")["text"] == "--- Sheet: Q1 ---\nRegion | Sales\nEMEA |  | 4000000 | TRUE"
+
+
+def test_xlsx_shared_strings_are_capped(tmp_path, monkeypatch):
+    path = tmp_path / "big.xlsx"
+    write_xlsx(path, strings=("Region", "Sales", "EMEA" * 50))
+    monkeypatch.setattr(ingest, "MAX_SHARED_STRING_CHARS", 20)
+    with zipfile.ZipFile(path) as archive:
+        strings, truncated = ingest._xlsx_shared_strings(archive, max_chars=20)
+    assert (strings, truncated) == (["Region", "Sales"], True)
+
+
+def test_extraction_stops_at_max_chars(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("x" * 1000)
+    extracted = extract_text(str(path), "text", max_chars=100)
+    assert extracted == {"text": "x" * 100, "sections": 0, "truncated": True}
+
+
+def test_spool_rejects_oversized_uploads():
+    with pytest.raises(IngestError) as error:
+        spool_upload(io.BytesIO(b"x" * 300), max_bytes=200)
+    assert error.value.status == 413
+
+
+def test_pdftotext_is_killed_after_the_timeout(tmp_path, monkeypatch):
+    script = tmp_path / "pdftotext"
+    script.write_text("#!/bin/sh\nprintf 'page one\\f'\nexec sleep 30\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(ingest, "PDF_TIMEOUT", 0.5)
+
+    pages = ingest.iter_pdf_pages(str(script))
+    assert next(pages) == ("Page 1", "page one")
+    with pytest.raises(IngestError, match="did not finish"):
+        next(pages)
+
+
+def test_reupload_returns_the_stored_name(tmp_path, inline_pool):
+    store = ExecutionStore(tmp_path / "docs.db")
+    first = ingest_upload(io.BytesIO(b"Revenue grew 12% in 2024."), "q4.txt", store)
+    assert first["cached"] is False and first["name"] == "q4.txt"
+
+    again = ingest_upload(io.BytesIO(b"Revenue grew 12% in 2024."), "renamed.txt", store)
+    assert again["cached"] is True
+    assert again["id"] == first["id"]
+    assert again["name"] == store.get_document(first["id"])["name"] == "q4.txt"
+    assert again["uploaded_as"] == "renamed.txt"
+
+
+def test_empty_upload_is_rejected(tmp_path, inline_pool):
+    with pytest.raises(IngestError, match="No text"):
+        ingest_upload(io.BytesIO(b"   "), "blank.txt", ExecutionStore(tmp_path / "docs.db"))
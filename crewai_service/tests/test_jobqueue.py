@@ -0,0 +1,133 @@
+import sqlite3
+import time
+
+import pytest
+
+import jobqueue
+import store as store_module
+from jobqueue import JobQueue, QueueFull, StoreNotLocal
+from store import ExecutionStore
+from worker import QueueWorker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(ExecutionStore(tmp_path / "queue.db"), lease_seconds=30)
+
+
+def expire(queue: JobQueue, job_id: str) -> None:
+    queue.store.connect().execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_jobs_are_leased_in_order_and_completed(queue):
+    queue.enqueue("a", {"topic": "first"})
+    queue.enqueue("b", {"topic": "second"})
+    assert queue.get("b")["position"] == 1
+
+    assert queue.lease("w1") == ("a", {"topic": "first"})
+    assert queue.counts() == {"queued": 1, "leased": 1}
+    assert queue.complete("a", "w1", {"success": True}, 200)
+
+    job = queue.get("a")
+    assert job["status"] == "completed"
+    assert job["response"] == {"success": True}
+    assert job["attempts"] == 1
+    # A finished job cannot be completed again
+    assert not queue.complete("a", "w1", {"success": False}, 500)
+
+
+def test_heartbeat_and_complete_require_the_lease(queue):
+    queue.enqueue("a", {})
+    queue.lease("w1")
+    assert queue.heartbeat("a", "w1")
+    assert not queue.heartbeat("a", "w2")
+    assert not queue.complete("a", "w2", {}, 200)
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(queue):
+    queue.enqueue("a", {"topic": "t"})
+    queue.lease("w1")
+    expire(queue, "a")
+
+    assert queue.lease("w2") == ("a", {"topic": "t"})
+    job = queue.get("a")
+    assert (job["worker_id"], job["attempts"]) == ("w2", 2)
+    # The first worker's late heartbeat and result are refused
+    assert not queue.heartbeat("a", "w1")
+    assert not queue.complete("a", "w1", {"stale": True}, 200)
+    assert queue.complete("a", "w2", {"fresh": True}, 200)
+    assert queue.get("a")["response"] == {"fresh": True}
+
+
+def test_job_fails_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(jobqueue, "MAX_ATTEMPTS", 2)
+    queue.enqueue("a", {})
+    for worker in ("w1", "w2"):
+        assert queue.lease(worker)[0] == "a"
+        expire(queue, "a")
+
+    assert queue.lease("w3") is None
+    job = queue.get("a")
+    assert job["status"] == "failed"
+    assert job["status_code"] == 500
+    assert "abandoned by 2 workers" in job["response"]["error"]
+
+
+def test_queue_full(queue):
+    queue.enqueue("a", {}, max_queued=1)
+    with pytest.raises(QueueFull):
+        queue.enqueue("b", {}, max_queued=1)
+    assert queue.get("b") is None
+
+
+def test_worker_registrations_and_pruning(queue):
+    queue.register_worker("host:1", capacity=2, busy=1, info={"completed": 3})
+    queue.register_worker("host:2", capacity=1)
+    queue.store.connect().execute("UPDATE queue_workers SET last_seen = 0 WHERE id = 'host:2'")
+    assert [(w["id"], w["pid"], w["info"]) for w in queue.live_workers()] == [("host:1", 1, {"completed": 3})]
+
+    queue.enqueue("done", {})
+    queue.lease("host:1")
+    queue.complete("done", "host:1", {}, 200)
+    queue.enqueue("waiting", {})
+    queue.store.connect().execute("UPDATE jobs SET finished_at = 0 WHERE id = 'done'")
+
+    assert queue.prune(3600) == 1
+    assert queue.get("done") is None
+    assert queue.get("waiting")["status"] == "queued"
+    assert [w["id"] for w in queue.live_workers(stale_after=10 ** 10)] == ["host:1"]
+
+
+def test_worker_renewal_survives_store_errors(queue):
+    worker = QueueWorker(queue)
+    queue.enqueue("a", {})
+    queue.lease(worker.worker_id)
+    assert worker._renew("a")
+
+    def locked(*_):
+        raise sqlite3.OperationalError("database is locked")
+
+    queue.heartbeat = locked
+    assert worker._renew("a")
+
+
+def test_filesystem_type_uses_the_longest_mount(tmp_path):
+    mounts = tmp_path / "mounts"
+    mounts.write_text(
+        "/dev/sda1 / ext4 rw 0 0\n"
+        "server:/exports /srv/shared nfs4 rw 0 0\n"
+        "tmpfs /srv/shared\\040cache tmpfs rw 0 0\n"
+    )
+    assert store_module.filesystem_type("/srv/shared/db/executions.db", str(mounts)) == "nfs4"
+    assert store_module.filesystem_type("/srv/shared cache/x.db", str(mounts)) == "tmpfs"
+    assert store_module.filesystem_type("/srv/sharedother/x.db", str(mounts)) == "ext4"
+    assert store_module.filesystem_type("/x", str(tmp_path / "missing")) is None
+
+
+def test_queue_refuses_a_store_on_a_network_filesystem(tmp_path, monkeypatch):
+    store = ExecutionStore(tmp_path / "queue.db")
+    assert store.is_local()
+    monkeypatch.setattr(store_module, "filesystem_type", lambda path: "nfs4")
+    assert not store.is_local()
+    with pytest.raises(StoreNotLocal, match="local filesystem"):
+        JobQueue(store)
@@ -0,0 +1,123 @@
+import io
+import logging
+import threading
+import time
+from typing import List
+
+import pytest
+
+import logs
+import service
+from logs import ExecutionLogHandler, StdoutRouter, execution_logging, logger, recent_logs
+from store import get_store
+
+
+def wait_for_final(execution_id: str, timeout: float = 5):
+    """Records are handled on the listener thread; the last one is "Execution finished"."""
+    deadline = time.monotonic() + timeout
+    while True:
+        entries = recent_logs(execution_id) or []
+        if entries and entries[-1]["message"] == "Execution finished":
+            return entries
+        assert time.monotonic() < deadline, f"no final record for {execution_id}"
+        time.sleep(0.02)
+
+
+def wait_for_stored(execution_id: str, count: int, timeout: float = 5) -> List[str]:
+    """The listener fills the ring buffer before it writes the batch to the store."""
+    deadline = time.monotonic() + timeout
+    while True:
+        messages = [entry["message"] for entry in get_store().get_logs(execution_id)]
+        if len(messages) >= count or time.monotonic() >= deadline:
+            return messages
+        time.sleep(0.02)
+
+
+def test_lines_stay_with_their_execution_across_threads():
+    router = StdoutRouter(io.StringIO())
+    barrier = threading.Barrier(3)
+
+    def run(execution_id: str):
+        with execution_logging(execution_id):
+            barrier.wait()
+            for n in range(20):
+                logger.info(f"{execution_id} step {n}")
+                router.write(f"{execution_id} agent output {n}\n")
+
+    threads = [threading.Thread(target=run, args=(f"exec_thread_{name}",)) for name in ("a", "b", "c")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name in ("a", "b", "c"):
+        execution_id = f"exec_thread_{name}"
+        entries = wait_for_final(execution_id)
+        assert {entry["execution_id"] for entry in entries} == {execution_id}
+        messages = [entry["message"] for entry in entries[:-1]]
+        assert all(message.startswith(execution_id) for message in messages)
+        assert sum(entry["source"] == "crewai" for entry in entries) == 20
+        # The final record flushes the batch, so any process can serve the logs
+        assert wait_for_stored(execution_id, len(entries)) == [entry["message"] for entry in entries]
+
+
+def test_stdout_router_only_captures_inside_an_execution():
+    stream = io.StringIO()
+    router = StdoutRouter(stream)
+    router.write("before\n")
+    with execution_logging("exec_router"):
+        router.write("partial ")
+        router.write("line\nsecond")
+        router.flush()
+    router.write("after\n")
+
+    assert stream.getvalue() == "before\nafter\n"
+    messages = [entry["message"] for entry in wait_for_final("exec_router")]
+    assert messages == ["partial line", "second", "Execution finished"]
+
+
+def test_ring_buffer_and_persistence_limits(monkeypatch):
+    monkeypatch.setattr(logs, "RING_BUFFER_SIZE", 5)
+    monkeypatch.setattr(logs, "RING_BUFFER_EXECUTIONS", 2)
+    monkeypatch.setattr(logs, "MAX_PERSISTED_RECORDS", 8)
+    handler = ExecutionLogHandler()
+    persisted = []
+    monkeypatch.setattr(handler, "flush", lambda: persisted.extend(handler._pending) or handler._pending.clear())
+
+    def emit(execution_id, message, **extra):
+        handler.emit(logging.makeLogRecord({"msg": message, "execution_id": execution_id, **extra}))
+
+    for n in range(12):
+        emit("exec_ring", f"line {n}")
+    emit(None, "untagged")
+    emit("exec_ring", "done", final=True)
+
+    assert [entry["message"] for entry in handler.recent("exec_ring")] == ["line 8", "line 9", "line 10", "line 11", "done"]
+    assert [entry["message"] for _, entry in persisted] == [f"line {n}" for n in range(8)]
+
+    emit("exec_other_1", "x")
+    emit("exec_other_2", "y")
+    # The oldest execution's buffer is evicted
+    assert handler.recent("exec_ring") is None
+    assert handler.recent("exec_other_2")[0]["message"] == "y"
+
+
+def test_execution_logs_endpoint_falls_back_to_the_store(monkeypatch):
+    assert service.get_execution_logs("exec_missing")[1] == 404
+
+    get_store().save_execution({"id": "exec_stored", "topic": "t"})
+    get_store().append_logs([("exec_stored", {"ts": n, "level": "INFO", "message": f"m{n}"}) for n in range(4)])
+    monkeypatch.setattr(service, "recent_logs", lambda execution_id: None)
+    body, status = service.get_execution_logs("exec_stored", limit=2)
+    assert status == 200
+    assert [entry["message"] for entry in body["logs"]] == ["m2", "m3"]
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), ("true", True), ("1", True), (1, True),
+    (False, False), ("false", False), ("0", False), ("no", False), (0, False), (None, False),
+])
+def test_verbose_flag_is_parsed(value, expected):
+    run_request, error = service.parse_run_request({"topic": "t", "verbose": value})
+    assert error is None
+    assert run_request["verbose"] is expected
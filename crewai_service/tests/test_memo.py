@@ -0,0 +1,109 @@
+import inspect
+
+import pytest
+
+from tools import memo
+from tools.memo import SharedToolCache, ToolCallCache, activate_tool_cache, call_key, memoized
+
+
+@pytest.fixture(autouse=True)
+def shared(monkeypatch):
+    cache = SharedToolCache(max_size=2)
+    monkeypatch.setattr(memo, "shared_cache", cache)
+    return cache
+
+
+def counting(pure=False, scope=None):
+    calls = []
+
+    @memoized(pure=pure, scope=scope)
+    def lookup(query: str, limit: int = 5) -> str:
+        calls.append((query, limit))
+        return f"{query}:{limit}:{len(calls)}"
+
+    return lookup, calls
+
+
+def test_call_key_applies_defaults_and_scope():
+    signature = inspect.signature(lambda query, limit=5: None)
+    assert call_key("t", signature, ("a",), {}) == call_key("t", signature, (), {"query": "a", "limit": 5})
+    assert call_key("t", signature, ("a",), {}) != call_key("t", signature, ("a",), {}, scope=["doc"])
+    with pytest.raises(TypeError):
+        call_key("t", signature, (), {"unknown": 1})
+
+
+def test_calls_outside_an_execution_are_not_cached():
+    lookup, calls = counting()
+    lookup("revenue")
+    lookup("revenue")
+    assert len(calls) == 2
+
+
+def test_execution_cache_hits_and_summary():
+    lookup, calls = counting()
+    cache = ToolCallCache()
+    with activate_tool_cache(cache):
+        first = lookup("revenue")
+        assert lookup("revenue", limit=5) == first
+        lookup("churn")
+
+    assert calls == [("revenue", 5), ("churn", 5)]
+    summary = cache.summary()
+    assert (summary["calls"], summary["hits"], summary["misses"]) == (3, 1, 2)
+    assert summary["tools"]["lookup"]["hit_rate"] == summary["hit_rate"] == 0.333
+    # Another execution starts empty
+    with activate_tool_cache(ToolCallCache()):
+        lookup("revenue")
+    assert len(calls) == 3
+
+
+def test_pure_results_are_shared_across_executions(shared):
+    lookup, calls = counting(pure=True)
+    with activate_tool_cache(ToolCallCache()):
+        first = lookup("revenue")
+    second_cache = ToolCallCache()
+    with activate_tool_cache(second_cache):
+        assert lookup("revenue") == first
+        assert lookup("revenue") == first
+
+    assert len(calls) == 1
+    assert second_cache.summary()["shared_hits"] == 1 and second_cache.summary()["hits"] == 1
+
+
+def test_shared_cache_evicts_least_recently_used(shared):
+    shared.put(("t", "a"), "A")
+    shared.put(("t", "b"), "B")
+    assert shared.get(("t", "a")) == "A"
+    shared.put(("t", "c"), "C")
+    assert shared.get(("t", "b")) is None
+    assert shared.get(("t", "a")) == "A" and shared.get(("t", "c")) == "C"
+
+    disabled = SharedToolCache(max_size=0)
+    disabled.put(("t", "a"), "A")
+    assert disabled.get(("t", "a")) is None
+
+
+def test_scope_separates_results():
+    visible = ["report.pdf"]
+    lookup, calls = counting(pure=True, scope=lambda: list(visible))
+    with activate_tool_cache(ToolCallCache()):
+        lookup("revenue")
+        visible.append("notes.txt")
+        lookup("revenue")
+    assert len(calls) == 2
+
+
+def test_non_string_results_and_bad_arguments_bypass_the_cache():
+    calls = []
+
+    @memoized()
+    def rows(query: str):
+        calls.append(query)
+        return [query]
+
+    with activate_tool_cache(ToolCallCache()):
+        rows("a")
+        rows("a")
+        with pytest.raises(TypeError):
+            rows()
+    assert calls == ["a", "a"]
@@ -0,0 +1,89 @@
+import pytest
+
+import memory
+import service
+from jobqueue import JobQueue
+from memory import MemoryBudgetExceeded, RunMemoryMonitor, monitor_run, recycle_reason
+from store import ExecutionStore
+from worker import QueueWorker
+
+MB = memory.MB
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """Controllable RSS readings, in MB."""
+    current = {"mb": 100}
+    monkeypatch.setattr(memory, "rss_bytes", lambda: int(current["mb"] * MB))
+    return current
+
+
+@pytest.fixture
+def exclusive(monkeypatch):
+    monkeypatch.setattr(memory, "_exclusive", True)
+
+
+def test_recycle_reason(monkeypatch, rss):
+    assert recycle_reason(1000) is None
+    monkeypatch.setattr(memory, "WORKER_MAX_EXECUTIONS", 3)
+    assert recycle_reason(2) is None
+    assert recycle_reason(3) == "served 3 executions (limit 3)"
+
+    monkeypatch.setattr(memory, "WORKER_MAX_EXECUTIONS", 0)
+    monkeypatch.setattr(memory, "WORKER_MAX_RSS_MB", 500)
+    assert recycle_reason(1) is None
+    rss["mb"] = 640
+    assert recycle_reason(1) == "RSS 640 MB over limit 500 MB"
+
+
+def test_budget_aborts_a_run_that_has_the_process_to_itself(rss, exclusive):
+    with monitor_run(budget_mb=50) as monitor:
+        rss["mb"] = 140
+        monitor._sample()
+        monitor.check()
+        rss["mb"] = 180
+        monitor._sample()
+        with pytest.raises(MemoryBudgetExceeded, match="80 MB used, budget 50 MB"):
+            monitor.check()
+    report = monitor.report()
+    assert report["rss_peak_mb"] == 180 and report["rss_growth_mb"] == 80
+    assert report["budget_enforced"] is True
+
+
+def test_overlapping_runs_are_measured_but_never_aborted(rss, exclusive):
+    with monitor_run(budget_mb=50) as first:
+        rss["mb"] = 300
+        with monitor_run(budget_mb=50) as second:
+            rss["mb"] = 500
+            second._sample()
+        first._sample()
+        first.check()
+        second.check()
+    # A run that starts after the overlap ended has the process to itself again
+    with monitor_run(budget_mb=50) as third:
+        assert third.enforced
+    assert not first.enforced and not second.enforced
+    assert first.report()["rss_peak_mb"] == 500
+
+
+def test_budget_is_not_enforced_in_shared_processes(rss):
+    monitor = RunMemoryMonitor(budget_mb=50, interval=3600)
+    monitor.start()
+    rss["mb"] = 1000
+    monitor.stop()
+    monitor.check()
+    assert monitor.report()["budget_enforced"] is False
+
+
+def test_queue_worker_recycles_after_its_execution_limit(tmp_path, monkeypatch, fast_offline):
+    monkeypatch.setattr(memory, "WORKER_MAX_EXECUTIONS", 1)
+    queue = JobQueue(ExecutionStore(tmp_path / "queue.db"))
+    worker = QueueWorker(queue)
+    run_request, _ = service.parse_run_request({"topic": "Recycling", "model": "offline"})
+    queue.enqueue(run_request["execution_id"], run_request)
+
+    worker._run_job(*queue.lease(worker.worker_id))
+
+    assert queue.get(run_request["execution_id"])["status"] == "completed"
+    assert worker.recycle_reason == "served 1 executions (limit 1)"
+    assert worker._stopping.is_set()
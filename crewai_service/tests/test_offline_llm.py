@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+pytest.importorskip("crewai")
+
+import offline_llm  # noqa: E402
+from crew import AgenticCrew  # noqa: E402
+from offline_llm import OfflineLLM, is_offline_model, offline_answer  # noqa: E402
+
+PROMPT = "Assess warehouse robotics adoption across regional distributors and their suppliers."
+
+
+def test_offline_answer_is_seeded_from_the_prompt():
+    first = offline_answer(PROMPT, words=120)
+    assert offline_answer(PROMPT, words=120) == first
+    assert offline_answer(PROMPT, words=120, rng=random.Random(PROMPT)) == first
+    assert offline_answer(PROMPT + " Include pricing.", words=120) != first
+    assert first.startswith("# Findings\n\n## 1. ")
+    # Sections are drawn from the prompt's own words
+    vocabulary = {"assess", "warehouse", "robotics", "adoption", "across", "regional", "distributors", "their", "suppliers"}
+    assert {word.strip(".,").lower() for line in first.splitlines() if line.startswith("- ")
+            for word in line[2:].split()[:3]} <= vocabulary
+
+
+def test_offline_answer_falls_back_to_filler_words():
+    answer = offline_answer("1 2 3", words=40)
+    assert set(answer.split()) & set(offline_llm._FILLER)
+
+
+def test_offline_llm_call_is_repeatable(fast_offline):
+    llm = OfflineLLM("offline/gpt-4o")
+    messages = [{"role": "system", "content": "You are an analyst."}, {"role": "user", "content": PROMPT}]
+    answer = llm.call(messages)
+    assert answer.startswith("Thought: I now know the final answer\nFinal Answer: # Findings")
+    assert llm.call(messages) == answer
+    assert llm.call(PROMPT) != answer
+
+
+@pytest.mark.parametrize("model, offline", [
+    ("offline", True),
+    ("offline/gpt-4o", True),
+    ("offline/", True),
+    ("offlineX", False),
+    ("gpt-4o", False),
+    ("openai/offline", False),
+])
+def test_is_offline_model(model, offline):
+    assert is_offline_model(model) is offline
+
+
+def test_agentic_crew_routes_offline_models_to_the_stand_in():
+    offline = AgenticCrew(llm_model="offline/claude")
+    assert isinstance(offline.llm, OfflineLLM)
+    assert offline.llm.model == "offline/claude"
+    assert AgenticCrew(llm_model="gpt-4o").llm == "gpt-4o"
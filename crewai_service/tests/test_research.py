@@ -0,0 +1,82 @@
+import pytest
+
+pytest.importorskip("crewai")
+
+import crew as crew_module  # noqa: E402
+from crew import AgenticCrew  # noqa: E402
+
+
+def docs(*sizes):
+    return [
+        {"name": f"doc{n}.txt", "content": " ".join(f"fact{n}_{i} grew {i}% in 2024." for i in range(size))}
+        for n, size in enumerate(sizes)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def thresholds(monkeypatch):
+    monkeypatch.setattr(crew_module, "MAP_REDUCE_MIN_DOCUMENTS", 2)
+    monkeypatch.setattr(crew_module, "MAP_GROUP_TOKENS", 500)
+
+
+@pytest.mark.parametrize("mode, sizes, groups", [
+    ("auto", (200, 200, 200), 3),
+    ("auto", (5, 5, 5), 0),          # small documents pack into a single pass
+    ("auto", (5, 5, 200), 2),
+    ("auto", (200,), 0),
+    ("single", (200, 200), 0),
+    ("map_reduce", (5, 5, 5), 3),    # every document gets its own pass
+])
+def test_research_plan_thresholds(mode, sizes, groups):
+    assert len(AgenticCrew(llm_model="offline", documents=docs(*sizes), research_mode=mode).research_plan()) == groups
+
+
+def test_minimum_document_count_applies_in_auto_mode_only(monkeypatch):
+    monkeypatch.setattr(crew_module, "MAP_REDUCE_MIN_DOCUMENTS", 4)
+    assert AgenticCrew(llm_model="offline", documents=docs(200, 200, 200)).research_plan() == []
+    assert len(AgenticCrew(llm_model="offline", documents=docs(200, 200, 200), research_mode="map_reduce").research_plan()) == 3
+    monkeypatch.setattr(crew_module, "MAP_REDUCE_MIN_DOCUMENTS", 0)
+    assert AgenticCrew(llm_model="offline", documents=docs(200, 200, 200)).research_plan() == []
+
+
+def test_parallel_passes_are_budgeted_separately_and_merged(fast_offline):
+    documents = docs(200, 200, 200)
+    agentic_crew = AgenticCrew(llm_model="offline", documents=documents)
+    crew = agentic_crew.create_crew("research", "Fish farming")
+    # The single-pass research prompt is never built when passes are planned
+    assert [report["task"] for report in agentic_crew.budget.reports] == ["writing_task"]
+
+    assert agentic_crew.map_reduce_research(crew, "Fish farming")
+    passes = agentic_crew.research_passes
+    assert [p["documents"] for p in passes] == [["doc0.txt"], ["doc1.txt"], ["doc2.txt"]]
+    assert all("output" not in p for p in passes)
+
+    reports = {report["task"]: report for report in agentic_crew.budget.reports}
+    assert set(reports) == {"writing_task", "research_pass_1", "research_pass_2", "research_pass_3", "research_reduce"}
+    for index, doc in enumerate(documents, start=1):
+        report = reports[f"research_pass_{index}"]
+        assert [entry["name"] for entry in report["documents"]] == [doc["name"]]
+        assert not report["documents"][0]["trimmed"]
+        assert report["prompt_tokens_estimate"] + report["output_reserved_tokens"] <= report["context_window"]
+    assert [entry["name"] for entry in reports["research_reduce"]["documents"]] == [
+        "Research pass 1 (doc0.txt)", "Research pass 2 (doc1.txt)", "Research pass 3 (doc2.txt)",
+    ]
+
+    research_task = crew.tasks[0]
+    assert research_task.description.startswith("MERGE PARALLEL RESEARCH FINDINGS")
+    assert "Research pass 3 (doc2.txt)" in research_task.description
+    assert "fact0_199" not in research_task.description  # raw documents stay in the passes
+
+    result = agentic_crew.run(crew)
+    assert result
+    for field in ("prompt_tokens", "completion_tokens"):
+        assert agentic_crew.token_usage[field] >= sum(p["token_usage"][field] for p in passes)
+
+
+def test_single_pass_leaves_the_crew_untouched(fast_offline):
+    agentic_crew = AgenticCrew(llm_model="offline", documents=docs(5, 5))
+    crew = agentic_crew.create_crew("research", "Fish farming")
+    description = crew.tasks[0].description
+    assert not agentic_crew.map_reduce_research(crew, "Fish farming")
+    assert crew.tasks[0].description == description
+    assert "fact1_4" in description
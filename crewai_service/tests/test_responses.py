@@ -0,0 +1,89 @@
+import gzip
+import json
+
+import pytest
+
+import responses
+from responses import encode_json, etag_matches, negotiate_encoding, parse_fields, shape_record, summarize
+
+RECORD = {
+    "id": "exec_1",
+    "status": "completed",
+    "result": "r" * 2000,
+    "token_budget": {"tasks": []},
+    "memory": {"rss_peak_mb": 100},
+}
+
+
+class Headers(dict):
+    """Case-insensitive ``get``, like Flask and Starlette headers."""
+
+    def get(self, key, default=None):
+        return {k.lower(): v for k, v in self.items()}.get(key.lower(), default)
+
+
+def test_parse_fields():
+    assert parse_fields(" id, status ,") == ["id", "status"]
+    assert parse_fields("") is None
+    assert parse_fields(" , ") is None
+
+
+def test_summary_truncates_results_and_drops_diagnostics():
+    summary = summarize(RECORD, max_chars=10)
+    assert summary["result"] == "r" * 10 + "…"
+    assert summary["result_truncated"] and summary["result_chars"] == 2000
+    assert "token_budget" not in summary and "memory" not in summary
+    assert RECORD["result"] == "r" * 2000
+
+
+def test_summary_strips_fanout_deliverable_results():
+    record = {"id": "x", "fanout": {"deliverables": [{"deliverable": "full", "result": "long", "tasks": []}]}}
+    assert summarize(record)["fanout"]["deliverables"] == [{"deliverable": "full"}]
+
+
+def test_projection_applies_after_summary():
+    assert shape_record(RECORD, ["id", "result_truncated", "unknown"], summary=True) == {
+        "id": "exec_1", "result_truncated": True,
+    }
+
+
+def test_etag_and_conditional_request():
+    body, status, headers = encode_json({"a": 1}, 200, Headers())
+    assert status == 200 and headers["ETag"].startswith('W/"')
+
+    again = encode_json({"a": 1}, 200, Headers({"If-None-Match": headers["ETag"]}))
+    assert again[:2] == (b"", 304)
+    strong = headers["ETag"].removeprefix("W/")
+    assert encode_json({"a": 1}, 200, Headers({"if-none-match": f'"other", {strong}'}))[1] == 304
+    assert encode_json({"a": 2}, 200, Headers({"If-None-Match": headers["ETag"]}))[1] == 200
+
+
+def test_errors_get_no_etag():
+    body, status, headers = encode_json({"error": "missing"}, 404, Headers({"If-None-Match": "*"}))
+    assert status == 404 and "ETag" not in headers
+
+
+def test_large_bodies_are_compressed_when_accepted():
+    body, _, headers = encode_json(RECORD, 200, Headers({"Accept-Encoding": "gzip"}))
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == RECORD
+
+    plain, _, headers = encode_json({"a": 1}, 200, Headers({"Accept-Encoding": "gzip"}))
+    assert "Content-Encoding" not in headers and json.loads(plain) == {"a": 1}
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, None),
+    ("gzip;q=0", None),
+    ("br, gzip", "gzip"),
+    ("*", "gzip"),
+])
+def test_negotiate_encoding_without_zstd(monkeypatch, accept, expected):
+    monkeypatch.setattr(responses, "zstandard", None)
+    assert negotiate_encoding(accept) == expected
+
+
+def test_etag_matches_wildcard_and_lists():
+    assert etag_matches("*", 'W/"x"')
+    assert not etag_matches(None, 'W/"x"')
+    assert etag_matches('"a", W/"x"', '"x"')
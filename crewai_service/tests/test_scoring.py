@@ -0,0 +1,60 @@
+from tools.scoring import parse_criteria, parse_items, priority_tier, render_ranking_table, score_items
+
+
+def test_parse_items_accepts_json_objects_and_bullets():
+    assert parse_items('[{"name": "Chatbot", "description": "support"}, "OCR", ""]') == ["Chatbot: support", "OCR"]
+    assert parse_items("- First\n2. Second\n\n* Third") == ["First", "Second", "Third"]
+
+
+def test_parse_criteria_dedupes_and_defaults():
+    assert parse_criteria(" Impact, urgency,impact ,") == ["impact", "urgency"]
+    assert parse_criteria(" , ") == ["impact", "urgency", "readiness"]
+
+
+def test_score_items_ranks_by_overall_score():
+    items = [
+        "Rename a wiki page",
+        "Urgent: automate invoice matching to save $2M in revenue leakage this quarter, pilot ready",
+        "Complex multi-year legacy migration with unproven vendor",
+    ]
+    rows = score_items(items, ["impact", "urgency", "readiness", "risk"])
+
+    assert [row["rank"] for row in rows] == [1, 2, 3]
+    assert rows[0]["index"] == 1
+    assert rows[0]["overall"] >= rows[1]["overall"] >= rows[2]["overall"]
+    for row in rows:
+        assert set(row["scores"]) == {"impact", "urgency", "readiness", "risk"}
+        assert all(0 <= score <= 10 for score in row["scores"].values())
+        assert row["tier"] == priority_tier(row["overall"])
+
+
+def test_inverse_criteria_lower_priority():
+    risky = score_items(["security privacy liability risk", "nothing notable"], ["risk"])
+    by_index = {row["index"]: row for row in risky}
+    assert by_index[0]["scores"]["risk"] > by_index[1]["scores"]["risk"]
+    assert by_index[0]["overall"] < by_index[1]["overall"]
+
+
+def test_unknown_criterion_uses_its_own_words():
+    rows = score_items(["strong sustainability story", "no match"], ["sustainability"])
+    assert rows[0]["index"] == 0
+    assert rows[0]["scores"]["sustainability"] > rows[1]["scores"]["sustainability"]
+
+
+def test_empty_batch():
+    assert score_items([], ["impact"]) == []
+
+
+def test_render_ranking_table_escapes_and_truncates():
+    rows = score_items(["a | b " + "x" * 100], ["impact"])
+    table = render_ranking_table(rows, ["impact"], max_item_chars=20).splitlines()
+    assert table[0] == "| Rank | Item | Impact | Overall | Tier |"
+    assert "a \\| b" in table[2]
+    assert "..." in table[2]
+
+
+def test_render_ranking_table_never_splits_an_escape():
+    # The cut lands right on the "|"; escaping first used to leave a dangling backslash
+    rows = score_items(["x" * 16 + "|" + "y" * 20], ["impact"])
+    item = render_ranking_table(rows, ["impact"], max_item_chars=20).splitlines()[2].split(" | ")[1]
+    assert item == "x" * 16 + "\\|..."
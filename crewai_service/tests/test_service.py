@@ -0,0 +1,20 @@
+import service
+
+
+def parse(**body):
+    return service.parse_run_request({"topic": "t", **body})
+
+
+def test_run_slots_cover_every_concurrent_crew():
+    assert service.run_slots(parse()[0]) == 1
+    assert service.run_slots(parse(models=["a", "b", "a", "c"])[0]) == 3
+    assert service.run_slots(parse(crew_type="fanout", deliverables=["research", "analysis"])[0]) == 2
+    assert service.run_slots(parse(models=["only"])[0]) == 1
+
+
+def test_model_lists_are_validated():
+    run_request, _ = parse(models=["gpt-4o", "gpt-4o-mini"])
+    assert run_request["model"] == "gpt-4o" and run_request["models"] == ["gpt-4o", "gpt-4o-mini"]
+    assert parse(models="gpt-4o")[1][1] == 400
+    assert parse(models=[f"m{n}" for n in range(service.MAX_COMPARE_MODELS + 1)])[1][1] == 400
+    assert parse(models=["a", "b"], deliverables=["research"])[1][1] == 400
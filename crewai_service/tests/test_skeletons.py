@@ -0,0 +1,84 @@
+import pytest
+
+pytest.importorskip("crewai")
+
+import offline_llm  # noqa: E402
+from crew import AgenticCrew  # noqa: E402
+from skeletons import SkeletonPool  # noqa: E402
+
+FIRST, SECOND = "Zebrafish aquaculture", "Lighthouse maintenance"
+
+
+@pytest.fixture
+def prompts(monkeypatch, fast_offline):
+    seen = []
+    original = offline_llm.OfflineLLM.call
+
+    def call(self, messages, *args, **kwargs):
+        seen.append(offline_llm._prompt_text(messages))
+        return original(self, messages, *args, **kwargs)
+
+    monkeypatch.setattr(offline_llm.OfflineLLM, "call", call)
+    return seen
+
+
+def run_pooled(pool: SkeletonPool, topic: str, documents=None):
+    agentic_crew = AgenticCrew(llm_model="offline", documents=documents)
+    with pool.lease("research", agentic_crew, topic) as crew:
+        result = agentic_crew.run(crew)
+    return agentic_crew, crew, result
+
+
+def test_back_to_back_runs_share_no_state(prompts):
+    pool = SkeletonPool(max_idle=1)
+    _, first_crew, _ = run_pooled(pool, FIRST, [{"name": "farm.txt", "content": "Tank density rose 14% in 2024."}])
+    first_prompts = list(prompts)
+    prompts.clear()
+    second, second_crew, result = run_pooled(pool, SECOND)
+
+    # The same pooled objects ran both requests
+    assert second_crew is first_crew
+    assert (pool.hits, pool.misses) == (1, 1)
+    assert any("Zebrafish" in prompt for prompt in first_prompts)
+    # Nothing from the first request reaches the second: topic, documents, outputs or context
+    for prompt in prompts:
+        assert "Zebrafish" not in prompt and "farm.txt" not in prompt and "Tank density" not in prompt
+    assert "zebrafish" not in result.lower()
+    assert [timing["task"] for timing in second.task_timings] == ["research_task", "writing_task"]
+    assert [(edge["from"], edge["to"]) for edge in second.compactor.edges] == [("research_task", "writing_task")]
+
+
+def test_checkin_restores_the_built_state(prompts):
+    pool = SkeletonPool(max_idle=1)
+    skeleton = pool.checkout("research", AgenticCrew(llm_model="offline"))
+    crew = skeleton.crew
+    built = {
+        "callbacks": [getattr(task, "callback", None) for task in crew.tasks],
+        "outputs": [getattr(task, "output", None) for task in crew.tasks],
+        "descriptions": [task.description for task in crew.tasks],
+        "roles": [agent.role for agent in crew.agents],
+        "tools": [list(agent.tools or []) for agent in crew.agents],
+    }
+
+    agentic_crew = AgenticCrew(llm_model="offline")
+    agentic_crew.run(skeleton.parameterize(agentic_crew, FIRST))
+    assert any(getattr(task, "output", None) is not None for task in crew.tasks)
+    pool.checkin(skeleton)
+
+    assert [getattr(task, "callback", None) for task in crew.tasks] == built["callbacks"]
+    assert [getattr(task, "output", None) for task in crew.tasks] == built["outputs"]
+    assert [task.description for task in crew.tasks] == built["descriptions"]
+    assert [agent.role for agent in crew.agents] == built["roles"]
+    assert [list(agent.tools or []) for agent in crew.agents] == built["tools"]
+    # Callbacks installed by a run never stack up across runs
+    agentic_crew = AgenticCrew(llm_model="offline")
+    agentic_crew.run(pool.checkout("research", agentic_crew).parameterize(agentic_crew, SECOND))
+    assert len(agentic_crew.task_timings) == 2
+
+
+def test_failed_runs_are_not_pooled(prompts):
+    pool = SkeletonPool(max_idle=1)
+    with pytest.raises(RuntimeError):
+        with pool.lease("research", AgenticCrew(llm_model="offline"), FIRST):
+            raise RuntimeError("boom")
+    assert pool.status()["idle"] == 0
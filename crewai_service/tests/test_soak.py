@@ -0,0 +1,106 @@
+import argparse
+
+import pytest
+
+from soak import SoakTest, parse_doc_size, parse_duration, percentile, slope
+
+
+@pytest.fixture
+def soak_test():
+    args = argparse.Namespace(
+        url="http://localhost:0", timeout=1, seed=1, crew_mix="research=1", doc_mix="0=1", model="offline",
+        slo_p95=10.0, max_error_rate=0.25, warmup=60.0, leak_mb_per_hour=20.0, workshop_runs_per_minute=2.0,
+        json_out=None,
+    )
+    return SoakTest(args)
+
+
+def run(step: int, arrived: float, latency: float, status: int = 200, queue_wait: float = None):
+    return {"step": step, "arrived": arrived, "finished": arrived + latency, "latency": latency,
+            "status": status, "queue_wait": queue_wait}
+
+
+def test_parsers():
+    assert parse_duration("90") == parse_duration("90s") == 90
+    assert parse_duration("1.5h") == 5400
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_duration("soon")
+    assert parse_doc_size("2000") == (1, 2000)
+    assert parse_doc_size("4x3000") == (4, 3000)
+    assert parse_doc_size("0") == (0, 0)
+
+
+def test_percentile_and_slope():
+    values = [float(n) for n in range(1, 11)]
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 100)) == (5.0, 10.0, 10.0)
+    assert percentile([], 95) is None
+    assert slope([(0, 1), (1, 3), (2, 5)]) == pytest.approx(2.0)
+    assert slope([(0, 1), (1, 3)]) is None
+    assert slope([(1, 1), (1, 2), (1, 3)]) is None
+
+
+def test_step_results_and_capacity(soak_test):
+    soak_test.steps = [
+        {"step": 0, "rate": 1.0, "started": 0.0, "ended": 10.0, "offered": 10, "dropped": 0},
+        {"step": 1, "rate": 2.0, "started": 10.0, "ended": 20.0, "offered": 20, "dropped": 1},
+        {"step": 2, "rate": 4.0, "started": 20.0, "ended": 30.0, "offered": 40, "dropped": 0},
+    ]
+    # Rate 1: eight successes and two rejections
+    soak_test.runs = [run(0, n, float(n + 1)) for n in range(8)] + [run(0, 8, 0.1, 429), run(0, 9, 0.1, 429)]
+    # Rate 2: queue waits climb from 0.5s in the first half to 5s in the second
+    soak_test.runs += [run(1, 10 + n / 2, 2.0, queue_wait=0.5 if n < 10 else 5.0) for n in range(19)]
+    # Rate 4: healthy, but the tail misses the 10s SLO
+    soak_test.runs += [run(2, 20 + n / 4, 12.0) for n in range(40)]
+
+    first, second, third = soak_test.step_results()
+    assert (first["completed"], first["errors"], first["error_rate"]) == (8, 2, 0.2)
+    assert first["statuses"] == {"200": 8, "429": 2}
+    assert first["throughput"] == pytest.approx(0.8)
+    assert (first["p50"], first["p95"], first["p99"]) == (4.0, 8.0, 8.0)
+    assert first["wait_p95"] is None and not first["wait_growing"]
+    # Little's law: 0.8 runs/s x 4.5s mean latency
+    assert first["concurrency"] == pytest.approx(3.6)
+
+    assert (second["errors"], second["error_rate"]) == (1, 0.05)
+    assert second["wait_p95"] == 5.0
+    assert second["wait_growing"]
+    assert third["throughput"] == pytest.approx(4.0) and third["p95"] == 12.0
+
+    # Only the first rate held its SLO, error budget and queue wait
+    assert soak_test.capacity([first, second, third]) is first
+    soak_test.args.slo_p95 = 15.0
+    assert soak_test.capacity([first, second, third]) is third
+    soak_test.args.max_error_rate = 0.0
+    assert soak_test.capacity([first]) is None
+
+
+def test_leak_report_uses_samples_after_warmup(soak_test):
+    soak_test.samples = [{"t": 0.0, "completed": 0, "rss_mb": {"server": 900.0, "worker-1": 900.0}}]
+    for n in range(1, 7):
+        rss = {"server": 200.0, "worker-1": 100.0 + 2 * n}
+        if n < 3:
+            rss["worker-2"] = 50.0
+        soak_test.samples.append({"t": 60.0 * n, "completed": 10 * n, "rss_mb": rss})
+
+    server, worker = soak_test.leak_report()
+    assert server["process"] == "server" and server["samples"] == 6
+    assert server["mb_per_hour"] == pytest.approx(0.0) and not server["suspected_leak"]
+    # 2 MB a minute and 2 MB every ten runs
+    assert worker["process"] == "worker-1"
+    assert (worker["rss_start_mb"], worker["rss_end_mb"], worker["rss_peak_mb"]) == (102.0, 112.0, 112.0)
+    assert worker["mb_per_hour"] == pytest.approx(120.0)
+    assert worker["mb_per_100_runs"] == pytest.approx(20.0)
+    assert worker["suspected_leak"]
+
+
+def test_capacity_report_converts_throughput_to_workshops(soak_test, capsys):
+    soak_test.steps = [{"step": 0, "rate": 0.5, "started": 0.0, "ended": 10.0, "offered": 10, "dropped": 0}]
+    soak_test.runs = [run(0, 0, 3.0), run(0, 5, 4.0), run(0, 6, 0.2, 503)]
+    soak_test.print_report()
+
+    out = capsys.readouterr().out
+    assert "at 0.5/s: 1 x HTTP 503" in out
+    # 0.2 runs/s x 60 / 2 runs per workshop per minute
+    assert "Sustained 0.20 runs/s (offered 0.5/s) with p95 4.0s, about 0.7 runs in flight." in out
+    assert "~6 concurrent workshops" in out
+    assert "still held up" in out
@@ -0,0 +1,133 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import store as store_module
+from admission import AdmissionController, AdmissionRejected
+from store import ExecutionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ExecutionStore(tmp_path / "store.db")
+
+
+def record(execution_id: str, **fields):
+    return {"id": execution_id, "topic": "t", "crew_type": "research", "model": "gpt-4o-mini", **fields}
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_save_and_list_executions(store):
+    store.save_execution(record("a", status="running"))
+    store.save_execution(record("b"))
+    store.save_execution(record("a", status="completed"))
+
+    assert store.get_execution("a")["status"] == "completed"
+    assert store.get_execution("missing") is None
+    # Replacing a record keeps its original position in history
+    assert [r["id"] for r in store.list_executions()] == ["b", "a"]
+
+
+def test_iter_executions_batches_and_filters(store):
+    for n in range(7):
+        store.save_execution(record(f"e{n}", model="gpt-4o" if n % 2 else "gpt-4o-mini"))
+
+    assert [r["id"] for r in store.iter_executions(batch_size=3)] == [f"e{n}" for n in range(7)]
+    rows = list(store.iter_executions(filters={"model": ["gpt-4o"]}, columns_only=True, batch_size=2))
+    assert [row["id"] for row in rows] == ["e1", "e3", "e5"]
+    assert set(rows[0]) == set(store_module.EXECUTION_COLUMNS)
+    with pytest.raises(ValueError):
+        list(store.iter_executions(filters={"record": ["x"]}))
+
+
+def test_logs_are_returned_oldest_first(store):
+    store.append_logs([("a", {"ts": n, "level": "INFO", "message": str(n)}) for n in range(5)])
+    assert [entry["message"] for entry in store.get_logs("a", limit=3)] == ["2", "3", "4"]
+
+
+def test_prune_removes_rows_past_retention(store):
+    store.save_execution(record("old"))
+    store.append_logs([("old", {"ts": time.time() - 1000, "level": "INFO"})])
+    store.save_research("key", "t", "m", "old", "result")
+    conn = store.connect()
+    for table in ("executions", "research_cache"):
+        conn.execute(f"UPDATE {table} SET created_at = ?", (time.time() - 1000,))
+    store.save_execution(record("new"))
+
+    removed = store.prune(500)
+    assert removed == {"executions": 1, "execution_logs": 1, "documents": 0, "research_cache": 1}
+    assert [r["id"] for r in store.list_executions()] == ["new"]
+
+
+def test_admission_slots_are_shared_and_released(store):
+    admission = AdmissionController(store, limit=2, timeout=0)
+    assert admission.try_acquire("a")
+    assert not admission.try_acquire("b", slots=2)
+    assert admission.try_acquire("b")
+    with pytest.raises(AdmissionRejected):
+        admission.acquire("c")
+
+    admission.release("a")
+    # Asking for more slots than exist is capped at the limit
+    admission.release("b")
+    assert admission.try_acquire("wide", slots=5)
+    assert admission.status() == {"limit": 2, "in_use": 2, "in_use_here": 2, "runs_here": 1}
+    admission.release("wide")
+    assert store.slots_in_use() == 0
+
+
+def test_slots_of_dead_processes_are_reclaimed(store):
+    admission = AdmissionController(store, limit=1, timeout=0)
+    assert admission.try_acquire("crashed")
+    store.connect().execute("UPDATE admission_slots SET pid = ?", (dead_pid(),))
+
+    # The only slot is freed as soon as another request needs it
+    assert admission.try_acquire("next")
+    assert store.release_dead_slots() == 0
+
+
+def test_stale_slots_expire(store):
+    admission = AdmissionController(store, limit=1, timeout=0, stale_after=60)
+    assert admission.try_acquire("stuck")
+    store.connect().execute("UPDATE admission_slots SET acquired_at = ?", (time.time() - 120,))
+    assert admission.try_acquire("next")
+
+
+def test_acquire_async_waits_for_a_slot(store):
+    import asyncio
+
+    admission = AdmissionController(store, limit=1, timeout=2)
+    assert admission.try_acquire("a")
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.3, admission.release, "a")
+        await admission.acquire_async("b")
+
+    asyncio.run(scenario())
+    assert store.slots_in_use() == 1
+    assert os.getpid() == store.connect().execute("SELECT pid FROM admission_slots").fetchone()[0]
+
+
+def test_run_maintenance_frees_dead_slots_and_prunes(monkeypatch):
+    import service
+
+    shared = store_module.get_store()
+    shared.save_execution(record("ancient"))
+    shared.connect().execute("UPDATE executions SET created_at = 0 WHERE id = 'ancient'")
+    shared.connect().execute(
+        "INSERT INTO admission_slots (execution_id, pid, acquired_at) VALUES ('orphan', ?, ?)", (dead_pid(), time.time())
+    )
+
+    removed = service.run_maintenance()
+    assert removed["admission_slots"] == 1
+    assert removed["executions"] >= 1
+    assert shared.get_execution("ancient") is None
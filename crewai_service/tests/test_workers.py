@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+pytest.importorskip("crewai")
+
+import service  # noqa: E402
+from workers import WarmWorkerPool  # noqa: E402
+
+
+def offline_request(topic: str):
+    run_request, error = service.parse_run_request({"topic": topic, "crew_type": "research", "model": "offline"})
+    assert error is None
+    return run_request
+
+
+def wait_until(condition, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.1)
+
+
+def test_timed_out_run_kills_and_replaces_its_worker(monkeypatch):
+    monkeypatch.setenv("CREWAI_OFFLINE_LATENCY_SECONDS", "30")
+    pool = WarmWorkerPool(1, run_timeout=1)
+    try:
+        pool.start()
+        wait_until(pool.is_ready)
+        [first] = list(pool._processes)
+
+        body, status = pool.run(offline_request("slow"))
+        assert status == 504 and "did not finish" in body["error"]
+        # The worker is not left running the abandoned job
+        assert pool.status()["busy_workers"] == 0
+        wait_until(lambda: pool.is_ready() and first not in pool._processes)
+        assert pool.status()["startup_failures"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_worker_is_recycled_after_its_execution_limit(monkeypatch):
+    monkeypatch.setenv("CREWAI_OFFLINE_LATENCY_SECONDS", "0")
+    monkeypatch.setenv("CREWAI_OFFLINE_TOKENS_PER_SECOND", "1000000000")
+    monkeypatch.setenv("CREWAI_WORKER_MAX_EXECUTIONS", "1")
+    pool = WarmWorkerPool(1)
+    try:
+        pool.start()
+        wait_until(pool.is_ready)
+        [first] = list(pool._processes)
+
+        body, status = pool.run(offline_request("recycled"))
+        assert status == 200 and body["success"]
+        # The worker retires after its run and a fresh one takes its place
+        wait_until(lambda: pool.is_ready() and first not in pool._processes)
+        assert pool.status()["recycled_workers"] == 1
+        body, status = pool.run(offline_request("after recycling"))
+        assert status == 200
+    finally:
+        pool.shutdown()
@@ -1,5 +1,17 @@
-"""Custom tools for CrewAI agents."""
+"""Custom tools for CrewAI agents.
 
-from .custom_tools import format_data, generate_summary, extract_bullet_points, score_priority
+Tool objects are resolved lazily so that importing the pure-Python engines
+in this package (scoring, formatting, fact_index) does not load crewai.
+"""
 
-__all__ = ['format_data', 'generate_summary', 'extract_bullet_points', 'score_priority']
+__all__ = [
+    'format_data', 'generate_summary', 'extract_bullet_points', 'score_priority', 'score_priorities',
+    'lookup_facts', 'find_in_documents', 'document_outline',
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import custom_tools
+        return getattr(custom_tools, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,34 +4,45 @@ from crewai.tools import tool
 from typing import Optional
 import json
 
+from .fact_index import FACT_KINDS, active_fact_index_keys, active_fact_indexes
+from .formatting import OUTPUT_FORMATS, convert_text, detect_format
+from .memo import memoized
+from .scoring import parse_criteria, parse_items, priority_tier, render_ranking_table, score_items
+from .summarize import summarize_text
+
 
 @tool("Data Formatter")
-def format_data(data: str, format_type: str = "json") -> str:
+@memoized(pure=True)
+def format_data(data: str, format_type: str = "json", input_format: str = "auto") -> str:
     """
-    Format data into a specified format (json, markdown, csv).
+    Convert data into a specified format (json, jsonl, markdown, csv).
     
     Args:
-        data: The data to format as a string
-        format_type: The output format (json, markdown, csv)
+        data: The data to format as a string (JSON, JSON lines, CSV, TSV,
+            markdown table or plain text)
+        format_type: The output format (json, jsonl, markdown, csv)
+        input_format: The input format, or "auto" to detect it
     
     Returns:
         Formatted data string
     """
     try:
-        if format_type == "json":
-            parsed = json.loads(data) if isinstance(data, str) else data
-            return json.dumps(parsed, indent=2)
-        elif format_type == "markdown":
-            return f"## Data Output\n\n```\n{data}\n```"
-        elif format_type == "csv":
-            return data.replace(", ", ",").replace(" - ", ",")
-        else:
+        source_format = detect_format(data) if input_format == "auto" else input_format
+        if source_format == "text":
+            # Free text has no records to tabulate
+            if format_type == "markdown":
+                return f"## Data Output\n\n```\n{data}\n```"
+            elif format_type == "csv":
+                return data.replace(", ", ",").replace(" - ", ",")
+        if format_type not in OUTPUT_FORMATS:
             return data
+        return convert_text(data, format_type, source_format)
     except Exception as e:
         return f"Error formatting data: {str(e)}\n\nOriginal data:\n{data}"
 
 
 @tool("Summary Generator")
+@memoized(pure=True)
 def generate_summary(text: str, max_length: Optional[int] = 500) -> str:
     """
     Generate a concise summary of the provided text.
@@ -43,24 +54,11 @@ def generate_summary(text: str, max_length: Optional[int] = 500) -> str:
     Returns:
         A summarized version of the text
     """
-    if len(text) <= max_length:
-        return text
-    
-    sentences = text.split('. ')
-    summary = []
-    current_length = 0
-    
-    for sentence in sentences:
-        if current_length + len(sentence) <= max_length:
-            summary.append(sentence)
-            current_length += len(sentence) + 2
-        else:
-            break
-    
-    return '. '.join(summary) + '...'
+    return summarize_text(text, max_length)
 
 
 @tool("Bullet Point Extractor")
+@memoized(pure=True)
 def extract_bullet_points(text: str) -> str:
     """
     Extract key points from text and format as bullet points.
@@ -86,6 +84,7 @@ def extract_bullet_points(text: str) -> str:
 
 
 @tool("Priority Scorer")
+@memoized(pure=True)
 def score_priority(item: str, criteria: str = "impact,urgency,readiness") -> str:
     """
     Score an item's priority based on specified criteria.
@@ -97,17 +96,128 @@ def score_priority(item: str, criteria: str = "impact,urgency,readiness") -> str
     Returns:
         Priority assessment with scores
     """
-    criteria_list = [c.strip() for c in criteria.split(',')]
+    criteria_list = parse_criteria(criteria)
+    row = score_items([item], criteria_list)[0]
+    
+    score_text = "\n".join(
+        [f"  - {k}: {priority_tier(v)} ({v:.1f}/10)" for k, v in row["scores"].items()]
+    )
+    return f"Priority Assessment for: {item[:50]}...\n{score_text}\n  - overall: {row['tier']} ({row['overall']:.1f}/10)"
+
+
+@tool("Batch Priority Scorer")
+@memoized(pure=True)
+def score_priorities(items: str, criteria: str = "impact,urgency,readiness") -> str:
+    """
+    Score and rank a list of items in a single pass.
+    
+    Args:
+        items: JSON array of items (strings or objects with name/description)
+            or one item per line
+        criteria: Comma-separated scoring criteria
+    
+    Returns:
+        Markdown table of items ranked by overall priority
+    """
+    item_list = parse_items(items)
+    if not item_list:
+        return "No items to score."
+    
+    criteria_list = parse_criteria(criteria)
+    rows = score_items(item_list, criteria_list)
+    return f"Priority Ranking ({len(rows)} items)\n\n{render_ranking_table(rows, criteria_list)}"
+
+
+@tool("Document Fact Lookup")
+@memoized(pure=True, scope=active_fact_index_keys)
+def lookup_facts(query: str = "", kind: str = "any", document: str = "") -> str:
+    """
+    Look up figures, names and dates pre-extracted from the provided documents.
+    
+    Args:
+        query: Words describing the fact (e.g. "annual revenue"); empty lists all
+        kind: Fact type (currency, percent, number, date, entity or any)
+        document: Optional document name to restrict the search to
+    
+    Returns:
+        Matching facts with their document, section and surrounding text
+    """
+    indexes = active_fact_indexes(document)
+    if not indexes:
+        return "No indexed documents are available for this task."
+    if kind != "any" and kind not in FACT_KINDS:
+        return f"Unknown fact kind '{kind}'. Use one of: any, {', '.join(FACT_KINDS)}"
+    
+    lines = []
+    for index in indexes:
+        for fact in index.find_facts(query, kind, limit=20 - len(lines)):
+            section = index.section_of(fact.position)
+            location = f"{index.name}, line {index.line_of(fact.position)}"
+            if section:
+                location += f", section '{section}'"
+            lines.append(f"- [{fact.kind}] {fact.text} ({location}): {index.snippet(fact.position, len(fact.text))}")
+        if len(lines) >= 20:
+            break
+    
+    if not lines:
+        kind_text = "" if kind == "any" else f"{kind} "
+        return f"No {kind_text}facts found for '{query}'."
+    return "\n".join(lines)
+
+
+@tool("Document Keyword Search")
+@memoized(pure=True, scope=active_fact_index_keys)
+def find_in_documents(keyword: str, document: str = "", max_results: int = 10) -> str:
+    """
+    Find where a keyword or phrase appears in the provided documents.
+    
+    Args:
+        keyword: The keyword or short phrase to find
+        document: Optional document name to restrict the search to
+        max_results: Maximum number of passages to return
+    
+    Returns:
+        Passages around each occurrence with document and line references
+    """
+    indexes = active_fact_indexes(document)
+    if not indexes:
+        return "No indexed documents are available for this task."
+    
+    lines = []
+    total = 0
+    for index in indexes:
+        positions = index.keyword_positions(keyword)
+        total += len(positions)
+        for position in positions[:max(0, max_results - len(lines))]:
+            lines.append(f"- {index.name}, line {index.line_of(position)}: {index.snippet(position, len(keyword))}")
     
-    scores = {}
-    for criterion in criteria_list:
-        word_count = len(item.split())
-        if word_count > 10:
-            scores[criterion] = "High"
-        elif word_count > 5:
-            scores[criterion] = "Medium"
-        else:
-            scores[criterion] = "Low"
+    if not lines:
+        return f"'{keyword}' does not appear in the provided documents."
+    return f"{total} occurrence(s) of '{keyword}':\n" + "\n".join(lines)
+
+
+@tool("Document Outline")
+@memoized(pure=True, scope=active_fact_index_keys)
+def document_outline(document: str = "") -> str:
+    """
+    List the section headings and most-mentioned names in the provided documents.
+    
+    Args:
+        document: Optional document name to restrict the outline to
+    
+    Returns:
+        Section headings and key named entities for each document
+    """
+    indexes = active_fact_indexes(document)
+    if not indexes:
+        return "No indexed documents are available for this task."
     
-    score_text = "\n".join([f"  - {k}: {v}" for k, v in scores.items()])
-    return f"Priority Assessment for: {item[:50]}...\n{score_text}"
+    parts = []
+    for index in indexes:
+        headings = "\n".join(
+            f"{'  ' * (h['level'] - 1)}- {h['title']} (line {index.line_of(h['position'])})"
+            for h in index.headings[:50]
+        ) or "- (no headings found)"
+        entities = ", ".join(f"{name} ({count})" for name, count in index.top_entities(15))
+        parts.append(f"## {index.name}\n{headings}\n\nKey names: {entities or 'none found'}")
+    return "\n\n".join(parts)
@@ -0,0 +1,313 @@
+"""Per-document fact index built once at ingestion and queried by agent tools.
+
+Documents are scanned a single time for figures, entities, dates, headings
+and keyword positions. The resulting indexes are cached by content hash and
+made visible to the document tools for the duration of a crew run.
+"""
+
+import bisect
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+FACT_KINDS = ("currency", "percent", "number", "date", "entity")
+
+# Approximate memory held by the process-wide index cache, texts included.
+INDEX_CACHE_BYTES = int(float(os.environ.get("CREWAI_FACT_INDEX_CACHE_MB", 256)) * 1024 * 1024)
+SNIPPET_CHARS = 90
+
+_CURRENCY_RE = re.compile(
+    r"(?:[$€£]\s?\d[\d,]*(?:\.\d+)?(?:\s?(?:k|m|mm|b|bn|thousand|million|billion|trillion)\b)?"
+    r"|\b\d[\d,]*(?:\.\d+)?\s?(?:USD|EUR|GBP|dollars)\b)",
+    re.I,
+)
+_PERCENT_RE = re.compile(r"\b\d+(?:\.\d+)?\s?(?:%|percent\b|pct\b|bps\b|basis points\b)", re.I)
+_UNITS = (
+    r"thousand|million|billion|k|m|bn|x|ms|seconds?|minutes?|hours?|days?|weeks?|months?|years?|"
+    r"employees|people|users|customers|clients|stores|locations|sites|plants|facilities|beds|"
+    r"patients|units|orders|transactions|calls|tickets|documents|reports|hrs?|fte|ftes|"
+    r"kg|tons?|tonnes|mw|gw|kwh|mwh|gwh|miles|km|sq\.? ?ft"
+)
+_NUMBER_RE = re.compile(rf"\b\d[\d,]*(?:\.\d+)?(?:\s?(?:{_UNITS})\b)?", re.I)
+_MONTHS = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_DATE_RE = re.compile(
+    rf"\b(?:{_MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}"
+    rf"|\d{{1,2}}\s+{_MONTHS}\s+\d{{4}}"
+    rf"|{_MONTHS}\s+\d{{4}}"
+    r"|\d{4}-\d{2}-\d{2}"
+    r"|\d{1,2}/\d{1,2}/\d{2,4}"
+    r"|Q[1-4]\s?(?:FY)?\s?'?\d{2,4}"
+    r"|FY\s?'?\d{2,4})\b"
+)
+_ENTITY_RE = re.compile(
+    r"\b(?:[A-Z][a-zA-Z0-9&\-']+(?:[ \t]+(?:of|and|for|the|&)[ \t]+|[ \t]+)){1,5}[A-Z][a-zA-Z0-9&\-']+\b"
+    r"|\b[A-Z]{2,6}\b"
+)
+_HEADING_RES = [
+    (re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$"), None),
+    (re.compile(r"^===\s*(.+?)\s*===$"), 1),
+    (re.compile(r"^(\d+(?:\.\d+)*)[.)]?\s+([A-Z][^.!?]{2,80})$"), None),
+    (re.compile(r"^([A-Z][A-Z0-9&,'\- ]{3,79})$"), 2),
+]
+_WORD_RE = re.compile(r"[a-z][a-z0-9\-]{2,}")
+
+_STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has have this that with "
+    "from they will would there their what about which when make like time just him know take "
+    "into year your some could them than then look only come its over also back after use two "
+    "how first well way even new want because these give most been were said each she may did "
+    "per such other more should very within where while being those".split()
+)
+_ENTITY_STOPWORDS = frozenset(
+    "The This That These Those And For But With From When Where While Our Your Their Its "
+    "In On At To Of By As An A If It We You They He She".split()
+)
+
+
+class Fact:
+    """A single extracted fact with its position in the source document."""
+
+    __slots__ = ("kind", "text", "position", "document")
+
+    def __init__(self, kind: str, text: str, position: int, document: str):
+        self.kind = kind
+        self.text = text
+        self.position = position
+        self.document = document
+
+
+class FactIndex:
+    """Facts, headings and keyword positions extracted from one document."""
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        self.content_hash = content_hash(text)
+        self.facts: List[Fact] = []
+        self.entity_counts: Dict[str, int] = {}
+        self.headings: List[Dict] = []
+        self.keywords: Dict[str, List[int]] = {}
+        self._fact_words: Dict[str, List[int]] = {}
+        self._line_starts: List[int] = []
+        self._build()
+
+    def _build(self) -> None:
+        text = self.text
+        claimed = bytearray(len(text))  # characters already taken by a more specific fact kind
+
+        def add(kind: str, pattern: re.Pattern) -> None:
+            for match in pattern.finditer(text):
+                start, end = match.span()
+                if any(claimed[start:end]):
+                    continue
+                value = match.group(0).strip()
+                if kind == "number" and not any(ch.isdigit() for ch in value):
+                    continue
+                if kind == "entity":
+                    value = _strip_entity(value)
+                    if not value:
+                        continue
+                    self.entity_counts[value] = self.entity_counts.get(value, 0) + 1
+                if kind != "entity":
+                    claimed[start:end] = b"\x01" * (end - start)
+                self.facts.append(Fact(kind, value, start, self.name))
+
+        add("date", _DATE_RE)
+        add("currency", _CURRENCY_RE)
+        add("percent", _PERCENT_RE)
+        add("number", _NUMBER_RE)
+        add("entity", _ENTITY_RE)
+        self.facts.sort(key=lambda fact: fact.position)
+
+        position = 0
+        for line in text.splitlines(keepends=True):
+            self._line_starts.append(position)
+            heading = _match_heading(line.strip())
+            if heading:
+                level, title = heading
+                self.headings.append({"level": level, "title": title, "position": position})
+            position += len(line)
+
+        for match in _WORD_RE.finditer(text.lower()):
+            word = match.group(0)
+            if word in _STOPWORDS:
+                continue
+            self.keywords.setdefault(word, []).append(match.start())
+
+        # Map words near each fact to the fact, so lookups by label are a dict hit.
+        for fact_id, fact in enumerate(self.facts):
+            window = text[max(0, fact.position - 60):fact.position + len(fact.text) + 20].lower()
+            for word in set(_WORD_RE.findall(window)):
+                if word not in _STOPWORDS:
+                    self._fact_words.setdefault(word, []).append(fact_id)
+
+        self.size_bytes = self._estimate_size()
+
+    def _estimate_size(self) -> int:
+        """Rough memory footprint: the text plus per-entry costs of the Python structures."""
+        positions = sum(len(p) for p in self.keywords.values()) + sum(len(p) for p in self._fact_words.values())
+        entries = len(self.keywords) + len(self._fact_words) + len(self.entity_counts)
+        return len(self.text) + 200 * len(self.facts) + 40 * positions + 120 * entries + 8 * len(self._line_starts)
+
+    def line_of(self, position: int) -> int:
+        """Return the 1-based line number for a character offset."""
+        return bisect.bisect_right(self._line_starts, position)
+
+    def section_of(self, position: int) -> Optional[str]:
+        """Return the title of the heading that precedes a character offset."""
+        section = None
+        for heading in self.headings:
+            if heading["position"] > position:
+                break
+            section = heading["title"]
+        return section
+
+    def snippet(self, position: int, length: int = 0) -> str:
+        """Return the text surrounding a character offset on a single line."""
+        start = max(0, position - SNIPPET_CHARS)
+        end = min(len(self.text), position + length + SNIPPET_CHARS)
+        prefix = "..." if start else ""
+        suffix = "..." if end < len(self.text) else ""
+        return prefix + " ".join(self.text[start:end].split()) + suffix
+
+    def find_facts(self, query: str = "", kind: str = "any", limit: int = 20) -> List[Fact]:
+        """Return facts of ``kind`` whose surrounding words match all query terms."""
+        terms = [t for t in _WORD_RE.findall(query.lower()) if t not in _STOPWORDS]
+        if terms:
+            candidate_ids = None
+            for term in terms:
+                ids = set(self._fact_words.get(term, ()))
+                candidate_ids = ids if candidate_ids is None else candidate_ids & ids
+                if not candidate_ids:
+                    break
+            candidates = [self.facts[i] for i in sorted(candidate_ids or ())]
+        else:
+            candidates = self.facts
+        if kind != "any":
+            candidates = [fact for fact in candidates if fact.kind == kind]
+        return candidates[:limit]
+
+    def keyword_positions(self, keyword: str) -> List[int]:
+        """Return character offsets of a keyword (all terms for a phrase)."""
+        terms = [t for t in _WORD_RE.findall(keyword.lower()) if t not in _STOPWORDS]
+        if not terms:
+            return []
+        if len(terms) == 1:
+            return self.keywords.get(terms[0], [])
+        # Phrase: anchor on the rarest term, then confirm the phrase in the text.
+        anchor = min(terms, key=lambda t: len(self.keywords.get(t, ())))
+        phrase = keyword.lower()
+        lowered = self.text.lower()
+        matches = []
+        for position in self.keywords.get(anchor, ()):
+            start = lowered.rfind(phrase, max(0, position - len(phrase)), position + len(phrase))
+            if start != -1 and (not matches or matches[-1] != start):
+                matches.append(start)
+        return matches
+
+    def top_entities(self, limit: int = 25) -> List[tuple]:
+        """Return the most frequently mentioned named entities."""
+        return sorted(self.entity_counts.items(), key=lambda item: -item[1])[:limit]
+
+    def summary(self) -> Dict:
+        """Counts of indexed items, for logging and execution records."""
+        counts = {kind: 0 for kind in FACT_KINDS}
+        for fact in self.facts:
+            counts[fact.kind] += 1
+        return {
+            "document": self.name,
+            "chars": len(self.text),
+            "facts": counts,
+            "headings": len(self.headings),
+            "keywords": len(self.keywords),
+        }
+
+
+def _strip_entity(value: str) -> str:
+    words = value.split()
+    while words and words[0] in _ENTITY_STOPWORDS:
+        words.pop(0)
+    if not words or (len(words) == 1 and not words[0].isupper()):
+        return ""
+    return " ".join(words)
+
+
+def _match_heading(line: str) -> Optional[tuple]:
+    if not line or len(line) > 120:
+        return None
+    for pattern, fixed_level in _HEADING_RES:
+        match = pattern.match(line)
+        if not match:
+            continue
+        if pattern is _HEADING_RES[0][0]:
+            return len(match.group(1)), match.group(2)
+        if pattern is _HEADING_RES[2][0]:
+            return match.group(1).count(".") + 1, f"{match.group(1)} {match.group(2)}"
+        if fixed_level == 2 and len(line.split()) < 2:
+            return None
+        return fixed_level, match.group(1)
+    return None
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of document content, used as the index cache key."""
+    return hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+
+
+_cache: "OrderedDict[str, FactIndex]" = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def get_fact_index(name: str, text: str) -> FactIndex:
+    """Return the fact index for a document, building it only on first sight."""
+    global _cache_bytes
+    key = f"{name}:{content_hash(text)}"
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+    index = FactIndex(name, text)
+    with _cache_lock:
+        previous = _cache.pop(key, None)
+        if previous is not None:
+            _cache_bytes -= previous.size_bytes
+        _cache[key] = index
+        _cache_bytes += index.size_bytes
+        # The newest index stays even if it alone is over the limit; the run needs it
+        while _cache_bytes > INDEX_CACHE_BYTES and len(_cache) > 1:
+            _cache_bytes -= _cache.popitem(last=False)[1].size_bytes
+    return index
+
+
+_active_indexes: ContextVar[Dict[str, FactIndex]] = ContextVar("active_fact_indexes", default={})
+
+
+@contextmanager
+def activate_fact_indexes(indexes: Dict[str, FactIndex]) -> Iterator[None]:
+    """Expose ``indexes`` (keyed by content hash) to the document tools for the current execution."""
+    token = _active_indexes.set(dict(indexes))
+    try:
+        yield
+    finally:
+        _active_indexes.reset(token)
+
+
+def active_fact_indexes(document: str = "") -> List[FactIndex]:
+    """Return the indexes visible to the current execution, optionally filtered by name."""
+    indexes = _active_indexes.get()
+    if not document:
+        return list(indexes.values())
+    wanted = document.strip().lower()
+    return [index for index in indexes.values() if wanted in index.name.lower()]
+
+
+def active_fact_index_keys() -> List[str]:
+    """Name and content hash of each visible index, for keying cached tool results."""
+    return sorted(f"{index.name}:{index.content_hash}" for index in _active_indexes.get().values())
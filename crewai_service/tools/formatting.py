@@ -0,0 +1,335 @@
+"""Streaming conversion engine behind the Data Formatter tool.
+
+Records are parsed lazily from the input string and written out in chunks,
+so converting a large payload never holds more than the source text, the
+output buffer and a small lookahead window of records.
+"""
+
+import csv
+import io
+import json
+import re
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+INPUT_FORMATS = ("json", "jsonl", "csv", "tsv", "markdown", "text")
+OUTPUT_FORMATS = ("json", "jsonl", "csv", "markdown")
+
+# Records buffered to discover table columns before streaming the rest.
+COLUMN_LOOKAHEAD = 100
+# Rows written per output chunk.
+CHUNK_ROWS = 500
+
+_WS_RE = re.compile(r"\s*")
+_MD_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+_NUMERIC_CELL_RE = re.compile(r"^[-+]?[$€£]?\d[\d,]*(?:\.\d+)?%?$")
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')]?$|[.!?]\s+[A-Z]")
+
+# Longest cell still treated as a column name when checking for a header row.
+MAX_HEADER_CELL = 40
+# Characters decoded to confirm that input opening with "[" or "{" is JSON.
+JSON_PROBE_CHARS = 64 * 1024
+
+
+class ConversionError(ValueError):
+    """Raised when input cannot be parsed in the detected or requested format."""
+
+
+def detect_format(data: str) -> str:
+    """Guess the input format from the first few lines of the payload."""
+    head = data.lstrip()[:4096]
+    if not head:
+        return "text"
+    lines = [line for line in head.splitlines() if line.strip()][:5]
+
+    if head[0] in "[{":
+        text = data.lstrip()
+        if head[0] == "{" and len(lines) > 1 and all(l.lstrip().startswith("{") for l in lines):
+            if _opens_json(text[:JSON_PROBE_CHARS].split("\n", 1)[0]):
+                return "jsonl"
+        if _opens_json(text):
+            return "json"
+    if len(lines) > 1 and lines[0].lstrip().startswith("|") and _MD_SEPARATOR_RE.match(lines[1]):
+        return "markdown"
+    if len(lines) > 1:
+        for delimiter, name in (("\t", "tsv"), (",", "csv")):
+            rows = [next(csv.reader([line], delimiter=delimiter)) for line in lines]
+            if len(rows[0]) > 1 and all(len(row) == len(rows[0]) for row in rows) and _looks_tabular(rows):
+                return name
+    return "text"
+
+
+def _opens_json(text: str) -> bool:
+    """
+    Whether ``text`` is a JSON value, decoding at most ``JSON_PROBE_CHARS``.
+
+    Longer input only has its first array element or object key checked.
+    """
+    decoder = json.JSONDecoder()
+    probe = text[:JSON_PROBE_CHARS]
+    try:
+        _, end = decoder.raw_decode(probe)
+    except json.JSONDecodeError:
+        if len(text) <= JSON_PROBE_CHARS:
+            return False
+    else:
+        return not probe[end:].strip()
+
+    pos = _WS_RE.match(probe, 1).end()
+    if probe[pos:pos + 1] in ("]", "}"):
+        return True
+    try:
+        value, end = decoder.raw_decode(probe, pos)
+    except json.JSONDecodeError:
+        return False
+    if probe[0] == "{":
+        return isinstance(value, str) and probe[_WS_RE.match(probe, end).end():].startswith(":")
+    return True
+
+
+def _looks_tabular(rows: List[List[str]]) -> bool:
+    """
+    Whether delimited rows are a table rather than prose with a steady comma count.
+
+    A table needs a header row, a numeric field, or no cell that reads like
+    the end of a sentence.
+    """
+    cells = [cell.strip() for row in rows for cell in row]
+    header = [cell.strip() for cell in rows[0]]
+    if (
+        all(0 < len(cell) <= MAX_HEADER_CELL for cell in header)
+        and len(set(header)) == len(header)
+        and not any(_NUMERIC_CELL_RE.match(cell) or _SENTENCE_END_RE.search(cell) for cell in header)
+    ):
+        return True
+    if any(_NUMERIC_CELL_RE.match(cell) for cell in cells):
+        return True
+    return not any(_SENTENCE_END_RE.search(cell) for cell in cells)
+
+
+def _iter_json(data: str) -> Iterator[Any]:
+    """Yield top-level array elements one at a time without loading the whole document."""
+    decoder = json.JSONDecoder()
+    pos = _WS_RE.match(data, 0).end()
+    if data[pos:pos + 1] != "[":
+        value, end = decoder.raw_decode(data, pos)
+        if _WS_RE.match(data, end).end() != len(data):
+            raise ConversionError(f"Unexpected trailing data at position {end}")
+        yield value
+        return
+
+    pos += 1
+    while True:
+        pos = _WS_RE.match(data, pos).end()
+        if data[pos:pos + 1] == "]":
+            return
+        value, pos = decoder.raw_decode(data, pos)
+        yield value
+        pos = _WS_RE.match(data, pos).end()
+        separator = data[pos:pos + 1]
+        if separator == ",":
+            pos += 1
+        elif separator != "]":
+            raise ConversionError(f"Expected ',' or ']' at position {pos}")
+
+
+def _iter_jsonl(data: str) -> Iterator[Any]:
+    for line_number, line in enumerate(io.StringIO(data), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ConversionError(f"Invalid JSON on line {line_number}: {e.msg}") from e
+
+
+def _iter_delimited(data: str, delimiter: str) -> Iterator[Dict[str, str]]:
+    yield from csv.DictReader(io.StringIO(data), delimiter=delimiter)
+
+
+def _split_md_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    cells = re.split(r"(?<!\\)\|", line)
+    return [cell.strip().replace("\\|", "|") for cell in cells]
+
+
+def _iter_markdown(data: str) -> Iterator[Dict[str, str]]:
+    header = None
+    for line in io.StringIO(data):
+        if not line.strip().startswith("|"):
+            if header is not None:
+                return
+            continue
+        if header is None:
+            header = _split_md_row(line)
+        elif _MD_SEPARATOR_RE.match(line):
+            continue
+        else:
+            cells = _split_md_row(line)
+            yield dict(zip(header, cells + [""] * (len(header) - len(cells))))
+
+
+def _iter_text(data: str) -> Iterator[Dict[str, str]]:
+    for line in io.StringIO(data):
+        line = line.strip()
+        if line:
+            yield {"value": line}
+
+
+def iter_records(data: str, input_format: str = "auto") -> Iterator[Any]:
+    """Lazily parse records from ``data`` in the given (or detected) format."""
+    fmt = detect_format(data) if input_format == "auto" else input_format
+    try:
+        if fmt == "json":
+            for value in _iter_json(data):
+                # A wrapper object holding one list of records is unwrapped.
+                if isinstance(value, dict) and len(value) == 1:
+                    inner = next(iter(value.values()))
+                    if isinstance(inner, list):
+                        yield from inner
+                        continue
+                yield value
+        elif fmt == "jsonl":
+            yield from _iter_jsonl(data)
+        elif fmt in ("csv", "tsv"):
+            yield from _iter_delimited(data, "\t" if fmt == "tsv" else ",")
+        elif fmt == "markdown":
+            yield from _iter_markdown(data)
+        elif fmt == "text":
+            yield from _iter_text(data)
+        else:
+            raise ConversionError(f"Unsupported input format: {input_format}")
+    except json.JSONDecodeError as e:
+        raise ConversionError(f"Invalid JSON at position {e.pos}: {e.msg}") from e
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _as_row(record: Any) -> Dict[str, Any]:
+    if isinstance(record, dict):
+        return record
+    if isinstance(record, (list, tuple)):
+        return {f"col_{i + 1}": v for i, v in enumerate(record)}
+    return {"value": record}
+
+
+def _columns(records: Iterable[Any]) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+    """Discover columns from a lookahead window and return them with the full row stream."""
+    rows = (_as_row(record) for record in records)
+    window = list(islice(rows, COLUMN_LOOKAHEAD))
+    columns: List[str] = []
+    for row in window:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    return columns, chain(window, rows)
+
+
+def write_csv(records: Iterable[Any], delimiter: str = ",") -> Iterator[str]:
+    """Yield CSV text in chunks of ``CHUNK_ROWS`` rows."""
+    columns, rows = _columns(records)
+    if not columns:
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_cell(row.get(column)) for column in columns])
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_markdown(records: Iterable[Any]) -> Iterator[str]:
+    """Yield a markdown table in chunks of ``CHUNK_ROWS`` rows."""
+    columns, rows = _columns(records)
+    if not columns:
+        return
+
+    def fmt(value: Any) -> str:
+        return _cell(value).replace("|", "\\|").replace("\n", " ")
+
+    chunk = [
+        "| " + " | ".join(fmt(c) for c in columns) + " |",
+        "|" + "|".join(["---"] * len(columns)) + "|",
+    ]
+    for row in rows:
+        chunk.append("| " + " | ".join(fmt(row.get(column)) for column in columns) + " |")
+        if len(chunk) >= CHUNK_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def write_json(records: Iterable[Any]) -> Iterator[str]:
+    """Yield a compact JSON array in chunks."""
+    encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+    chunk = ["["]
+    for count, record in enumerate(records):
+        if count:
+            chunk.append(",")
+        chunk.append(encoder.encode(record))
+        if len(chunk) >= CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("]")
+    yield "".join(chunk)
+
+
+def write_jsonl(records: Iterable[Any]) -> Iterator[str]:
+    """Yield newline-delimited compact JSON in chunks."""
+    encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+    chunk = []
+    for record in records:
+        chunk.append(encoder.encode(record))
+        if len(chunk) >= CHUNK_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+WRITERS = {
+    "json": write_json,
+    "jsonl": write_jsonl,
+    "csv": write_csv,
+    "markdown": write_markdown,
+}
+
+
+def convert(data: str, output_format: str, input_format: str = "auto") -> Iterator[str]:
+    """Stream ``data`` converted to ``output_format`` as a sequence of text chunks."""
+    writer = WRITERS.get(output_format)
+    if writer is None:
+        raise ConversionError(f"Unsupported output format: {output_format}")
+    fmt = detect_format(data) if input_format == "auto" else input_format
+    if output_format == "json" and fmt == "json" and not data.lstrip().startswith("["):
+        # A single JSON value is compacted as-is rather than wrapped in an array.
+        value = next(_iter_json(data))
+        return iter([json.dumps(value, separators=(",", ":"), ensure_ascii=False)])
+    return writer(iter_records(data, fmt))
+
+
+def convert_text(data: str, output_format: str, input_format: str = "auto") -> str:
+    """Convert ``data`` and collect the streamed chunks into a single string."""
+    out = io.StringIO()
+    for chunk in convert(data, output_format, input_format):
+        out.write(chunk)
+    return out.getvalue()
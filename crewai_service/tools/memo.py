@@ -0,0 +1,155 @@
+"""Memoization of agent tool calls.
+
+Agents often repeat a tool call with the same arguments, within a task and
+across the tasks of a crew. Calls are cached by tool name and a hash of the
+bound arguments in a per-execution cache, which is active while a crew runs
+(see ``activate_tool_cache``). Pure tools can also share results across
+executions through a bounded process-wide LRU, enabled by setting
+``CREWAI_TOOL_CACHE_SIZE``.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Results kept in the cross-execution cache for pure tools (0 disables it).
+SHARED_CACHE_SIZE = int(os.environ.get("CREWAI_TOOL_CACHE_SIZE", 0))
+
+CacheKey = Tuple[str, str]
+
+
+def call_key(name: str, signature: inspect.Signature, args: tuple, kwargs: dict, scope: Any = None) -> CacheKey:
+    """Tool name and a hash of its arguments with defaults applied, so equivalent calls match."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    payload = json.dumps([bound.arguments, scope], sort_keys=True, default=str)
+    return name, hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ToolCallCache:
+    """Results and hit counts for one execution; thread safe."""
+
+    def __init__(self):
+        self._results: Dict[CacheKey, str] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        with self._lock:
+            return self._results.get(key)
+
+    def put(self, key: CacheKey, result: str) -> None:
+        with self._lock:
+            self._results[key] = result
+
+    def record(self, name: str, outcome: str) -> None:
+        """Count a call as ``hits``, ``shared_hits`` or ``misses``."""
+        with self._lock:
+            stats = self._stats.setdefault(name, {"calls": 0, "hits": 0, "shared_hits": 0, "misses": 0})
+            stats["calls"] += 1
+            stats[outcome] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = {name: {**stats, "hit_rate": _hit_rate(stats)} for name, stats in self._stats.items()}
+        totals = {field: sum(stats[field] for stats in tools.values()) for field in ("calls", "hits", "shared_hits", "misses")}
+        return {**totals, "hit_rate": _hit_rate(totals), "tools": tools}
+
+
+def _hit_rate(stats: Dict[str, int]) -> float:
+    if not stats["calls"]:
+        return 0.0
+    return round((stats["hits"] + stats["shared_hits"]) / stats["calls"], 3)
+
+
+class SharedToolCache:
+    """Bounded LRU of pure tool results shared by all executions in the process."""
+
+    def __init__(self, max_size: int = SHARED_CACHE_SIZE):
+        self.max_size = max_size
+        self._results: "OrderedDict[CacheKey, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key: CacheKey, result: str) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+
+shared_cache = SharedToolCache()
+
+_active_cache: ContextVar[Optional[ToolCallCache]] = ContextVar("active_tool_cache", default=None)
+
+
+@contextmanager
+def activate_tool_cache(cache: ToolCallCache) -> Iterator[None]:
+    """Memoize tool calls made by the current execution in ``cache``."""
+    token = _active_cache.set(cache)
+    try:
+        yield
+    finally:
+        _active_cache.reset(token)
+
+
+def memoized(pure: bool = False, scope: Callable[[], Any] = None):
+    """
+    Decorator for tool functions, applied beneath ``@tool``.
+
+    Args:
+        pure: Whether the result depends only on the arguments (and ``scope``),
+            making it safe to share across executions.
+        scope: Returns extra state the result depends on, such as the
+            documents visible to the call; it becomes part of the key.
+    """
+    def decorate(func: Callable[..., str]) -> Callable[..., str]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = _active_cache.get()
+            if cache is None:
+                return func(*args, **kwargs)
+            try:
+                key = call_key(func.__name__, signature, args, kwargs, scope() if scope else None)
+            except TypeError:
+                # Let the tool report bad arguments itself
+                return func(*args, **kwargs)
+
+            result = cache.get(key)
+            if result is not None:
+                cache.record(func.__name__, "hits")
+                return result
+            if pure:
+                result = shared_cache.get(key)
+                if result is not None:
+                    cache.put(key, result)
+                    cache.record(func.__name__, "shared_hits")
+                    return result
+
+            result = func(*args, **kwargs)
+            cache.record(func.__name__, "misses")
+            if isinstance(result, str):
+                cache.put(key, result)
+                if pure:
+                    shared_cache.put(key, result)
+            return result
+        return wrapper
+    return decorate
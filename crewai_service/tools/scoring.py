@@ -0,0 +1,245 @@
+"""Batch priority scoring engine used by the priority scorer tools."""
+
+import json
+import math
+import re
+from typing import Dict, List, Tuple
+
+
+# Keyword lexicons per criterion. Weights are relative signal strength.
+CRITERIA_LEXICONS: Dict[str, Dict[str, float]] = {
+    "impact": {
+        "revenue": 1.0, "growth": 0.8, "margin": 0.8, "profit": 0.9, "savings": 0.9,
+        "cost": 0.5, "reduce": 0.6, "increase": 0.6, "customer": 0.6, "retention": 0.7,
+        "enterprise": 0.5, "strategic": 0.7, "transform": 0.8, "scale": 0.6,
+        "productivity": 0.7, "efficiency": 0.7, "automate": 0.6, "roi": 1.0, "value": 0.6,
+    },
+    "urgency": {
+        "urgent": 1.0, "immediately": 1.0, "critical": 0.9, "asap": 1.0, "deadline": 0.9,
+        "now": 0.5, "quarter": 0.5, "compliance": 0.8, "regulatory": 0.8, "risk": 0.6,
+        "outage": 0.9, "backlog": 0.6, "churn": 0.8, "competitor": 0.7, "blocking": 0.9,
+        "overdue": 0.9, "week": 0.5, "month": 0.4,
+    },
+    "readiness": {
+        "existing": 0.7, "available": 0.7, "pilot": 0.8, "proven": 0.9, "data": 0.5,
+        "api": 0.6, "integrated": 0.7, "ready": 1.0, "team": 0.4, "approved": 0.9,
+        "budget": 0.6, "vendor": 0.5, "platform": 0.5, "template": 0.6, "prototype": 0.8,
+        "deployed": 0.9, "tested": 0.8,
+    },
+    "risk": {
+        "risk": 0.8, "security": 0.8, "privacy": 0.8, "legacy": 0.6, "uncertain": 0.8,
+        "complex": 0.7, "dependency": 0.6, "unproven": 0.9, "regulatory": 0.6,
+        "migration": 0.6, "hallucination": 0.9, "liability": 0.9,
+    },
+    "effort": {
+        "complex": 0.8, "migration": 0.8, "custom": 0.7, "rebuild": 0.9, "integration": 0.6,
+        "multi-year": 1.0, "hire": 0.6, "retrain": 0.7, "infrastructure": 0.7,
+        "replatform": 0.9, "manual": 0.5,
+    },
+}
+
+CRITERIA_ALIASES = {
+    "value": "impact", "benefit": "impact", "priority": "urgency", "time": "urgency",
+    "feasibility": "readiness", "maturity": "readiness", "cost": "effort",
+    "complexity": "effort",
+}
+
+# Criteria where a higher score lowers overall priority.
+INVERSE_CRITERIA = {"risk", "effort"}
+
+# Numeric features and how much each criterion leans on them.
+NUMERIC_FEATURES = ["currency", "percent", "timeframe", "count", "length"]
+NUMERIC_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "impact": {"currency": 0.9, "percent": 0.6, "count": 0.2, "length": 0.2},
+    "urgency": {"timeframe": 0.8, "percent": 0.2, "length": 0.1},
+    "readiness": {"count": 0.2, "length": 0.3},
+    "risk": {"length": 0.2},
+    "effort": {"currency": 0.3, "timeframe": 0.3, "length": 0.3},
+}
+
+_WORD_RE = re.compile(r"[a-z][a-z\-]+")
+_CURRENCY_RE = re.compile(
+    r"[$€£]\s?(\d[\d,]*(?:\.\d+)?)\s*(k|m|mm|b|bn|thousand|million|billion)?\b", re.I
+)
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s?%")
+_TIMEFRAME_RE = re.compile(r"(\d+)\s*(day|week|month|quarter|year)s?\b", re.I)
+_NUMBER_RE = re.compile(r"\b\d[\d,]*(?:\.\d+)?\b")
+_LIST_PREFIX_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+_MULTIPLIERS = {
+    "k": 1e3, "thousand": 1e3, "m": 1e6, "mm": 1e6, "million": 1e6,
+    "b": 1e9, "bn": 1e9, "billion": 1e9,
+}
+_TIMEFRAME_DAYS = {"day": 1, "week": 7, "month": 30, "quarter": 90, "year": 365}
+
+
+def parse_items(items: str) -> List[str]:
+    """Parse a JSON array or newline/bullet separated list into item strings."""
+    text = items.strip()
+    if text.startswith("["):
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, list):
+            result = []
+            for entry in parsed:
+                if isinstance(entry, dict):
+                    name = entry.get("name") or entry.get("title") or ""
+                    detail = entry.get("description") or entry.get("details") or ""
+                    entry = f"{name}: {detail}" if name and detail else (name or detail)
+                entry = str(entry).strip()
+                if entry:
+                    result.append(entry)
+            return result
+    lines = [_LIST_PREFIX_RE.sub("", line).strip() for line in text.splitlines()]
+    return [line for line in lines if line]
+
+
+def parse_criteria(criteria: str) -> List[str]:
+    """Split a comma-separated criteria string, dropping blanks and duplicates."""
+    seen = []
+    for criterion in criteria.split(","):
+        criterion = criterion.strip().lower()
+        if criterion and criterion not in seen:
+            seen.append(criterion)
+    return seen or ["impact", "urgency", "readiness"]
+
+
+def _lexicon_for(criterion: str) -> Dict[str, float]:
+    key = CRITERIA_ALIASES.get(criterion, criterion)
+    if key in CRITERIA_LEXICONS:
+        return CRITERIA_LEXICONS[key]
+    # Unknown criterion: the criterion's own words are its lexicon.
+    return {word: 1.0 for word in _WORD_RE.findall(criterion)}
+
+
+def _numeric_features(item: str) -> Dict[str, float]:
+    largest = 0.0
+    for amount, unit in _CURRENCY_RE.findall(item):
+        value = float(amount.replace(",", "")) * _MULTIPLIERS.get(unit.lower(), 1.0)
+        largest = max(largest, value)
+    percents = [float(p) for p in _PERCENT_RE.findall(item)]
+    days = [int(n) * _TIMEFRAME_DAYS[unit.lower()] for n, unit in _TIMEFRAME_RE.findall(item)]
+    words = len(item.split())
+    return {
+        # $1k -> ~0.25, $1M -> ~0.5, $1B -> ~0.75
+        "currency": min(math.log10(largest + 1) / 12, 1.0),
+        "percent": min(max(percents, default=0.0) / 50, 1.0),
+        # Shorter deadlines score higher: 1 week ~0.9, 1 year ~0.2
+        "timeframe": 1 / (1 + min(days) / 90) if days else 0.0,
+        "count": min(len(_NUMBER_RE.findall(item)) / 5, 1.0),
+        "length": min(math.log1p(words) / math.log1p(60), 1.0),
+    }
+
+
+def _build_feature_space(criteria: List[str]) -> Tuple[List[str], List[List[float]]]:
+    """Build the feature column names and the criteria x features weight matrix."""
+    vocabulary: List[str] = []
+    for criterion in criteria:
+        for word in _lexicon_for(criterion):
+            if word not in vocabulary:
+                vocabulary.append(word)
+    columns = [f"kw:{word}" for word in vocabulary] + NUMERIC_FEATURES
+
+    weights = []
+    for criterion in criteria:
+        lexicon = _lexicon_for(criterion)
+        numeric = NUMERIC_WEIGHTS.get(CRITERIA_ALIASES.get(criterion, criterion), {"length": 0.3})
+        row = [lexicon.get(word, 0.0) for word in vocabulary]
+        row += [numeric.get(name, 0.0) for name in NUMERIC_FEATURES]
+        weights.append(row)
+    return columns, weights
+
+
+def _feature_matrix(items: List[str], columns: List[str]) -> List[List[float]]:
+    keyword_index = {col[3:]: i for i, col in enumerate(columns) if col.startswith("kw:")}
+    numeric_offset = len(keyword_index)
+    matrix = []
+    for item in items:
+        row = [0.0] * len(columns)
+        for word in _WORD_RE.findall(item.lower()):
+            index = keyword_index.get(word)
+            if index is None and word.endswith("s"):
+                index = keyword_index.get(word[:-1])
+            if index is not None:
+                row[index] = min(row[index] + 1.0, 2.0)
+        numeric = _numeric_features(item)
+        for offset, name in enumerate(NUMERIC_FEATURES):
+            row[numeric_offset + offset] = numeric[name]
+        matrix.append(row)
+    return matrix
+
+
+def score_items(items: List[str], criteria: List[str]) -> List[Dict]:
+    """
+    Score and rank items against criteria in a single pass.
+
+    Builds one feature matrix for all items and multiplies it by the
+    criteria weight matrix, so scoring N items costs one pass rather than
+    N separate calls.
+
+    Returns:
+        Rows sorted by overall score (descending), each with per-criterion
+        scores on a 0-10 scale, an overall score, tier and 1-based rank.
+    """
+    if not items:
+        return []
+    columns, weights = _build_feature_space(criteria)
+    matrix = _feature_matrix(items, columns)
+
+    # scores[i][c] = matrix[i] . weights[c]
+    raw = [[sum(x * w for x, w in zip(row, weight_row)) for weight_row in weights] for row in matrix]
+
+    rows = []
+    for index, (item, item_scores) in enumerate(zip(items, raw)):
+        scaled = {
+            criterion: round(10 * (1 - math.exp(-value / 1.5)), 1)
+            for criterion, value in zip(criteria, item_scores)
+        }
+        signed = [
+            10 - scaled[c] if CRITERIA_ALIASES.get(c, c) in INVERSE_CRITERIA else scaled[c]
+            for c in criteria
+        ]
+        overall = round(sum(signed) / len(signed), 1)
+        rows.append({
+            "index": index,
+            "item": item,
+            "scores": scaled,
+            "overall": overall,
+            "tier": priority_tier(overall),
+        })
+
+    rows.sort(key=lambda row: (-row["overall"], row["index"]))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return rows
+
+
+def priority_tier(score: float) -> str:
+    """Map a 0-10 score onto the High/Medium/Low tiers."""
+    if score >= 6:
+        return "High"
+    if score >= 3:
+        return "Medium"
+    return "Low"
+
+
+def render_ranking_table(rows: List[Dict], criteria: List[str], max_item_chars: int = 80) -> str:
+    """Render ranked rows as a markdown table."""
+    header = ["Rank", "Item"] + [c.title() for c in criteria] + ["Overall", "Tier"]
+    lines = [
+        "| " + " | ".join(header) + " |",
+        "|" + "|".join(["---"] * len(header)) + "|",
+    ]
+    for row in rows:
+        item = row["item"].replace("\n", " ")
+        if len(item) > max_item_chars:
+            item = item[:max_item_chars - 3] + "..."
+        # Escape after truncating so the cut never splits an escape
+        item = item.replace("|", "\\|")
+        cells = [str(row["rank"]), item]
+        cells += [f"{row['scores'][c]:.1f}" for c in criteria]
+        cells += [f"{row['overall']:.1f}", row["tier"]]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
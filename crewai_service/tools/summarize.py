@@ -0,0 +1,30 @@
+"""Extractive summarization behind the Summary Generator tool.
+
+Kept free of crewai so the service can use it outside of agent tool calls,
+for example when compacting task outputs between tasks.
+"""
+
+
+def summarize_text(text: str, max_length: int = 500) -> str:
+    """
+    Keep the leading sentences of ``text`` that fit in ``max_length`` characters.
+
+    Returns:
+        The text unchanged when it already fits, otherwise the kept sentences
+        followed by an ellipsis.
+    """
+    if len(text) <= max_length:
+        return text
+    
+    sentences = text.split('. ')
+    summary = []
+    current_length = 0
+    
+    for sentence in sentences:
+        if current_length + len(sentence) <= max_length:
+            summary.append(sentence)
+            current_length += len(sentence) + 2
+        else:
+            break
+    
+    return '. '.join(summary) + '...'
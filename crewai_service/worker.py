@@ -0,0 +1,165 @@
+"""Queue worker node for ``CREWAI_EXECUTION_MODE=queue``.
+
+Leases crew jobs from the shared job queue, runs them and stores their
+responses. Start as many as needed on the host that holds the store file
+(``CREWAI_DB_PATH``)::
+
+    python worker.py --concurrency 2
+
+The store is SQLite in WAL mode, which needs shared memory between its
+processes, so workers must run on the API node's host. A worker whose
+store file is on a network filesystem refuses to start.
+
+SIGTERM or Ctrl-C stops leasing new jobs and exits once running jobs finish.
+A worker that passes ``CREWAI_WORKER_MAX_RSS_MB`` or
+``CREWAI_WORKER_MAX_EXECUTIONS`` drains the same way and then re-executes
+itself as a fresh process.
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jobqueue import JobQueue, StoreNotLocal, new_worker_id
+from logs import logger, setup_logging, shutdown_logging
+from memory import recycle_reason, set_exclusive, worker_stats
+
+CONCURRENCY = int(os.environ.get("CREWAI_WORKER_CONCURRENCY", 1))
+POLL_INTERVAL = float(os.environ.get("CREWAI_QUEUE_POLL_SECONDS", 1.0))
+
+
+class QueueWorker:
+    """Runs up to ``concurrency`` leased jobs at a time and keeps their leases alive."""
+
+    def __init__(self, queue: JobQueue, concurrency: int = CONCURRENCY, poll_interval: float = POLL_INTERVAL):
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.worker_id = new_worker_id()
+        self.completed = 0
+        self.recycle_reason = None
+        self._active: Dict[str, Any] = {}  # job id -> runner.RunOwnership
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def stop(self, *_) -> None:
+        if not self._stopping.is_set():
+            logger.info(f"Worker {self.worker_id} draining {len(self._active)} running job(s)")
+        self._stopping.set()
+
+    def info(self) -> Dict:
+        return {"completed": self.completed, **worker_stats(self.completed)}
+
+    def run(self) -> None:
+        setup_logging()
+        started = time.monotonic()
+        import runner  # noqa: F401 - load crewai before taking any work
+        logger.info(f"Worker {self.worker_id} loaded crewai in {time.monotonic() - started:.1f}s")
+        self.queue.register_worker(self.worker_id, self.concurrency, info=self.info())
+
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="queue-heartbeat", daemon=True)
+        heartbeat.start()
+        slots = [
+            threading.Thread(target=self._slot_loop, name=f"queue-slot-{n}")
+            for n in range(self.concurrency)
+        ]
+        for slot in slots:
+            slot.start()
+        for slot in slots:
+            slot.join()
+        self.queue.unregister_worker(self.worker_id)
+        logger.info(f"Worker {self.worker_id} stopped after {self.completed} job(s)")
+
+    def _slot_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.lease(self.worker_id)
+            except Exception:
+                logger.exception("Failed to lease a job")
+                job = None
+            if job is None:
+                self._stopping.wait(self.poll_interval)
+                continue
+            self._run_job(*job)
+
+    def _run_job(self, job_id: str, run_request: Dict) -> None:
+        import runner
+        ownership = runner.RunOwnership(confirm=lambda: self._renew(job_id))
+        with self._lock:
+            self._active[job_id] = ownership
+        try:
+            with runner.owned_by(ownership):
+                response, status = runner.run_crew_request(run_request)
+        except BaseException:
+            response, status = {"success": False, "error": "Worker failed", "details": traceback.format_exc()}, 500
+        finally:
+            with self._lock:
+                self._active.pop(job_id, None)
+        if not self.queue.complete(job_id, self.worker_id, response, status):
+            logger.warning(f"Lease on job {job_id} was lost before it finished; result discarded")
+        with self._lock:
+            self.completed += 1
+            reason = recycle_reason(self.completed)
+            if reason and self.recycle_reason is None:
+                self.recycle_reason = reason
+                logger.info(f"Recycling worker {self.worker_id}: {reason}")
+                self.stop()
+
+    def _renew(self, job_id: str) -> bool:
+        """Extend a job's lease, reporting whether this worker still holds it."""
+        try:
+            return self.queue.heartbeat(job_id, self.worker_id)
+        except Exception:
+            # A busy store is not a lost lease; complete() still checks ownership
+            logger.exception(f"Failed to renew the lease on job {job_id}")
+            return True
+
+    def _heartbeat_loop(self) -> None:
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                active = dict(self._active)
+            for job_id, ownership in active.items():
+                if not self._renew(job_id):
+                    # Another worker may already be running it; stop ours and drop its result
+                    logger.warning(f"Lost lease on job {job_id}; cancelling it")
+                    ownership.revoke()
+            try:
+                self.queue.register_worker(self.worker_id, self.concurrency, busy=len(active), info=self.info())
+            except Exception:
+                logger.exception("Worker heartbeat failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run crew jobs from the shared queue.")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="jobs to run at once")
+    args = parser.parse_args()
+
+    try:
+        queue = JobQueue()
+    except StoreNotLocal as e:
+        sys.exit(str(e))
+    worker = QueueWorker(queue, concurrency=args.concurrency)
+    # Per-run memory budgets only mean something when runs do not share the process
+    set_exclusive(worker.concurrency == 1)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    try:
+        worker.run()
+    finally:
+        shutdown_logging()
+    if worker.recycle_reason:
+        # Same pid and worker id, but a fresh interpreter with nothing left over from earlier runs
+        os.execv(sys.executable, [sys.executable, os.path.abspath(__file__), *sys.argv[1:]])
+
+
+if __name__ == '__main__':
+    main()
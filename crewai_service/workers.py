@@ -0,0 +1,438 @@
+"""Execution workers with crewai pre-loaded.
+
+The HTTP front end never imports crewai itself, so /health and the metadata
+endpoints answer immediately after start. Crew runs go to one of two
+executors, chosen by ``CREWAI_WARM_WORKERS``:
+
+* ``0`` (default): runs in-process on the request thread; crewai is imported
+  by a background thread at startup.
+* ``N > 0``: a pool of N worker processes, each of which loads crewai once
+  and then serves runs one at a time.
+
+``CREWAI_READY_WORKERS`` sets how many warm workers must be up before the
+service reports ready (defaults to all of them).
+
+With ``CREWAI_EXECUTION_MODE=queue`` this node runs nothing itself: runs are
+enqueued for separate ``worker.py`` nodes (see jobqueue.py), and readiness
+reflects how many of them are heartbeating.
+"""
+
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional, Tuple
+
+from logs import logger, setup_logging
+from memory import recycle_reason, set_exclusive, worker_stats
+
+Response = Tuple[Dict[str, Any], int]
+
+WARM_WORKERS = int(os.environ.get("CREWAI_WARM_WORKERS", 0))
+READY_WORKERS = int(os.environ.get("CREWAI_READY_WORKERS", WARM_WORKERS or 1))
+EXECUTION_MODE = os.environ.get("CREWAI_EXECUTION_MODE", "local")
+SUPERVISE_INTERVAL = 0.5
+# A warm-pool run that has not finished by then returns 504 and frees its slot (0 waits forever).
+RUN_TIMEOUT = float(os.environ.get("CREWAI_RUN_TIMEOUT_SECONDS", 3600))
+# Respawn delay after a worker exits during startup, doubling per consecutive failure.
+RESPAWN_BACKOFF = float(os.environ.get("CREWAI_RESPAWN_BACKOFF_SECONDS", 1))
+RESPAWN_MAX_BACKOFF = float(os.environ.get("CREWAI_RESPAWN_MAX_BACKOFF_SECONDS", 60))
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class InProcessExecutor:
+    """Runs crews on the calling thread once crewai has been imported in the background."""
+
+    def __init__(self):
+        self._loaded = threading.Event()
+        self._error: Optional[str] = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._preload, name="crewai-preload", daemon=True).start()
+
+    def _preload(self) -> None:
+        started = time.monotonic()
+        try:
+            import runner  # noqa: F401 - imports crewai
+            logger.info(f"crewai loaded in {time.monotonic() - started:.1f}s")
+        except Exception:
+            self._error = traceback.format_exc()
+            logger.error(f"Failed to load crewai: {self._error}")
+        finally:
+            self._loaded.set()
+
+    def is_ready(self) -> bool:
+        return self._loaded.is_set() and self._error is None
+
+    def last_ready(self) -> bool:
+        return self.is_ready()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "mode": "in_process",
+            "ready": self.is_ready(),
+            "warm_workers": 1 if self.is_ready() else 0,
+            "required_workers": 1,
+            # This process is also the HTTP server, so it is measured but never recycled
+            "workers": [worker_stats(self._executions())],
+            "error": self._error,
+        }
+
+    def _executions(self) -> int:
+        runner = sys.modules.get("runner")
+        return runner.executions_served if runner is not None else 0
+
+    def run(self, run_request: Dict[str, Any]) -> Response:
+        self.start()
+        import runner
+        return runner.run_crew_request(run_request)
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _worker_main(jobs, results) -> None:
+    """Entry point of a warm worker process; ``jobs`` is this worker's own queue."""
+    if SERVICE_DIR not in sys.path:
+        sys.path.insert(0, SERVICE_DIR)
+    pid = os.getpid()
+    setup_logging()
+    # One job at a time, so per-run memory budgets can be enforced here
+    set_exclusive()
+    try:
+        import runner
+    except Exception:
+        results.put(("load_failed", pid, None, traceback.format_exc()))
+        return
+    results.put(("stats", pid, None, worker_stats(0)))
+    results.put(("ready", pid, None, None))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, run_request = job
+        try:
+            response = runner.run_crew_request(run_request)
+            results.put(("done", pid, job_id, response))
+        except BaseException:
+            results.put(("failed", pid, job_id, traceback.format_exc()))
+        results.put(("stats", pid, None, worker_stats(runner.executions_served)))
+
+        # Checked between jobs, so a worker only retires once its run has finished
+        reason = recycle_reason(runner.executions_served)
+        if reason:
+            results.put(("recycling", pid, None, reason))
+            break
+        results.put(("idle", pid, None, None))
+
+
+def _failed(error: str, status: int = 500, details: Optional[str] = None) -> Response:
+    body: Dict[str, Any] = {"success": False, "error": error}
+    if details:
+        body["details"] = details
+    return body, status
+
+
+class WarmWorkerPool:
+    """
+    Fixed-size pool of worker processes that keep crewai loaded between runs.
+
+    Each worker has its own job queue and is handed one job at a time, so
+    the pool always knows which run a worker holds; if the worker dies,
+    that run fails at once instead of waiting out ``RUN_TIMEOUT``. A run
+    that exceeds ``RUN_TIMEOUT`` has its worker killed and replaced, so an
+    abandoned run never keeps a worker busy after its admission slot is
+    released. Workers that exit before becoming ready are replaced with
+    exponential backoff.
+    """
+
+    def __init__(self, size: int, required: int = READY_WORKERS, run_timeout: float = RUN_TIMEOUT):
+        self.size = size
+        self.required = min(max(1, required), size)
+        self.run_timeout = run_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._job_queues: Dict[int, Any] = {}  # pid -> that worker's job queue
+        self._ready: set = set()
+        self._idle: set = set()
+        self._pending: "deque[Tuple[str, Dict[str, Any]]]" = deque()
+        self._in_flight: Dict[int, str] = {}  # pid -> job id
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self._stopping = False
+        self._last_error: Optional[str] = None
+        # Workers in a row that exited before becoming ready; reset by the next ready one
+        self._startup_failures = 0
+        self._respawns = 0
+        self._respawn_at = 0.0
+        self._stats: Dict[int, Dict[str, Any]] = {}
+        self._recycling: set = set()
+        self.recycled = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for _ in range(self.size):
+                self._spawn()
+        threading.Thread(target=self._collect, name="warm-pool-collector", daemon=True).start()
+
+    def _spawn(self) -> None:
+        jobs = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main, args=(jobs, self._results), name="crew-worker", daemon=True
+        )
+        process.start()
+        self._processes[process.pid] = process
+        self._job_queues[process.pid] = jobs
+
+    def _collect(self) -> None:
+        """Route worker messages to futures, hand out jobs and replace workers that die."""
+        supervised = time.monotonic()
+        while not self._stopping:
+            try:
+                kind, pid, job_id, payload = self._results.get(timeout=SUPERVISE_INTERVAL)
+            except queue.Empty:
+                kind = None
+            if kind is not None:
+                self._handle(kind, pid, job_id, payload)
+            if time.monotonic() - supervised >= SUPERVISE_INTERVAL:
+                self._supervise()
+                supervised = time.monotonic()
+
+    def _handle(self, kind: str, pid: int, job_id: Optional[str], payload: Any) -> None:
+        with self._lock:
+            if kind in ("ready", "idle"):
+                if kind == "ready":
+                    self._ready.add(pid)
+                    self._startup_failures = 0
+                    self._last_error = None
+                self._idle.add(pid)
+                self._dispatch()
+            elif kind == "load_failed":
+                self._last_error = payload
+            elif kind == "stats":
+                self._stats[pid] = payload
+            elif kind == "recycling":
+                # Start the replacement now so capacity returns as soon as it has loaded
+                logger.info(f"Recycling warm worker {pid}: {payload}")
+                self._ready.discard(pid)
+                self._recycling.add(pid)
+                self.recycled += 1
+                if not self._stopping:
+                    self._spawn()
+            elif kind in ("done", "failed"):
+                self._in_flight.pop(pid, None)
+                future = self._futures.pop(job_id, None)
+                if future is not None:
+                    if kind == "done":
+                        future.set_result(payload)
+                    else:
+                        future.set_result(_failed("Worker failed", details=payload))
+
+    def _dispatch(self) -> None:
+        """Hand queued runs to idle workers; called with the lock held."""
+        while self._pending and self._idle:
+            job_id, run_request = self._pending.popleft()
+            if job_id not in self._futures:
+                continue  # the caller timed out before a worker was free
+            pid = self._idle.pop()
+            self._in_flight[pid] = job_id
+            self._job_queues[pid].put((job_id, run_request))
+
+    def _supervise(self) -> None:
+        with self._lock:
+            if self._stopping:
+                return
+            for pid, process in list(self._processes.items()):
+                if process.is_alive():
+                    continue
+                del self._processes[pid]
+                self._job_queues.pop(pid, None)
+                self._stats.pop(pid, None)
+                self._idle.discard(pid)
+                if pid in self._recycling:
+                    self._recycling.discard(pid)
+                    continue
+                if pid not in self._ready:
+                    self._startup_failures += 1
+                    if self._last_error is None:
+                        self._last_error = f"Warm worker exited during startup with code {process.exitcode}"
+                    delay = min(RESPAWN_MAX_BACKOFF, RESPAWN_BACKOFF * 2 ** (self._startup_failures - 1))
+                    self._respawn_at = time.monotonic() + delay
+                    logger.warning(f"Warm worker {pid} exited during startup; respawning in {delay:.1f}s")
+                self._ready.discard(pid)
+                job_id = self._in_flight.pop(pid, None)
+                future = self._futures.pop(job_id, None) if job_id else None
+                if future is not None:
+                    future.set_result(_failed(f"Worker exited with code {process.exitcode}"))
+                self._respawns += 1
+
+            if self._respawns and time.monotonic() >= self._respawn_at:
+                for _ in range(self._respawns):
+                    self._spawn()
+                self._respawns = 0
+            if self._unavailable():
+                self._fail_pending()
+
+    def _unavailable(self) -> bool:
+        """No worker is up and the last one failed to start; called with the lock held."""
+        return not self._ready and self._last_error is not None
+
+    def _fail_pending(self) -> None:
+        while self._pending:
+            job_id, _ = self._pending.popleft()
+            future = self._futures.pop(job_id, None)
+            if future is not None:
+                future.set_result(_failed("No warm workers available", 503, self._last_error))
+
+    def is_ready(self) -> bool:
+        return len(self._ready) >= self.required
+
+    def last_ready(self) -> bool:
+        return self.is_ready()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": "warm_pool",
+                "ready": self.is_ready(),
+                "warm_workers": len(self._ready),
+                "required_workers": self.required,
+                "pool_size": self.size,
+                "busy_workers": len(self._in_flight),
+                "queued_runs": len(self._pending),
+                "recycled_workers": self.recycled,
+                "startup_failures": self._startup_failures,
+                "workers": list(self._stats.values()),
+                "error": self._last_error,
+            }
+
+    def submit(self, run_request: Dict[str, Any]) -> Future:
+        self.start()
+        job_id = uuid.uuid4().hex
+        future: Future = Future()
+        future.job_id = job_id
+        with self._lock:
+            if self._unavailable():
+                future.set_result(_failed("No warm workers available", 503, self._last_error))
+                return future
+            self._futures[job_id] = future
+            self._pending.append((job_id, run_request))
+            self._dispatch()
+        return future
+
+    def run(self, run_request: Dict[str, Any]) -> Response:
+        future = self.submit(run_request)
+        try:
+            return future.result(timeout=self.run_timeout or None)
+        except FutureTimeout:
+            with self._lock:
+                # A queued run is dropped at dispatch; a running one takes its worker down with it
+                self._futures.pop(future.job_id, None)
+                pid = next((pid for pid, job_id in self._in_flight.items() if job_id == future.job_id), None)
+                if pid is not None:
+                    logger.warning(f"Killing warm worker {pid}: its run exceeded {self.run_timeout:.0f}s")
+                    del self._in_flight[pid]
+                    self._processes[pid].kill()
+            return _failed(f"Run did not finish within {self.run_timeout:.0f}s", 504)
+
+    def shutdown(self) -> None:
+        self._stopping = True
+        with self._lock:
+            self._fail_pending()
+            for jobs in self._job_queues.values():
+                jobs.put(None)
+        for process in list(self._processes.values()):
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+class QueueExecutor:
+    """Stand-in executor for API nodes whose runs are executed by queue workers."""
+
+    def __init__(self, required: int = READY_WORKERS):
+        self.required = max(1, required)
+        self._queue = None
+        self._ready = False
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            from jobqueue import JobQueue
+            self._queue = JobQueue()
+        return self._queue
+
+    def start(self) -> None:
+        # Opening the queue checks that its store can be shared; fail at startup, not on the first run
+        self.queue
+
+    def is_ready(self) -> bool:
+        self._ready = len(self.queue.live_workers()) >= self.required
+        return self._ready
+
+    def last_ready(self) -> bool:
+        """Readiness as of the last ``is_ready`` or ``status`` call; reads nothing from the store."""
+        return self._ready
+
+    def status(self) -> Dict[str, Any]:
+        live = self.queue.live_workers()
+        self._ready = len(live) >= self.required
+        return {
+            "mode": "queue",
+            "ready": self._ready,
+            "warm_workers": len(live),
+            "required_workers": self.required,
+            "capacity": sum(worker["capacity"] for worker in live),
+            "busy_workers": sum(worker["busy"] for worker in live),
+            "jobs": self.queue.counts(),
+            "workers": live,
+            "error": None,
+        }
+
+    def run(self, run_request: Dict[str, Any]) -> Response:
+        raise RuntimeError("Runs are executed by queue workers in queue mode")
+
+    def shutdown(self) -> None:
+        pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide executor chosen by ``CREWAI_EXECUTION_MODE`` and ``CREWAI_WARM_WORKERS``."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if EXECUTION_MODE == "queue":
+                _pool = QueueExecutor()
+            elif WARM_WORKERS > 0:
+                _pool = WarmWorkerPool(WARM_WORKERS)
+            else:
+                _pool = InProcessExecutor()
+        return _pool
+
+
+def start_pool() -> None:
+    """Begin warming execution workers without blocking the caller."""
+    get_pool().start()
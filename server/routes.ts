@@ -3713,16 +3713,29 @@ Return ONLY valid JSON with this structure:
   });
   
   // Get execution history
+  // Projection and summary options are passed through so large results can be skipped
+  function historyQuery(query: Record<string, any>, defaults: Record<string, string> = {}): string {
+    const params = new URLSearchParams(defaults);
+    for (const key of ["limit", "fields", "summary"]) {
+      if (typeof query[key] === "string" && query[key]) {
+        params.set(key, query[key]);
+      }
+    }
+    const encoded = params.toString();
+    return encoded ? `?${encoded}` : "";
+  }
+
   app.get("/api/crewai/history", async (req, res) => {
-    const limit = req.query.limit || 10;
-    const result = await proxyCrewAIRequest(`${CREWAI_SERVICE_URL}/history?limit=${limit}`);
+    const query = historyQuery(req.query, { limit: "10" });
+    const result = await proxyCrewAIRequest(`${CREWAI_SERVICE_URL}/history${query}`);
     return res.status(result.status).json(result.data);
   });
   
   // Get specific execution
   app.get("/api/crewai/history/:executionId", async (req, res) => {
     const { executionId } = req.params;
-    const result = await proxyCrewAIRequest(`${CREWAI_SERVICE_URL}/history/${executionId}`);
+    const query = historyQuery(req.query);
+    const result = await proxyCrewAIRequest(`${CREWAI_SERVICE_URL}/history/${executionId}${query}`);
     return res.status(result.status).json(result.data);
   });
 